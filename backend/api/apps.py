@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from .athlete_cache import _on_athlete_change
+        from .models import Athlete
+
+        post_save.connect(_on_athlete_change, sender=Athlete, dispatch_uid="athlete_cache_save")
+        post_delete.connect(_on_athlete_change, sender=Athlete, dispatch_uid="athlete_cache_delete")
@@ -0,0 +1,132 @@
+"""Read-through in-process cache of Athlete metadata.
+
+The athlete table is small (a few hundred rows) but is read several times per
+ingestion / rebuild request. The whole table is kept in process memory and
+tagged with the version number in the ``athlete_meta_version`` row, which every
+write (post_save / post_delete on Athlete, or an explicit
+``invalidate_athlete_cache()`` after bulk updates) bumps once it commits, so
+readers in every worker process reload. The version and the table are always
+read from the primary database, never from a read replica;
+``ATHLETE_CACHE_TTL`` only bounds how long a snapshot is reused.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import F
+
+VERSION_ID = 1
+
+
+@dataclass(frozen=True)
+class AthleteMeta:
+    athlete_id: str
+    athlete_name: str
+    jersey_number: str
+    uniform_name: str
+    position: str
+    is_active: bool
+
+    @property
+    def is_registered(self) -> bool:
+        return bool(self.athlete_name and self.jersey_number and self.uniform_name)
+
+
+_lock = threading.Lock()
+# version, 読み込み時刻, athlete_id -> AthleteMeta
+_entry: tuple[int, float, dict[str, AthleteMeta]] | None = None
+
+
+def _cache_ttl() -> float:
+    return float(getattr(settings, "ATHLETE_CACHE_TTL", 60))
+
+
+def _current_version() -> int:
+    from .models import AthleteMetaVersion
+
+    versions = AthleteMetaVersion.objects.using(router.db_for_write(AthleteMetaVersion))
+    return versions.filter(id=VERSION_ID).values_list("value", flat=True).first() or 0
+
+
+def _load() -> dict[str, AthleteMeta]:
+    from .models import Athlete
+
+    # 読み込んだ内容は書き込みで版が上がるまで使い回すので、遅れうるレプリカではなく書き込み先から読む
+    athletes = Athlete.objects.using(router.db_for_write(Athlete))
+    return {
+        athlete_id: AthleteMeta(athlete_id, name, jersey, uniform, position, is_active)
+        for athlete_id, name, jersey, uniform, position, is_active in athletes.values_list(
+            "athlete_id",
+            "athlete_name",
+            "jersey_number",
+            "uniform_name",
+            "position",
+            "is_active",
+        )
+    }
+
+
+def get_athlete_metadata() -> dict[str, AthleteMeta]:
+    """Return athlete_id -> AthleteMeta for every athlete (treat the result as read-only)."""
+    global _entry
+
+    version = _current_version()
+    entry = _entry
+    if entry is not None and entry[0] == version and time.monotonic() - entry[1] < _cache_ttl():
+        return entry[2]
+
+    with _lock:
+        entry = _entry
+        if entry is not None and entry[0] == version and time.monotonic() - entry[1] < _cache_ttl():
+            return entry[2]
+        data = _load()
+        _entry = (version, time.monotonic(), data)
+        return data
+
+
+def athlete_positions(athlete_ids: Iterable[str] | None = None) -> dict[str, str]:
+    """athlete_id -> "GK" / "FP" (unknown values are reported as "FP")."""
+    metadata = get_athlete_metadata()
+    if athlete_ids is None:
+        selected = metadata.values()
+    else:
+        selected = (metadata[a] for a in athlete_ids if a in metadata)
+    return {
+        meta.athlete_id: (meta.position if meta.position in ("GK", "FP") else "FP")
+        for meta in selected
+    }
+
+
+def _drop_local() -> None:
+    global _entry
+
+    _entry = None
+
+
+def _bump_version() -> None:
+    from .models import AthleteMetaVersion
+
+    _drop_local()
+    versions = AthleteMetaVersion.objects.using(router.db_for_write(AthleteMetaVersion))
+    if not versions.filter(id=VERSION_ID).update(value=F("value") + 1):
+        versions.get_or_create(id=VERSION_ID, defaults={"value": 2})
+
+
+def invalidate_athlete_cache() -> None:
+    """Drop this process's metadata now and bump the shared version when the transaction commits.
+
+    The local drop lets the writing request see its own changes. The version is
+    bumped only after the commit, so no row lock is held for the rest of the
+    transaction and the bump also discards anything loaded before the commit.
+    """
+    _drop_local()
+    transaction.on_commit(_bump_version)
+
+
+def _on_athlete_change(sender, **kwargs) -> None:
+    invalidate_athlete_cache()
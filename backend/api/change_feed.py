@@ -0,0 +1,210 @@
+"""Revisions and tombstones behind the delta-sync endpoint (/api/workload/sync/).
+
+Every transaction that writes ``gps_daily`` / ``workload_features_daily`` rows
+takes a revision from ``next_revision()`` and stamps it on the rows it writes.
+Deleted rows are recorded in ``sync_tombstones`` with the revision that deleted
+them.
+
+On PostgreSQL the revision is the writing transaction's id
+(``pg_current_xact_id()``) offset by the value the ``sync_revision`` counter
+had reached, so writers take no lock. Transactions do not commit in xid order,
+so the sync token is not the largest revision seen but a commit-safe horizon:
+one below the oldest transaction still in flight. Every revision up to the
+token belongs to a finished transaction, so a client that has synced up to
+token N never misses a write that commits later with a smaller number. (A plain
+sequence would have the same ordering problem and need the same horizon.)
+
+Other backends keep the single ``sync_revision`` counter row locked until the
+writing transaction commits, which serializes writers and makes revisions
+visible in order.
+
+Tombstones older than ``SYNC_TOMBSTONE_RETENTION_DAYS`` are pruned by
+``manage.py prune_sync_tombstones``; tokens older than the pruned range get a
+full resync (``reset``).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Iterable
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import GpsDaily, SyncRevision, SyncTombstone, WorkloadFeaturesDaily
+
+COUNTER_ID = 1
+
+
+@dataclass
+class ChangeSet:
+    token: int
+    reset: bool
+    daily: list[GpsDaily] = field(default_factory=list)
+    features: list[dict] = field(default_factory=list)
+    # kind ("daily" / "features") -> [(athlete_id, date)]
+    deleted: dict[str, list[tuple[str, date]]] = field(
+        default_factory=lambda: {"daily": [], "features": []}
+    )
+
+
+# 書き込みトランザクションの xid。pg_current_xact_id は xid8 (epoch 付き) なので bigint に収まる
+_XACT_ID_SQL = "SELECT pg_current_xact_id()::text::bigint"
+
+# 実行中の他トランザクションのうち最小の xid の 1 つ手前 (なければ xmax - 1)。
+# xip に自分の xid は入らないので、同じトランザクション内の書き込みも読める
+_HORIZON_SQL = """
+    SELECT COALESCE(
+        (SELECT MIN(xid::text::bigint) FROM pg_snapshot_xip(snap) AS xid) - 1,
+        GREATEST(
+            pg_snapshot_xmax(snap)::text::bigint - 1,
+            COALESCE(pg_current_xact_id_if_assigned()::text::bigint, 0)
+        )
+    )
+    FROM pg_current_snapshot() AS snap
+"""
+
+
+def _uses_xact_ids(alias: str) -> bool:
+    return connections[alias].vendor == "postgresql"
+
+
+def _revision_base(alias: str) -> int:
+    # PostgreSQL ではカウンタを進めないので、切り替え時点の値が xid に足すオフセットになる
+    counter = SyncRevision.objects.using(alias).filter(id=COUNTER_ID)
+    return counter.values_list("value", flat=True).first() or 0
+
+
+def next_revision() -> int:
+    """Allocate the next revision; must be called inside the writing transaction."""
+    alias = router.db_for_write(SyncRevision)
+    if _uses_xact_ids(alias):
+        with connections[alias].cursor() as cursor:
+            cursor.execute(_XACT_ID_SQL)
+            xact_id = cursor.fetchone()[0]
+        return _revision_base(alias) + xact_id
+
+    # select_for_update はトランザクション外だとエラーになるので、呼び出し側の atomic が前提
+    counter, _ = SyncRevision.objects.select_for_update().get_or_create(id=COUNTER_ID)
+    counter.value += 1
+    counter.save(update_fields=["value"])
+    return counter.value
+
+
+def record_tombstones(kind: str, keys: Iterable[tuple[str, date]], revision: int) -> None:
+    SyncTombstone.objects.bulk_create(
+        [
+            SyncTombstone(kind=kind, athlete_id=athlete_id, date=day, revision=revision)
+            for athlete_id, day in keys
+        ],
+        batch_size=2000,
+    )
+
+
+def _revision_state() -> tuple[int, int]:
+    """(sync token, pruned_through): every revision up to the token is committed or rolled back."""
+    alias = router.db_for_read(SyncRevision)
+    counter = SyncRevision.objects.using(alias).filter(id=COUNTER_ID)
+    value, pruned_through = counter.values_list("value", "pruned_through").first() or (0, 0)
+    if not _uses_xact_ids(alias):
+        return value, pruned_through
+    with connections[alias].cursor() as cursor:
+        cursor.execute(_HORIZON_SQL)
+        horizon = cursor.fetchone()[0]
+    return value + horizon, pruned_through
+
+
+def current_revision() -> int:
+    """Revision of the last committed write to gps_daily / workload_features_daily."""
+    head, _ = _revision_state()
+    alias = router.db_for_read(SyncRevision)
+    if not _uses_xact_ids(alias):
+        return head
+    # 地平線は無関係なトランザクションでも進むので、実際に書かれた最大のリビジョンを返す
+    return max(
+        model.objects.using(alias)
+        .filter(revision__lte=head)
+        .aggregate(max_revision=Max("revision"))["max_revision"]
+        or 0
+        for model in (GpsDaily, WorkloadFeaturesDaily, SyncTombstone)
+    )
+
+
+def changes_since(since: int | None, *, athlete_id: str | None = None) -> ChangeSet:
+    """Rows written and deleted after revision ``since`` (everything when ``since`` is None).
+
+    The returned token is read before the rows, and rows are capped at it, so
+    writes committing during the request are picked up by the next sync.
+    Clients apply ``deleted`` first and then upsert ``daily`` / ``features``.
+    """
+    head, pruned_through = _revision_state()
+    reset = since is None or since < pruned_through or since > head
+    if reset:
+        since = 0
+
+    daily_qs = GpsDaily.objects.filter(revision__gt=since, revision__lte=head)
+    features_qs = WorkloadFeaturesDaily.objects.filter(revision__gt=since, revision__lte=head)
+    if athlete_id:
+        daily_qs = daily_qs.filter(athlete_id=athlete_id)
+        features_qs = features_qs.filter(athlete_id=athlete_id)
+
+    changes = ChangeSet(
+        token=head,
+        reset=reset,
+        daily=list(daily_qs.order_by("athlete_id", "date")),
+        features=list(
+            features_qs.order_by("athlete_id", "date").values(
+                "athlete_id",
+                "date",
+                "acwr_load",
+                "acwr_hsr",
+                "acwr_dive",
+                "efficiency_index",
+                "monotony_load",
+                "load_per_meter",
+                "risk_level",
+                "risk_reasons",
+                "params",
+            )
+        ),
+    )
+    if reset:
+        # 全件取り直しなのでクライアントは手元のデータを捨てる
+        return changes
+
+    tombstones = SyncTombstone.objects.filter(revision__gt=since, revision__lte=head)
+    if athlete_id:
+        tombstones = tombstones.filter(athlete_id=athlete_id)
+
+    # 削除後に作り直された行は変更として返っているので削除扱いにしない
+    alive = {
+        "daily": {(row.athlete_id, row.date) for row in changes.daily},
+        "features": {(row["athlete_id"], row["date"]) for row in changes.features},
+    }
+    deleted: dict[str, set[tuple[str, date]]] = {"daily": set(), "features": set()}
+    for kind, tomb_athlete, day in tombstones.values_list("kind", "athlete_id", "date"):
+        key = (tomb_athlete, day)
+        if key not in alive[kind]:
+            deleted[kind].add(key)
+    changes.deleted = {kind: sorted(keys) for kind, keys in deleted.items()}
+    return changes
+
+
+def prune_tombstones(*, retention_days: float | None = None) -> int:
+    """Delete tombstones older than the retention period; returns the number removed."""
+    if retention_days is None:
+        retention_days = float(getattr(settings, "SYNC_TOMBSTONE_RETENTION_DAYS", 30))
+    cutoff = timezone.now() - timedelta(days=retention_days)
+
+    with transaction.atomic():
+        old = SyncTombstone.objects.filter(created_at__lt=cutoff)
+        through = old.aggregate(max_revision=Max("revision"))["max_revision"]
+        if through is None:
+            return 0
+        counter, _ = SyncRevision.objects.select_for_update().get_or_create(id=COUNTER_ID)
+        counter.pruned_through = max(counter.pruned_through, through)
+        counter.save(update_fields=["pruned_through"])
+        deleted, _ = SyncTombstone.objects.filter(revision__lte=through).delete()
+    return deleted
@@ -0,0 +1,80 @@
+"""Response compression for API payloads (brotli when available, else gzip).
+
+``CompressionMiddleware`` compresses non-streaming responses of at least
+``RESPONSE_COMPRESSION_MIN_BYTES`` whose content type is JSON / text, choosing
+``br`` when the client accepts it and the ``brotli`` package is installed and
+``gzip`` otherwise. Streaming responses (SSE, exports) are passed through
+untouched so events are not held back in a compressor buffer.
+"""
+from __future__ import annotations
+
+import gzip
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli は任意依存
+    brotli = None
+
+# HTML (admin など CSRF トークンを含むページ) は BREACH を避けるため対象外
+COMPRESSIBLE_TYPES = ("application/json", "text/csv", "text/plain")
+re_accepts_br = _lazy_re_compile(r"\bbr\b")
+re_accepts_gzip = _lazy_re_compile(r"\bgzip\b")
+
+
+def min_bytes() -> int:
+    return int(getattr(settings, "RESPONSE_COMPRESSION_MIN_BYTES", 1024))
+
+
+def gzip_level() -> int:
+    return int(getattr(settings, "RESPONSE_GZIP_LEVEL", 4))
+
+
+def brotli_quality() -> int:
+    return int(getattr(settings, "RESPONSE_BROTLI_QUALITY", 4))
+
+
+def compress(content: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(content, quality=brotli_quality())
+    # mtime=0 で同じ内容なら同じバイト列になるようにする
+    return gzip.compress(content, compresslevel=gzip_level(), mtime=0)
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    if brotli is not None and re_accepts_br.search(accept_encoding):
+        return "br"
+    if re_accepts_gzip.search(accept_encoding):
+        return "gzip"
+    return None
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        if response.streaming or response.has_header("Content-Encoding"):
+            return response
+        content_type = response.get("Content-Type", "").split(";")[0].strip()
+        if content_type not in COMPRESSIBLE_TYPES:
+            return response
+        if len(response.content) < min_bytes():
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
@@ -0,0 +1,364 @@
+"""Validate a StatsAllGroup CSV without importing it.
+
+``validate_statsallgroup_csv`` checks a file the way ``import_statsallgroup_files``
+would read it (encoding, header/column plan, date parsing, numeric coercion,
+athletes) but in a single streaming pass with the stdlib ``csv`` module:
+small files are scanned completely, large files are sampled in a few windows
+spread over the file. No DataUpload is created, no temp file is written and
+nothing is written to the database; known athletes come from the in-process
+athlete cache.
+"""
+from __future__ import annotations
+
+import codecs
+import csv
+import io
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from itertools import chain, islice
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator
+
+from django.conf import settings
+
+from .athlete_cache import get_athlete_metadata
+from .services import (
+    CSV_NA_VALUES,
+    IDENTIFIER_CANONICALS,
+    WorkloadIngestionError,
+    _resolve_csv_path,
+    detect_stream_encoding,
+    get_schema_plan,
+    parse_date_series,
+)
+
+# 日付が読めない行は取り込み時に捨てられるので、これを下回ったらエラー扱い
+MIN_DATE_PARSE_RATE = 0.95
+SAMPLE_WINDOWS = 8
+# 窓の先頭でレコードの区切りを探す行数 (1 レコードもこの行数に収まるものとする)
+WINDOW_SYNC_LINES = 64
+EXPECTED_METRIC_COLUMNS = ("total_distance", "total_player_load")
+UNKNOWN_ATHLETES_LIMIT = 50
+
+
+@dataclass
+class CsvValidationReport:
+    file_name: str
+    size_bytes: int
+    encoding: str | None = None
+    # athlete_id / athlete_name / date_ / session_name -> ヘッダ上の列名
+    columns: dict[str, str] = field(default_factory=dict)
+    numeric_columns: list[str] = field(default_factory=list)
+    full_scan: bool = True
+    rows_scanned: int = 0
+    malformed_rows: int = 0
+    blank_athlete_ids: int = 0
+    date_parse_rate: float | None = None
+    date_formats: list[str] = field(default_factory=list)
+    date_min: str | None = None
+    date_max: str | None = None
+    numeric_failure_rate: float | None = None
+    # 列名 -> 数値に変換できなかったセル数
+    numeric_failures: dict[str, int] = field(default_factory=dict)
+    athletes_seen: int = 0
+    unknown_athletes: list[str] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+    warnings: list[str] = field(default_factory=list)
+    elapsed_ms: float | None = None
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def as_dict(self) -> dict:
+        return {
+            "file_name": self.file_name,
+            "ok": self.ok,
+            "size_bytes": self.size_bytes,
+            "encoding": self.encoding,
+            "columns": self.columns,
+            "numeric_columns": self.numeric_columns,
+            "full_scan": self.full_scan,
+            "rows_scanned": self.rows_scanned,
+            "malformed_rows": self.malformed_rows,
+            "blank_athlete_ids": self.blank_athlete_ids,
+            "date_parse_rate": self.date_parse_rate,
+            "date_formats": self.date_formats,
+            "date_min": self.date_min,
+            "date_max": self.date_max,
+            "numeric_failure_rate": self.numeric_failure_rate,
+            "numeric_failures": self.numeric_failures,
+            "athletes_seen": self.athletes_seen,
+            "unknown_athletes": self.unknown_athletes,
+            "errors": self.errors,
+            "warnings": self.warnings,
+            "elapsed_ms": self.elapsed_ms,
+        }
+
+
+def _sample_rows() -> int:
+    return int(getattr(settings, "WORKLOAD_VALIDATION_SAMPLE_ROWS", 10000))
+
+
+def _full_scan_bytes() -> int:
+    return int(getattr(settings, "WORKLOAD_VALIDATION_FULL_SCAN_BYTES", 2 * 1024 * 1024))
+
+
+def _take(rows: Iterator[list[str]], limit: int | None) -> Iterator[list[str]]:
+    for count, row in enumerate(rows):
+        if limit is not None and count >= limit:
+            return
+        yield row
+
+
+def _iter_window(handle: BinaryIO, encoding: str, offset: int, width: int) -> Iterator[list[str]]:
+    # 途中から読むので最初の (途切れた) 行は捨てる。複数行にまたがるクォートの途中に
+    # 着地することもあるので、ヘッダと同じ列数のレコードとして読める行まで進める
+    handle.seek(offset)
+    handle.readline()
+    decode = codecs.getdecoder(encoding)
+    lines = (decode(raw, "replace")[0] for raw in iter(handle.readline, b""))
+    head = list(islice(lines, 2 * WINDOW_SYNC_LINES))
+    for start in range(min(len(head), WINDOW_SYNC_LINES)):
+        probe = csv.reader(head[start:start + WINDOW_SYNC_LINES], strict=True)
+        try:
+            record = next(probe, None)
+        except csv.Error:
+            continue
+        if record is not None and len(record) == width:
+            return csv.reader(chain(head[start:], lines))
+    return iter(())
+
+
+def _iter_sample(
+    handle: BinaryIO,
+    encoding: str,
+    size: int,
+    *,
+    full_scan: bool,
+    sample_rows: int,
+) -> Iterator[list[str]]:
+    """Yield the header row, then the data rows to check."""
+    # UTF-16 は行単位でシークできないので先頭だけを見る
+    windowed = not full_scan and not encoding.startswith("utf-16")
+    per_window = max(sample_rows // SAMPLE_WINDOWS, 1) if windowed else sample_rows
+
+    handle.seek(0)
+    text = io.TextIOWrapper(handle, encoding=encoding, newline="")
+    try:
+        reader = csv.reader(text)
+        header = next(reader, [])
+        yield header
+        yield from _take(reader, None if full_scan else per_window)
+    finally:
+        # TextIOWrapper が GC 時に handle を閉じないように切り離す
+        text.detach()
+
+    if not windowed:
+        return
+    for index in range(1, SAMPLE_WINDOWS):
+        window = _iter_window(handle, encoding, size * index // SAMPLE_WINDOWS, len(header))
+        yield from _take(window, per_window)
+
+
+def _count_numeric_failures(values: Iterable[str]) -> tuple[int, int]:
+    """Return (non-empty cells, cells that float() cannot parse)."""
+    # read_csv が NaN とみなすセルは数値変換の失敗に数えない
+    present = [value for value in map(str.strip, values) if value not in CSV_NA_VALUES]
+    try:
+        # 大半の列は全セルが数値なので、まとめて変換できればそれで終わり
+        list(map(float, present))
+        return len(present), 0
+    except ValueError:
+        pass
+    failed = 0
+    for value in present:
+        try:
+            float(value)
+        except ValueError:
+            failed += 1
+    return len(present), failed
+
+
+def _validate_stream(
+    handle: BinaryIO,
+    report: CsvValidationReport,
+    *,
+    known_athletes: Iterable[str] | None,
+    sample_rows: int,
+    full_scan_bytes: int,
+) -> None:
+    try:
+        report.encoding = detect_stream_encoding(handle)
+    except WorkloadIngestionError as exc:
+        report.errors.append(str(exc))
+        return
+
+    report.full_scan = report.size_bytes <= full_scan_bytes
+    rows = _iter_sample(
+        handle,
+        report.encoding,
+        report.size_bytes,
+        full_scan=report.full_scan,
+        sample_rows=sample_rows,
+    )
+    try:
+        _check_rows(rows, report, known_athletes=known_athletes)
+    finally:
+        rows.close()
+
+
+def _check_rows(
+    rows: Iterator[list[str]],
+    report: CsvValidationReport,
+    *,
+    known_athletes: Iterable[str] | None,
+) -> None:
+    header = next(rows, [])
+    if not header:
+        report.errors.append("CSV header is empty.")
+        return
+    try:
+        plan = get_schema_plan(header)
+    except WorkloadIngestionError as exc:
+        report.errors.append(str(exc))
+        return
+
+    report.columns = {
+        spec.canonical: spec.name
+        for spec in plan.columns
+        if spec.canonical in IDENTIFIER_CANONICALS
+    }
+    report.numeric_columns = plan.numeric_cols
+    missing_metrics = [col for col in EXPECTED_METRIC_COLUMNS if col not in plan.numeric_cols]
+    if missing_metrics:
+        report.warnings.append(f"Missing metric columns: {', '.join(missing_metrics)}")
+
+    names = [spec.name for spec in plan.columns]
+    athlete_idx = names.index(plan.column_for("athlete_id"))
+    date_idx = names.index(plan.column_for("date_"))
+    numeric_idx = [(names.index(col), col) for col in plan.numeric_cols]
+    width = len(names)
+
+    kept: list[list[str]] = []
+    athletes: set[str] = set()
+    for row in rows:
+        if not row:
+            continue
+        report.rows_scanned += 1
+        if len(row) != width:
+            report.malformed_rows += 1
+            continue
+        athlete_id = row[athlete_idx].strip()
+        if not athlete_id:
+            report.blank_athlete_ids += 1
+            continue
+        athletes.add(athlete_id)
+        kept.append(row)
+
+    if report.malformed_rows:
+        report.warnings.append(f"{report.malformed_rows} rows do not have {width} fields.")
+    if report.blank_athlete_ids:
+        report.warnings.append(f"{report.blank_athlete_ids} rows have no athlete_id and will be skipped.")
+
+    if not kept:
+        report.errors.append("No rows with an athlete_id found.")
+        return
+
+    # 日付・数値の判定は列ごとにまとめて行う
+    columns = list(zip(*kept))
+    dates = columns[date_idx]
+    parsed, formats = parse_date_series(dates, fallback=True)
+    valid = parsed.dropna()
+    report.date_parse_rate = round(len(valid) / len(dates), 4)
+    report.date_formats = list(formats)
+    if len(valid):
+        report.date_min = valid.min().date().isoformat()
+        report.date_max = valid.max().date().isoformat()
+    if report.date_parse_rate < MIN_DATE_PARSE_RATE:
+        report.errors.append(
+            f"Only {report.date_parse_rate:.1%} of dates in column "
+            f"'{report.columns['date_']}' could be parsed."
+        )
+    elif report.date_parse_rate < 1:
+        report.warnings.append(
+            f"{len(dates) - len(valid)} rows have unparseable dates and will be skipped."
+        )
+
+    failures: Counter[str] = Counter()
+    numeric_cells = 0
+    for idx, col in numeric_idx:
+        cells, failed = _count_numeric_failures(columns[idx])
+        numeric_cells += cells
+        if failed:
+            failures[col] = failed
+
+    report.numeric_failures = dict(failures.most_common())
+    report.numeric_failure_rate = round(sum(failures.values()) / numeric_cells, 4) if numeric_cells else 0.0
+    if failures:
+        report.warnings.append(
+            "Non-numeric values in " + ", ".join(report.numeric_failures) + " (treated as 0)."
+        )
+
+    if known_athletes is None:
+        known_athletes = get_athlete_metadata().keys()
+    unknown = sorted(athletes.difference(known_athletes))
+    report.athletes_seen = len(athletes)
+    report.unknown_athletes = unknown[:UNKNOWN_ATHLETES_LIMIT]
+    if unknown:
+        report.warnings.append(f"{len(unknown)} athletes are not registered yet and will be created.")
+
+
+def validate_statsallgroup_csv(
+    source: str | Path | BinaryIO,
+    *,
+    name: str | None = None,
+    known_athletes: Iterable[str] | None = None,
+    sample_rows: int | None = None,
+    full_scan_bytes: int | None = None,
+) -> CsvValidationReport:
+    """Check a CSV (path or seekable binary file object) and return a report.
+
+    Files up to ``full_scan_bytes`` (WORKLOAD_VALIDATION_FULL_SCAN_BYTES) are
+    scanned completely; larger ones are sampled with ``sample_rows``
+    (WORKLOAD_VALIDATION_SAMPLE_ROWS) rows taken from windows spread over the
+    file, so the rates are estimates.
+    """
+    started = time.perf_counter()
+    if sample_rows is None:
+        sample_rows = _sample_rows()
+    if full_scan_bytes is None:
+        full_scan_bytes = _full_scan_bytes()
+
+    if isinstance(source, (str, Path)):
+        csv_path = _resolve_csv_path(source)
+        report = CsvValidationReport(file_name=name or csv_path.name, size_bytes=0)
+        if not csv_path.exists():
+            report.errors.append(f"CSV not found: {csv_path}")
+            return report
+        report.size_bytes = csv_path.stat().st_size
+        with csv_path.open("rb") as handle:
+            _validate_stream(
+                handle,
+                report,
+                known_athletes=known_athletes,
+                sample_rows=sample_rows,
+                full_scan_bytes=full_scan_bytes,
+            )
+    else:
+        source.seek(0, io.SEEK_END)
+        report = CsvValidationReport(
+            file_name=name or Path(getattr(source, "name", "") or "").name,
+            size_bytes=source.tell(),
+        )
+        _validate_stream(
+            source,
+            report,
+            known_athletes=known_athletes,
+            sample_rows=sample_rows,
+            full_scan_bytes=full_scan_bytes,
+        )
+
+    report.elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+    return report
@@ -0,0 +1,145 @@
+"""Route dashboard GET requests to the optional read-only replica.
+
+``ReplicaRoutingMiddleware`` marks GET requests for the workload read views
+(athlete list, timeseries, delta sync, upload history) and ``ReplicaRouter`` sends their
+reads to ``settings.REPLICA_DATABASE_ALIAS`` when that alias is configured.
+Everything else, including ingestion, rebuilds and management commands,
+stays on ``default``.
+
+After a successful write the middleware sets a short-lived cookie, so the
+client that just uploaded keeps reading from the primary until the replica
+has caught up (read-your-writes). Streaming responses (the export) are read
+after the view returns, so the alias stays bound while their body is iterated.
+"""
+from __future__ import annotations
+
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.urls import Resolver404, resolve
+
+REPLICA_VIEW_NAMES = {"workload-athletes", "workload-timeseries", "workload-uploads", "workload-sync", "workload-export"}
+PIN_COOKIE = "db_primary_pin"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+_read_alias: ContextVar[str | None] = ContextVar("read_alias", default=None)
+
+
+def replica_alias() -> str | None:
+    alias = getattr(settings, "REPLICA_DATABASE_ALIAS", "replica")
+    return alias if alias in settings.DATABASES else None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == replica_alias():
+            return False
+        return None
+
+
+def _routes_to_replica(request) -> bool:
+    if request.method != "GET" or PIN_COOKIE in request.COOKIES:
+        return False
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return False
+    return match.url_name in REPLICA_VIEW_NAMES
+
+
+def _pin_after_write(request, response) -> None:
+    if request.method in SAFE_METHODS or response.status_code >= 400:
+        return
+    response.set_cookie(
+        PIN_COOKIE,
+        "1",
+        max_age=int(getattr(settings, "REPLICA_PIN_SECONDS", 15)),
+        httponly=True,
+        samesite="Lax",
+    )
+
+
+def _bind_sync(chunks, alias: str):
+    iterator = iter(chunks)
+    while True:
+        token = _read_alias.set(alias)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _read_alias.reset(token)
+        yield chunk
+
+
+async def _bind_async(chunks, alias: str):
+    iterator = aiter(chunks)
+    while True:
+        # sync_to_async はその時点のコンテキストをコピーするので、1 チャンクごとに束縛し直す
+        token = _read_alias.set(alias)
+        try:
+            chunk = await anext(iterator)
+        except StopAsyncIteration:
+            return
+        finally:
+            _read_alias.reset(token)
+        yield chunk
+
+
+def _bind_streaming(response, token) -> None:
+    # ミドルウェアを抜けた後に読まれる本体も同じ読み取り先から読む
+    if token is None or not getattr(response, "streaming", False):
+        return
+    alias = _read_alias.get()
+    bind = _bind_async if response.is_async else _bind_sync
+    response.streaming_content = bind(response.streaming_content, alias)
+
+
+class ReplicaRoutingMiddleware:
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _enter(self, request):
+        alias = replica_alias()
+        if alias and _routes_to_replica(request):
+            return _read_alias.set(alias)
+        return None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = self._enter(request)
+        try:
+            response = self.get_response(request)
+            _bind_streaming(response, token)
+        finally:
+            if token is not None:
+                _read_alias.reset(token)
+        _pin_after_write(request, response)
+        return response
+
+    async def __acall__(self, request):
+        token = self._enter(request)
+        try:
+            response = await self.get_response(request)
+            _bind_streaming(response, token)
+        finally:
+            if token is not None:
+                _read_alias.reset(token)
+        _pin_after_write(request, response)
+        return response
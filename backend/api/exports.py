@@ -0,0 +1,321 @@
+"""Bulk export of gps_daily joined with workload_features_daily (CSV / Parquet).
+
+Used by /api/workload/export/ and ``manage.py export_workload``. Rows are read
+with ``QuerySet.iterator()`` (a server-side cursor on PostgreSQL) and encoded
+``chunk_size`` rows at a time, so memory stays flat however many athletes and
+seasons are exported.
+
+Columns are picked with ``columns``: the names in ``EXPORT_COLUMNS`` plus
+``metrics.<key>`` / ``params.<key>`` for single keys of the JSON columns.
+``flatten=("metrics", "params")`` replaces a JSON column with one column per
+key found in the exported rows. In Parquet, flattened keys are float64
+(non-numeric values become null); in CSV, unflattened JSON columns and
+``risk_reasons`` are written as JSON text.
+"""
+from __future__ import annotations
+
+import csv
+import importlib.util
+import io
+import json
+from dataclasses import dataclass, field
+from datetime import date
+from itertools import islice
+from typing import Iterable, Iterator
+
+from django.db import connections, router
+from django.db.models import F, FilteredRelation, Func, Q, QuerySet, TextField
+from django.db.models.functions import Cast
+
+from .models import GpsDaily
+
+FORMATS = ("csv", "parquet")
+CONTENT_TYPES = {"csv": "text/csv; charset=utf-8", "parquet": "application/vnd.apache.parquet"}
+JSON_COLUMNS = ("metrics", "params")
+DEFAULT_CHUNK_SIZE = 2000
+
+# 出力列名 -> values_list のフィールド名
+_FIELDS = {
+    "athlete_id": "athlete_id",
+    "athlete_name": "athlete__athlete_name",
+    "date": "date",
+    "is_match_day": "is_match_day",
+    "md_offset": "md_offset",
+    "total_duration": "total_duration",
+    "total_distance": "total_distance",
+    "total_player_load": "total_player_load",
+    "max_vel": "max_vel",
+    "mean_heart_rate": "mean_heart_rate",
+    "hsr_distance": "hsr_distance",
+    "high_decel_count": "high_decel_count",
+    "total_dive_count": "total_dive_count",
+    "avg_time_to_feet": "avg_time_to_feet",
+    "total_jumps": "total_jumps",
+    "metrics": "metrics",
+    "acwr_load": "features__acwr_load",
+    "acwr_hsr": "features__acwr_hsr",
+    "acwr_dive": "features__acwr_dive",
+    "efficiency_index": "features__efficiency_index",
+    "monotony_load": "features__monotony_load",
+    "load_per_meter": "features__load_per_meter",
+    "risk_level": "features__risk_level",
+    "risk_reasons": "features__risk_reasons",
+    "params": "features__params",
+}
+EXPORT_COLUMNS = tuple(_FIELDS)
+
+_STRING_COLUMNS = {"athlete_id", "athlete_name", "risk_level"}
+_INT_COLUMNS = {"md_offset", "high_decel_count", "total_dive_count"}
+_EMPTY: dict = {}
+
+
+class ExportError(ValueError):
+    """Invalid export request (unknown column, format, ...)."""
+
+
+@dataclass
+class ExportSpec:
+    athlete_ids: list[str] | None = None
+    start: date | None = None
+    end: date | None = None
+    columns: list[str] = field(default_factory=lambda: list(EXPORT_COLUMNS))
+    flatten: tuple[str, ...] = ()
+    # 読み取り先 DB。iter_export がリクエスト処理中に決める
+    using: str | None = None
+
+
+def _base_queryset(spec: ExportSpec) -> QuerySet:
+    qs = GpsDaily.objects.using(spec.using) if spec.using else GpsDaily.objects.all()
+    if spec.athlete_ids:
+        qs = qs.filter(athlete_id__in=spec.athlete_ids)
+    if spec.start:
+        qs = qs.filter(date__gte=spec.start)
+    if spec.end:
+        qs = qs.filter(date__lte=spec.end)
+    return qs
+
+
+def _json_keys(spec: ExportSpec, column: str) -> list[str]:
+    """Keys present in ``column`` ("metrics" / "params") of the exported rows."""
+    qs = _base_queryset(spec)
+    lookup = "metrics"
+    if column == "params":
+        qs = qs.annotate(features=_features_relation())
+        lookup = "features__params"
+    if connections[qs.db].vendor == "postgresql":
+        keys = (
+            qs.annotate(key=Func(F(lookup), function="jsonb_object_keys"))
+            .values_list("key", flat=True)
+            .distinct()
+        )
+        return sorted(keys)
+    found: dict[str, None] = {}
+    for value in qs.values_list(lookup, flat=True).iterator(chunk_size=DEFAULT_CHUNK_SIZE):
+        found.update(dict.fromkeys(value or ()))
+    return sorted(found)
+
+
+def _features_relation() -> FilteredRelation:
+    return FilteredRelation(
+        "athlete__workload_features",
+        condition=Q(athlete__workload_features__date=F("date")),
+    )
+
+
+def output_columns(spec: ExportSpec) -> list[str]:
+    """Resolve ``spec.columns`` / ``spec.flatten`` into the exported column names."""
+    unknown_flatten = [name for name in spec.flatten if name not in JSON_COLUMNS]
+    if unknown_flatten:
+        raise ExportError(f"Only {', '.join(JSON_COLUMNS)} can be flattened: {', '.join(unknown_flatten)}")
+
+    out: list[str] = []
+    for name in spec.columns:
+        prefix, _, key = name.partition(".")
+        if name in _FIELDS and name not in spec.flatten:
+            out.append(name)
+        elif name in spec.flatten:
+            out.extend(f"{name}.{k}" for k in _json_keys(spec, name))
+        elif prefix in JSON_COLUMNS and key:
+            out.append(name)
+        else:
+            raise ExportError(f"Unknown export column: {name}")
+    if not out:
+        raise ExportError("No columns selected.")
+    return list(dict.fromkeys(out))
+
+
+def iter_rows(spec: ExportSpec, columns: list[str], *, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[list[tuple]]:
+    """Yield lists of up to ``chunk_size`` row tuples, ordered by (athlete_id, date).
+
+    Whole JSON columns come back as the database's JSON text and
+    ``metrics.<key>`` / ``params.<key>`` as the decoded value.
+    """
+    annotations = {}
+    fields: list[str] = []
+    # (values_list の位置, 取り出すキー or None)。同じ JSON 列の連続するキーは 1 つにまとめる
+    plan: list[tuple[int, list[str] | None]] = []
+    for name in columns:
+        prefix, _, key = name.partition(".")
+        if name in JSON_COLUMNS:
+            # 列ごと出す JSON はテキストのまま読み、デコードと再エンコードを省く
+            field_name = f"{name}_json"
+            annotations[field_name] = Cast(_FIELDS[name], TextField())
+        else:
+            field_name = _FIELDS[prefix]
+        if field_name not in fields:
+            fields.append(field_name)
+        index = fields.index(field_name)
+        if key and plan and plan[-1][0] == index and plan[-1][1] is not None:
+            plan[-1][1].append(key)
+        else:
+            plan.append((index, [key] if key else None))
+
+    def build(values) -> tuple:
+        row = []
+        for index, keys in plan:
+            if keys is None:
+                row.append(values[index])
+            else:
+                row.extend(map((values[index] or _EMPTY).get, keys))
+        return tuple(row)
+
+    qs = _base_queryset(spec)
+    if any(_FIELDS[name.partition(".")[0]].startswith("features__") for name in columns):
+        qs = qs.annotate(features=_features_relation())
+    if annotations:
+        qs = qs.annotate(**annotations)
+    rows = qs.order_by("athlete_id", "date").values_list(*fields).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = [build(values) for values in islice(rows, chunk_size)]
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_csv(spec: ExportSpec, columns: list[str], *, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    # None は csv モジュールが空欄で書くので、変換が要るのは risk_reasons (リスト) だけ
+    list_index = columns.index("risk_reasons") if "risk_reasons" in columns else None
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for chunk in iter_rows(spec, columns, chunk_size=chunk_size):
+        if list_index is not None:
+            chunk = [
+                (*row[:list_index], _json_text(row[list_index]), *row[list_index + 1:])
+                for row in chunk
+            ]
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # 行が 0 件でもヘッダだけは返す
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _json_text(value):
+    return None if value is None else json.dumps(value, ensure_ascii=False)
+
+
+def _as_float(value):
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parquet_schema(columns: list[str]):
+    import pyarrow as pa
+
+    types = []
+    for name in columns:
+        if name in _STRING_COLUMNS or name in JSON_COLUMNS:
+            types.append(pa.string())
+        elif name == "date":
+            types.append(pa.date32())
+        elif name == "is_match_day":
+            types.append(pa.bool_())
+        elif name in _INT_COLUMNS:
+            types.append(pa.int64())
+        elif name == "risk_reasons":
+            types.append(pa.list_(pa.string()))
+        else:
+            types.append(pa.float64())
+    return pa.schema(list(zip(columns, types)))
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands out whatever has been written so far."""
+
+    def __init__(self):
+        self._parts: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def iter_parquet(spec: ExportSpec, columns: list[str], *, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Parquet bytes, one row group per chunk."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema(columns)
+    # 展開したキーだけは型が揃っている保証がないので float に寄せる
+    float_index = [index for index, name in enumerate(columns) if "." in name]
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for chunk in iter_rows(spec, columns, chunk_size=chunk_size):
+            values = [list(column) for column in zip(*chunk)]
+            for index in float_index:
+                values[index] = [_as_float(value) for value in values[index]]
+            arrays = [pa.array(column, type=arrow_field.type) for column, arrow_field in zip(values, schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
+
+
+def iter_export(spec: ExportSpec, fmt: str, *, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Validate the request and return the chunk iterator for ``fmt``.
+
+    Errors (unknown columns, missing pyarrow) are raised here, before the
+    first chunk, so callers can still answer with an error response.
+    """
+    if fmt not in FORMATS:
+        raise ExportError(f"Unknown export format: {fmt} (use {' or '.join(FORMATS)})")
+    if fmt == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        raise ExportError("pyarrow is required for Parquet exports.")
+    # 本体はレスポンス返却後に読まれるので、レプリカ振り分けはここで確定させておく
+    spec.using = spec.using or router.db_for_read(GpsDaily)
+    columns = output_columns(spec)
+    if fmt == "csv":
+        return iter_csv(spec, columns, chunk_size=chunk_size)
+    return iter_parquet(spec, columns, chunk_size=chunk_size)
+
+
+def parse_list(values: Iterable[str] | None) -> list[str]:
+    """Split repeated and/or comma separated parameters into a list."""
+    out: list[str] = []
+    for value in values or ():
+        out.extend(part.strip() for part in str(value).split(",") if part.strip())
+    return out
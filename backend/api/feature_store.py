@@ -0,0 +1,239 @@
+"""DataFrame reader for notebooks: daily + feature rows without going through ORM dicts.
+
+``read_workload_frame`` returns gps_daily joined with workload_features_daily
+(the same rows and column names as /api/workload/export/) as a typed
+DataFrame, fetched in chunks of row tuples through ``exports.iter_rows``.
+
+Results are cached on disk under ``WORKLOAD_FRAME_CACHE_DIR`` keyed by the
+request and the sync revision (``change_feed.current_revision()``), which
+every write to gps_daily / workload_features_daily advances, so a repeated
+call loads the pickle until the data changes. ``athlete_name`` is not cached;
+it is filled from the athlete cache on every call.
+
+Usage from Jupyter (with DJANGO_SETTINGS_MODULE=config.settings and
+backend/ on sys.path)::
+
+    import django; django.setup()
+    from api.feature_store import read_workload_frame
+    df = read_workload_frame(["A001"], start="2025-04-01", expand=("metrics", "params"))
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from dataclasses import replace
+from datetime import date
+from pathlib import Path
+from typing import Iterable
+
+import pandas as pd
+from django.conf import settings
+from django.db import connections, router
+from django.utils.dateparse import parse_date
+
+from . import exports
+from .athlete_cache import get_athlete_metadata
+from .change_feed import current_revision
+from .models import GpsDaily
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson は任意依存
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+_CATEGORY_COLUMNS = ("athlete_id", "risk_level")
+_INT_COLUMNS = ("high_decel_count", "total_dive_count")
+_FLOAT_COLUMNS = (
+    "total_duration",
+    "total_distance",
+    "total_player_load",
+    "max_vel",
+    "mean_heart_rate",
+    "hsr_distance",
+    "avg_time_to_feet",
+    "total_jumps",
+    "acwr_load",
+    "acwr_hsr",
+    "acwr_dive",
+    "efficiency_index",
+    "monotony_load",
+    "load_per_meter",
+)
+
+
+def frame_cache_dir() -> Path | None:
+    configured = getattr(settings, "WORKLOAD_FRAME_CACHE_DIR", None)
+    if configured == "":
+        return None
+    if configured:
+        return Path(configured)
+    data_root = getattr(settings, "TRAINING_DATA_DIR", settings.BASE_DIR / "data")
+    return Path(data_root) / "cache" / "frames"
+
+
+def _as_date(value: date | str | None) -> date | None:
+    if value is None or isinstance(value, date):
+        return value
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError(f"Invalid date: {value}")
+    return parsed
+
+
+def _request_key(spec: exports.ExportSpec) -> str:
+    db = connections[spec.using].settings_dict
+    payload = {
+        "format": CACHE_FORMAT_VERSION,
+        "db": [db.get("ENGINE"), str(db.get("NAME")), db.get("HOST") or ""],
+        "athlete_ids": sorted(spec.athlete_ids) if spec.athlete_ids else None,
+        "start": spec.start.isoformat() if spec.start else None,
+        "end": spec.end.isoformat() if spec.end else None,
+        "columns": spec.columns,
+        "flatten": sorted(spec.flatten),
+    }
+    encoded = json.dumps(payload, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:24]
+
+
+def _fetch_frame(spec: exports.ExportSpec, chunk_size: int) -> pd.DataFrame:
+    # JSON 列はテキストのまま受け取り、展開は DataFrame 側でまとめて行う (キーの事前走査が要らない)
+    fetch_spec = replace(spec, flatten=())
+    columns = exports.output_columns(fetch_spec)
+    rows = [row for chunk in exports.iter_rows(fetch_spec, columns, chunk_size=chunk_size) for row in chunk]
+    df = _apply_dtypes(pd.DataFrame.from_records(rows, columns=columns))
+    del rows
+
+    parts = []
+    for col in df.columns:
+        if col not in exports.JSON_COLUMNS:
+            parts.append(df[[col]])
+            continue
+        values = [_loads(text) for text in df[col]]
+        if col not in spec.flatten:
+            parts.append(pd.DataFrame({col: values}, index=df.index))
+            continue
+        expanded = pd.DataFrame.from_records([value or {} for value in values], index=df.index)
+        expanded = expanded.reindex(columns=sorted(expanded.columns))
+        expanded = expanded.apply(pd.to_numeric, errors="coerce").astype("float64")
+        parts.append(expanded.add_prefix(f"{col}."))
+    return pd.concat(parts, axis=1) if parts else df
+
+
+def _apply_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    for col in df.columns:
+        if col in _CATEGORY_COLUMNS:
+            df[col] = df[col].astype("category")
+        elif col == "date":
+            df[col] = pd.to_datetime(df[col])
+        elif col == "is_match_day":
+            df[col] = df[col].astype(bool)
+        elif col == "md_offset":
+            df[col] = df[col].astype("Int64")
+        elif col in _INT_COLUMNS:
+            df[col] = df[col].astype("int64")
+        elif col in _FLOAT_COLUMNS or "." in col:
+            # metrics / params のキーは数値として扱う (数値でない値は NaN)
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    return df
+
+
+def _loads(text: str | None):
+    if text is None:
+        return None
+    return orjson.loads(text) if orjson is not None else json.loads(text)
+
+
+def _read_cache(path: Path) -> pd.DataFrame | None:
+    if not path.exists():
+        return None
+    try:
+        return pd.read_pickle(path)
+    except Exception:
+        logger.warning("ignoring unreadable frame cache %s", path, exc_info=True)
+        return None
+
+
+def _write_cache(cache_dir: Path, key: str, path: Path, df: pd.DataFrame) -> None:
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        df.to_pickle(tmp_path)
+        tmp_path.replace(path)
+        # 同じ条件の古いバージョンは二度と使われないので消す
+        for stale in cache_dir.glob(f"{key}_*.pkl"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+    except OSError:
+        logger.warning("could not write frame cache %s", path, exc_info=True)
+
+
+def read_workload_frame(
+    athlete_ids: Iterable[str] | str | None = None,
+    *,
+    start: date | str | None = None,
+    end: date | str | None = None,
+    columns: Iterable[str] | None = None,
+    expand: Iterable[str] = ("params",),
+    use_cache: bool = True,
+    chunk_size: int = exports.DEFAULT_CHUNK_SIZE,
+) -> pd.DataFrame:
+    """Daily metrics joined with workload features as a DataFrame, one row per athlete-day.
+
+    ``columns`` takes the export column names (``exports.EXPORT_COLUMNS`` and
+    ``metrics.<key>`` / ``params.<key>``); ``expand`` lists the JSON columns
+    ("metrics", "params") to spread into one float column per key, the others
+    are returned as dicts. ``date`` is datetime64, ``athlete_id`` /
+    ``risk_level`` are categoricals and ``md_offset`` is nullable Int64.
+    """
+    if isinstance(athlete_ids, str):
+        athlete_ids = [athlete_ids]
+    selected = list(columns) if columns is not None else list(exports.EXPORT_COLUMNS)
+    want_name = "athlete_name" in selected
+    spec = exports.ExportSpec(
+        athlete_ids=sorted(set(athlete_ids)) if athlete_ids else None,
+        start=_as_date(start),
+        end=_as_date(end),
+        # 選手名はキャッシュに入れず、読み込みのたびに最新の値を付ける
+        columns=[col for col in selected if col != "athlete_name"],
+        flatten=tuple(expand),
+        using=router.db_for_read(GpsDaily),
+    )
+    drop_id = want_name and "athlete_id" not in spec.columns
+    if drop_id:
+        spec.columns.insert(0, "athlete_id")
+
+    cache_dir = frame_cache_dir() if use_cache else None
+    if cache_dir is None:
+        df = _fetch_frame(spec, chunk_size)
+    else:
+        # リビジョンは取得前に読む (取得中の書き込みは次回の呼び出しで読み直される)
+        key = _request_key(spec)
+        path = cache_dir / f"{key}_{current_revision()}.pkl"
+        df = _read_cache(path)
+        if df is None:
+            df = _fetch_frame(spec, chunk_size)
+            _write_cache(cache_dir, key, path, df)
+
+    if want_name:
+        names = {athlete_id: meta.athlete_name for athlete_id, meta in get_athlete_metadata().items()}
+        athlete_names = df["athlete_id"].astype(str).map(names).fillna("")
+        if drop_id:
+            df = df.drop(columns="athlete_id")
+        df.insert(selected.index("athlete_name"), "athlete_name", athlete_names)
+    return df
+
+
+def clear_frame_cache() -> int:
+    """Delete every cached frame; returns the number of files removed."""
+    cache_dir = frame_cache_dir()
+    if cache_dir is None or not cache_dir.exists():
+        return 0
+    removed = 0
+    for path in cache_dir.glob("*.pkl"):
+        path.unlink(missing_ok=True)
+        removed += 1
+    return removed
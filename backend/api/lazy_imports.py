@@ -0,0 +1,35 @@
+"""Deferred imports of the scientific stack.
+
+``pd = lazy_module("pandas")`` binds a placeholder that imports pandas on the
+first attribute access, so importing ``api.services`` (which the URLconf, and
+therefore every ``manage.py`` command and server process, pulls in) does not
+pay for pandas / numpy until ingestion or feature code actually runs. After the
+first access the module's attributes are copied onto the placeholder, so later
+lookups cost the same as on the real module.
+
+``tests.StartupImportTests`` keeps these modules out of Django startup.
+"""
+from __future__ import annotations
+
+import importlib
+
+# Django の起動 (URLconf の読み込み) で import されてはいけないモジュール
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow", "sklearn", "xgboost", "shap", "torch")
+
+
+class LazyModule:
+    def __init__(self, name: str):
+        self.__dict__["_lazy_name"] = name
+
+    def __getattr__(self, attr: str):
+        module = importlib.import_module(self._lazy_name)
+        # 以降の属性参照は __getattr__ を通らずインスタンス辞書から引ける
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+    def __repr__(self) -> str:
+        return f"<lazy module {self._lazy_name!r}>"
+
+
+def lazy_module(name: str) -> LazyModule:
+    return LazyModule(name)
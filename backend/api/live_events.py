@@ -0,0 +1,149 @@
+"""Live events for dashboards: ingestion progress and risk level changes.
+
+Producers call ``publish()`` (ingestion stages) or ``publish_on_commit()``
+(risk level transitions found by ``_swap_feature_rows``). Events are rows in
+``live_events``, so every server process, the rebuild timer threads and
+management commands feed the same stream, and a reconnecting client resumes
+from its ``Last-Event-ID``.
+
+``stream()`` is the body of the SSE endpoint (/api/workload/events/). It
+polls the table every ``LIVE_EVENTS_POLL_SECONDS`` and ends after
+``LIVE_EVENTS_STREAM_SECONDS`` (EventSource reconnects and resumes), so serve
+it through config/asgi.py; under runserver each open stream holds a thread.
+Events older than ``LIVE_EVENTS_RETENTION_SECONDS`` are pruned when an
+ingestion starts.
+
+Ids are handed out at insert, not at commit, so an event can become visible
+after a larger id was already streamed. ``stream()`` remembers the ids it
+skipped over and looks for them again on every poll for
+``LATE_COMMIT_SECONDS``. Ingest events are only sent to the stream opened
+with their ``progress_id`` (the uploading client); risk events go to everyone.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from datetime import timedelta
+from typing import AsyncIterator, Iterable
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .models import LiveEvent
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("ingest", "risk")
+FETCH_LIMIT = 200
+HEARTBEAT_SECONDS = 15
+RETRY_MS = 3000
+# 飛ばした id (遅れてコミットされうる) を探し続ける秒数と件数の上限
+LATE_COMMIT_SECONDS = 30
+MAX_MISSING_IDS = 200
+
+
+def _poll_seconds() -> float:
+    return float(getattr(settings, "LIVE_EVENTS_POLL_SECONDS", 1.0))
+
+
+def _stream_seconds() -> float:
+    return float(getattr(settings, "LIVE_EVENTS_STREAM_SECONDS", 300))
+
+
+def _retention_seconds() -> float:
+    return float(getattr(settings, "LIVE_EVENTS_RETENTION_SECONDS", 3600))
+
+
+def publish(kind: str, **payload) -> None:
+    """Store one event now. Failures are logged and never break the caller."""
+    try:
+        LiveEvent.objects.create(kind=kind, payload=payload)
+    except Exception:
+        logger.warning("failed to publish %s event", kind, exc_info=True)
+
+
+def publish_on_commit(kind: str, **payload) -> None:
+    """Store the event once the surrounding transaction commits (dropped on rollback)."""
+    transaction.on_commit(lambda: publish(kind, **payload))
+
+
+def prune() -> int:
+    cutoff = timezone.now() - timedelta(seconds=_retention_seconds())
+    deleted, _ = LiveEvent.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+def _latest_id() -> int:
+    return LiveEvent.objects.aggregate(latest=Max("id"))["latest"] or 0
+
+
+def _fetch_after(last_id: int, missing: Iterable[int] = ()) -> list[tuple[int, str, dict]]:
+    """Events after ``last_id`` plus any of the ``missing`` ids that have committed since."""
+    condition = Q(id__gt=last_id)
+    missing = list(missing)
+    if missing:
+        condition |= Q(id__in=missing)
+    qs = LiveEvent.objects.filter(condition)
+    return list(qs.order_by("id").values_list("id", "kind", "payload")[:FETCH_LIMIT])
+
+
+def is_visible(kind: str, payload: dict, *, kinds: Iterable[str] | None, progress_id: str | None) -> bool:
+    if kinds and kind not in kinds:
+        return False
+    if kind == "ingest":
+        # 取り込みの進捗は、その progress_id でアップロードしたクライアントにだけ送る
+        return bool(progress_id) and payload.get("progress_id") == progress_id
+    return True
+
+
+def format_event(event_id: int, kind: str, payload: dict) -> str:
+    data = json.dumps(payload, cls=DjangoJSONEncoder, ensure_ascii=False)
+    return f"id: {event_id}\nevent: {kind}\ndata: {data}\n\n"
+
+
+async def stream(
+    last_id: int | None = None,
+    kinds: Iterable[str] | None = None,
+    progress_id: str | None = None,
+) -> AsyncIterator[str]:
+    """SSE body: events after ``last_id`` (only new events when None), plus keep-alive comments."""
+    kinds = list(kinds) if kinds else None
+    if last_id is None:
+        last_id = await sync_to_async(_latest_id)()
+
+    yield f"retry: {RETRY_MS}\n\n"
+    # 飛ばした id -> 最初に気づいた時刻
+    missing: dict[int, float] = {}
+    started = last_sent = time.monotonic()
+    while time.monotonic() - started < _stream_seconds():
+        now = time.monotonic()
+        for event_id in [event_id for event_id, seen in missing.items() if now - seen > LATE_COMMIT_SECONDS]:
+            del missing[event_id]
+
+        events = await sync_to_async(_fetch_after)(last_id, missing)
+        sent = False
+        for event_id, kind, payload in events:
+            if missing.pop(event_id, None) is None:
+                # 間の id はまだコミットされていないかもしれないので後で探す
+                for gap in range(last_id + 1, min(event_id, last_id + 1 + MAX_MISSING_IDS - len(missing))):
+                    missing[gap] = now
+                last_id = event_id
+            if is_visible(kind, payload, kinds=kinds, progress_id=progress_id):
+                # 遅れて届いた分も再接続の起点は送った中で最大の id にする
+                sent = True
+                yield format_event(last_id, kind, payload)
+        if sent:
+            last_sent = time.monotonic()
+        if len(events) == FETCH_LIMIT:
+            continue
+        if not sent and time.monotonic() - last_sent >= HEARTBEAT_SECONDS:
+            # プロキシにアイドル接続を切られないようにコメント行を送る
+            last_sent = time.monotonic()
+            yield ": keepalive\n\n"
+        await asyncio.sleep(_poll_seconds())
@@ -1,23 +1,24 @@
-from datetime import datetime
+from collections import defaultdict
 
 from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.db import DataError, connection, transaction
+from django.db.models import Max, Min
 
 from api.models import GpsSessionRaw
+from api.services import parse_upload_dates, refresh_upload_date_ranges, repair_slash_dates
 
 
-def parse_date_any(x):
-    if not x:
-        return None
-    s = str(x).strip()
-    if not s:
-        return None
-    for fmt in ("%Y-%m-%d", "%Y/%m/%d", "%d/%m/%Y"):
-        try:
-            return datetime.strptime(s, fmt).date()
-        except ValueError:
-            pass
-    return None
+# services.DATE_FORMATS と同じ 3 形式を SQL 側で判定する。正規表現に合う値だけ to_date に渡す。
+PG_DATE_EXPR = r"""
+    CASE
+        WHEN btrim(raw_payload->>'date_') ~ '^\d{4}-\d{1,2}-\d{1,2}$'
+            THEN to_date(btrim(raw_payload->>'date_'), 'YYYY-MM-DD')
+        WHEN btrim(raw_payload->>'date_') ~ '^\d{4}/\d{1,2}/\d{1,2}$'
+            THEN to_date(btrim(raw_payload->>'date_'), 'YYYY/MM/DD')
+        WHEN btrim(raw_payload->>'date_') ~ '^\d{1,2}/\d{1,2}/\d{4}$'
+            THEN to_date(btrim(raw_payload->>'date_'), 'MM/DD/YYYY')
+    END
+"""
 
 
 class Command(BaseCommand):
@@ -27,15 +28,53 @@ class Command(BaseCommand):
         parser.add_argument("--upload_id", type=int, default=None)
         parser.add_argument("--dry_run", action="store_true")
         parser.add_argument("--batch_size", type=int, default=2000)
+        parser.add_argument(
+            "--start_id",
+            type=int,
+            default=None,
+            help="Resume from this GpsSessionRaw id (inclusive)",
+        )
+        parser.add_argument(
+            "--end_id",
+            type=int,
+            default=None,
+            help="Stop at this GpsSessionRaw id (inclusive)",
+        )
+        parser.add_argument(
+            "--chunk_size",
+            type=int,
+            default=50000,
+            help="Width of each id range updated by one SQL statement (PostgreSQL)",
+        )
+        parser.add_argument(
+            "--python",
+            action="store_true",
+            help="Force the row-by-row Python path even on PostgreSQL",
+        )
+        parser.add_argument(
+            "--recheck_slash_dates",
+            action="store_true",
+            help=(
+                "Re-read dated rows whose raw date looks like 01/02/2024 month-first (see DATE_FORMATS); "
+                "rows stored day-first are moved and gps_daily / features of their athletes are rebuilt"
+            ),
+        )
 
     def handle(self, *args, **options):
         upload_id = options["upload_id"]
         dry_run = options["dry_run"]
-        batch_size = options["batch_size"]
+
+        if options["recheck_slash_dates"]:
+            self._recheck_slash_dates(upload_id, options["batch_size"], dry_run)
+            return
 
         qs = GpsSessionRaw.objects.filter(date__isnull=True)
         if upload_id is not None:
             qs = qs.filter(upload_id=upload_id)
+        if options["start_id"] is not None:
+            qs = qs.filter(id__gte=options["start_id"])
+        if options["end_id"] is not None:
+            qs = qs.filter(id__lte=options["end_id"])
 
         total = qs.count()
         self.stdout.write(self.style.NOTICE(f"rows to backfill: {total}"))
@@ -44,30 +83,113 @@ class Command(BaseCommand):
             self.stdout.write(self.style.SUCCESS("nothing to do"))
             return
 
+        # 日付が入るとアップロード履歴の期間 (first_date / last_date) も変わる
+        upload_ids = list(qs.order_by().values_list("upload_id", flat=True).distinct())
+
+        if connection.vendor == "postgresql" and not options["python"]:
+            updated = self._backfill_sql(qs, upload_id, options["chunk_size"], dry_run)
+        else:
+            updated = self._backfill_python(qs, options["batch_size"], dry_run)
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f"dry_run=True -> would update {updated} rows"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"updated {updated} rows"))
+            if updated:
+                refreshed = refresh_upload_date_ranges(upload_ids)
+                self.stdout.write(self.style.SUCCESS(f"refreshed the date range of {refreshed} uploads"))
+
+    def _recheck_slash_dates(self, upload_id, batch_size, dry_run) -> None:
+        repair = repair_slash_dates(upload_id=upload_id, dry_run=dry_run, batch_size=batch_size)
+        if not repair.rows:
+            self.stdout.write(self.style.SUCCESS("no rows stored day-first"))
+            return
+        self.stdout.write(
+            f"rows stored day-first: {repair.rows} "
+            f"(uploads {', '.join(map(str, repair.upload_ids))}; athletes {', '.join(repair.athlete_ids)})"
+        )
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f"dry_run=True -> would move {repair.rows} rows"))
+            return
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"moved {repair.rows} rows, rebuilt {repair.daily_rows} daily rows, "
+                f"removed {repair.removed_days} days left without raw rows"
+            )
+        )
+
+    def _backfill_sql(self, qs, upload_id, chunk_size, dry_run) -> int:
+        bounds = qs.aggregate(lo=Min("id"), hi=Max("id"))
+        lo, hi = bounds["lo"], bounds["hi"]
+        table = GpsSessionRaw._meta.db_table
+        upload_filter = "AND upload_id = %s" if upload_id is not None else ""
+
+        if dry_run:
+            sql = f"""
+                SELECT COUNT(*) FROM {table}
+                WHERE id BETWEEN %s AND %s AND date_ IS NULL {upload_filter}
+                  AND ({PG_DATE_EXPR}) IS NOT NULL
+            """
+        else:
+            sql = f"""
+                UPDATE {table} SET date_ = parsed.value
+                FROM (
+                    SELECT id, ({PG_DATE_EXPR}) AS value FROM {table}
+                    WHERE id BETWEEN %s AND %s AND date_ IS NULL {upload_filter}
+                ) AS parsed
+                WHERE {table}.id = parsed.id AND parsed.value IS NOT NULL
+            """
+
+        updated = 0
+        start = lo
+        while start <= hi:
+            end = min(start + chunk_size - 1, hi)
+            params = [start, end] + ([upload_id] if upload_id is not None else [])
+            try:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.execute(sql, params)
+                    count = cursor.fetchone()[0] if dry_run else cursor.rowcount
+            except DataError:
+                # 正規表現は通るが暦上ありえない日付 (2024-02-30 など) を含む範囲は Python で処理する
+                count = self._backfill_python(
+                    qs.filter(id__gte=start, id__lte=end), chunk_size, dry_run
+                )
+            updated += count
+            self.stdout.write(f"ids {start}-{end}: {count} rows (total {updated}); resume with --start_id {end + 1}")
+            start = end + 1
+
+        return updated
+
+    def _backfill_python(self, qs, batch_size, dry_run) -> int:
         updated = 0
         buf = []
 
         for r in qs.iterator(chunk_size=batch_size):
-            date_ = parse_date_any(r.raw_payload.get("date_"))
-            if date_ is None:
-                continue
-            r.date = date_
             buf.append(r)
-
             if len(buf) >= batch_size:
-                if not dry_run:
-                    with transaction.atomic():
-                        GpsSessionRaw.objects.bulk_update(buf, ["date"], batch_size=batch_size)
-                updated += len(buf)
+                updated += self._apply_dates(buf, batch_size, dry_run)
                 buf = []
 
         if buf:
-            if not dry_run:
-                with transaction.atomic():
-                    GpsSessionRaw.objects.bulk_update(buf, ["date"], batch_size=batch_size)
-            updated += len(buf)
-
-        if dry_run:
-            self.stdout.write(self.style.WARNING(f"dry_run=True -> would update {updated} rows"))
-        else:
-            self.stdout.write(self.style.SUCCESS(f"updated {updated} rows"))
+            updated += self._apply_dates(buf, batch_size, dry_run)
+
+        return updated
+
+    def _apply_dates(self, rows, batch_size, dry_run) -> int:
+        by_upload = defaultdict(list)
+        for r in rows:
+            by_upload[r.upload_id].append(r)
+
+        dated = []
+        for upload_id, upload_rows in by_upload.items():
+            dates = parse_upload_dates(upload_id, [r.raw_payload.get("date_") for r in upload_rows])
+            for r, date_ in zip(upload_rows, dates):
+                if date_ is None:
+                    continue
+                r.date = date_
+                dated.append(r)
+
+        if dated and not dry_run:
+            with transaction.atomic():
+                GpsSessionRaw.objects.bulk_update(dated, ["date"], batch_size=batch_size)
+        return len(dated)
@@ -0,0 +1,146 @@
+import json
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+READ_PATHS = [
+    "/api/workload/athletes/",
+    "/api/workload/uploads/",
+]
+
+
+def _get(url: str, timeout: float) -> float:
+    started = time.perf_counter()
+    with urlopen(url, timeout=timeout) as response:
+        response.read()
+    return (time.perf_counter() - started) * 1000
+
+
+def _post_upload(base_url: str, csv_path: Path, timeout: float) -> tuple[int, float]:
+    boundary = uuid.uuid4().hex
+    body = b"".join(
+        [
+            f"--{boundary}\r\n".encode(),
+            b'Content-Disposition: form-data; name="allow_duplicate"\r\n\r\ntrue\r\n',
+            f"--{boundary}\r\n".encode(),
+            f'Content-Disposition: form-data; name="file"; filename="{csv_path.name}"\r\n'.encode(),
+            b"Content-Type: text/csv\r\n\r\n",
+            csv_path.read_bytes(),
+            f"\r\n--{boundary}--\r\n".encode(),
+        ]
+    )
+    request = Request(
+        f"{base_url}/api/upload/gps/",
+        data=body,
+        headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+        method="POST",
+    )
+    started = time.perf_counter()
+    try:
+        with urlopen(request, timeout=timeout) as response:
+            response.read()
+            code = response.status
+    except HTTPError as exc:
+        code = exc.code
+    return code, (time.perf_counter() - started) * 1000
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test dashboard read endpoints against a running server, optionally while "
+        "an upload is in flight (compare runserver vs DJANGO_SERVER=asgi)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base_url", type=str, default="http://127.0.0.1:8000")
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--requests", type=int, default=400, help="Total read requests")
+        parser.add_argument(
+            "--athlete_id",
+            type=str,
+            default=None,
+            help="Also request this athlete's timeseries",
+        )
+        parser.add_argument(
+            "--upload_csv",
+            type=str,
+            default=None,
+            help="CSV posted to /api/upload/gps/ (allow_duplicate) while reads are running",
+        )
+        parser.add_argument("--timeout", type=float, default=120.0)
+
+    def handle(self, *args, **options):
+        base_url = options["base_url"].rstrip("/")
+        timeout = options["timeout"]
+        paths = list(READ_PATHS)
+        if options["athlete_id"]:
+            paths.append(f"/api/workload/athletes/{options['athlete_id']}/timeseries/")
+
+        try:
+            _get(base_url + paths[0], timeout)
+        except OSError as exc:
+            raise CommandError(f"Server not reachable at {base_url}: {exc}") from exc
+
+        upload_result = {}
+        upload_thread = None
+        if options["upload_csv"]:
+            csv_path = Path(options["upload_csv"])
+            if not csv_path.exists():
+                raise CommandError(f"CSV not found: {csv_path}")
+
+            def run_upload():
+                upload_result["status"], upload_result["ms"] = _post_upload(base_url, csv_path, timeout)
+
+            upload_thread = threading.Thread(target=run_upload)
+            upload_thread.start()
+            # アップロード処理が始まってから読み込みを流す
+            time.sleep(0.2)
+
+        urls = [base_url + paths[i % len(paths)] for i in range(options["requests"])]
+        errors = 0
+        latencies: list[float] = []
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            futures = [pool.submit(_get, url, timeout) for url in urls]
+            for future in futures:
+                try:
+                    latencies.append(future.result())
+                except OSError:
+                    errors += 1
+        elapsed = time.perf_counter() - started
+
+        if upload_thread is not None:
+            upload_thread.join()
+
+        report = {
+            "requests": len(urls),
+            "errors": errors,
+            "concurrency": options["concurrency"],
+            "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        }
+        if latencies:
+            report.update(
+                {
+                    "p50_ms": round(statistics.median(latencies), 1),
+                    "p95_ms": round(_percentile(latencies, 95), 1),
+                    "max_ms": round(max(latencies), 1),
+                }
+            )
+        if upload_result:
+            report["upload_status"] = upload_result["status"]
+            report["upload_ms"] = round(upload_result["ms"], 1)
+
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
@@ -0,0 +1,97 @@
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+
+from api.services import (
+    _coerce_numeric,
+    detect_csv_encoding,
+    get_schema_plan,
+    load_statsallgroup_dataframe,
+)
+
+
+def load_as_strings(csv_path: Path, **_):
+    # 旧実装: 全列を dtype=str で読み、集計列を列ごとに pd.to_numeric する
+    encoding = detect_csv_encoding(csv_path)
+    df = pd.read_csv(csv_path, encoding=encoding, dtype=str)
+    df.columns = [str(col).strip() for col in df.columns]
+    plan = get_schema_plan([str(col) for col in pd.read_csv(csv_path, encoding=encoding, nrows=0).columns])
+    _coerce_numeric(df, plan.numeric_cols)
+    return (df,)
+
+
+MODES = [
+    ("dtype=str", load_as_strings, {}),
+    ("plan float64", load_statsallgroup_dataframe, {"native_dtypes": False}),
+    ("native float64", load_statsallgroup_dataframe, {"native_dtypes": True, "float_dtype": "float64"}),
+    ("native float32", load_statsallgroup_dataframe, {"native_dtypes": True, "float_dtype": "float32"}),
+]
+
+
+def write_synthetic_csv(path: Path, *, rows: int, bands: int, athletes: int = 25) -> None:
+    rng = random.Random(0)
+    band_cols = [f"ima_band2_{i}_count" for i in range(bands // 2)]
+    band_cols += [f"ima_band3_{i}_count" for i in range(bands - bands // 2)]
+    metric_cols = [
+        "total_duration",
+        "total_distance",
+        "total_player_load",
+        "max_vel",
+        "mean_heart_rate",
+        *[f"velocity_band{i}_total_distance" for i in range(1, 7)],
+        *band_cols,
+    ]
+    start = date(2024, 4, 1)
+    with path.open("w", encoding="cp932", newline="") as handle:
+        handle.write(",".join(["athlete_id", "athlete_name", "date", "session_name", *metric_cols]) + "\n")
+        for i in range(rows):
+            athlete = i % athletes
+            day = start + timedelta(days=i // athletes)
+            values = [f"{rng.random() * 100:.2f}" for _ in metric_cols]
+            handle.write(
+                ",".join([f"A{athlete:03d}", f"選手{athlete}", day.isoformat(), "練習", *values]) + "\n"
+            )
+
+
+class Command(BaseCommand):
+    help = "Compare time/memory of CSV loading with dtype=str vs native numeric dtypes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--csv", type=str, default=None, help="CSV to load (synthetic if omitted)")
+        parser.add_argument("--rows", type=int, default=20000)
+        parser.add_argument("--bands", type=int, default=200, help="Number of ima_band* columns")
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            if options["csv"]:
+                csv_path = Path(options["csv"])
+                if not csv_path.exists():
+                    raise CommandError(f"CSV not found: {csv_path}")
+            else:
+                csv_path = Path(tmp_dir) / "bench.csv"
+                write_synthetic_csv(csv_path, rows=options["rows"], bands=options["bands"])
+
+            self.stdout.write(f"file: {csv_path} ({csv_path.stat().st_size / 1e6:.1f} MB)")
+            self.stdout.write(f"{'mode':<16} {'best [ms]':>10} {'frame [MB]':>11} {'peak [MB]':>10}")
+            for label, loader, kwargs in MODES:
+                best = None
+                for _ in range(max(options["repeat"], 1)):
+                    started = time.perf_counter()
+                    df, *_ = loader(csv_path, **kwargs)
+                    elapsed = (time.perf_counter() - started) * 1000
+                    best = elapsed if best is None else min(best, elapsed)
+                frame_mb = df.memory_usage(deep=True).sum() / 1e6
+
+                tracemalloc.start()
+                loader(csv_path, **kwargs)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                self.stdout.write(f"{label:<16} {best:>10.1f} {frame_mb:>11.1f} {peak / 1e6:>10.1f}")
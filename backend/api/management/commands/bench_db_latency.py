@@ -0,0 +1,69 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+
+DEFAULT_PATHS = ["/api/workload/uploads/", "/api/workload/athletes/"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure per-request latency of small endpoints through the full request cycle "
+        "(connections are closed/reused as in a server, per CONN_MAX_AGE / pool settings)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", action="append", dest="paths", default=None)
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--host", type=str, default="localhost", help="Host header (must be in ALLOWED_HOSTS)")
+
+    def handle(self, *args, **options):
+        paths = options["paths"] or DEFAULT_PATHS
+        db_settings = connections["default"].settings_dict
+        client = Client(HTTP_HOST=options["host"])
+
+        opened = 0
+
+        def count_connection(sender, **kwargs):
+            nonlocal opened
+            opened += 1
+
+        connection_created.connect(count_connection)
+        try:
+            report = {
+                "conn_max_age": db_settings.get("CONN_MAX_AGE"),
+                "health_checks": db_settings.get("CONN_HEALTH_CHECKS"),
+                "pool": db_settings.get("OPTIONS", {}).get("pool", False),
+                "paths": {},
+            }
+            for path in paths:
+                response = client.get(path)
+                if response.status_code != 200:
+                    raise CommandError(f"{path} returned {response.status_code}")
+
+                opened = 0
+                latencies = []
+                for _ in range(options["requests"]):
+                    started = time.perf_counter()
+                    # テストクライアントは request_started/finished の接続クローズを外すので、
+                    # サーバーと同じく前後で close_old_connections() を呼ぶ
+                    close_old_connections()
+                    client.get(path)
+                    close_old_connections()
+                    latencies.append((time.perf_counter() - started) * 1000)
+
+                latencies.sort()
+                report["paths"][path] = {
+                    "p50_ms": round(statistics.median(latencies), 2),
+                    "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+                    "mean_ms": round(statistics.fmean(latencies), 2),
+                    "db_connects": opened,
+                }
+        finally:
+            connection_created.disconnect(count_connection)
+
+        self.stdout.write(json.dumps(report, indent=2))
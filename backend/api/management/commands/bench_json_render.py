@@ -0,0 +1,109 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+
+from api import compression
+from api.renderers import ORJSONRenderer
+
+
+def synthetic_timeseries(*, seasons: int, metrics: int) -> list[dict]:
+    # 時系列 API と同じ形 (日次の指標 + metrics 辞書 + workload) のデータを作る
+    rng = random.Random(0)
+    metric_keys = [f"ima_band{i % 3 + 1}_{i}_count" for i in range(metrics)]
+    start = date(2024, 1, 1)
+    out = []
+    for offset in range(seasons * 365):
+        day = start + timedelta(days=offset)
+        out.append(
+            {
+                "date": day,
+                "is_match_day": offset % 7 == 5,
+                "md_offset": offset % 7 - 5,
+                "total_duration": rng.random() * 120,
+                "total_distance": rng.random() * 12000,
+                "total_player_load": rng.random() * 1200,
+                "max_vel": rng.random() * 35,
+                "mean_heart_rate": rng.random() * 180,
+                "hsr_distance": rng.random() * 1500,
+                "high_decel_count": rng.randint(0, 60),
+                "total_dive_count": rng.randint(0, 40),
+                "avg_time_to_feet": rng.random() * 2,
+                "total_dive_load": rng.random() * 300,
+                "total_jumps": rng.randint(0, 50),
+                "metrics": {key: round(rng.random() * 100, 2) for key in metric_keys},
+                "workload": {
+                    "acwr_load": rng.random() * 2,
+                    "acwr_total_distance": rng.random() * 2,
+                    "acwr_hsr": rng.random() * 2,
+                    "acwr_dive": None,
+                    "efficiency_index": rng.random(),
+                    "monotony_load": rng.random() * 3,
+                    "load_per_meter": rng.random() / 10,
+                    "val_asymmetry": None,
+                    "decel_density": rng.random(),
+                    "time_to_feet": None,
+                    "risk_level": rng.choice(["safety", "caution", "risky"]),
+                    "risk_reasons": [],
+                },
+            }
+        )
+    return out
+
+
+def best_of(repeat: int, func) -> tuple[float, object]:
+    best, result = None, None
+    for _ in range(max(repeat, 1)):
+        started = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+class Command(BaseCommand):
+    help = "Compare JSON encode time and compressed response sizes for a timeseries payload"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--athlete_id", type=str, default=None, help="Use this athlete's real timeseries")
+        parser.add_argument("--seasons", type=int, default=3, help="Synthetic payload length in seasons")
+        parser.add_argument("--metrics", type=int, default=200, help="Synthetic keys per metrics dict")
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        if options["athlete_id"]:
+            response = Client(HTTP_HOST="localhost").get(
+                f"/api/workload/athletes/{options['athlete_id']}/timeseries/"
+            )
+            if response.status_code != 200:
+                raise CommandError(f"timeseries request failed: {response.status_code}")
+            data = response.data
+        else:
+            data = synthetic_timeseries(seasons=options["seasons"], metrics=options["metrics"])
+        self.stdout.write(f"payload: {len(data)} days")
+
+        repeat = options["repeat"]
+        self.stdout.write(f"{'renderer':<16} {'best [ms]':>10} {'bytes':>12}")
+        for label, renderer in (("DRF json", JSONRenderer()), ("orjson", ORJSONRenderer())):
+            elapsed, body = best_of(repeat, lambda: renderer.render(data, "application/json"))
+            self.stdout.write(f"{label:<16} {elapsed:>10.1f} {len(body):>12,}")
+
+        self.stdout.write("")
+        self.stdout.write(f"{'encoding':<16} {'best [ms]':>10} {'bytes':>12} {'ratio':>7}")
+        encodings = [("gzip", "RESPONSE_GZIP_LEVEL", level) for level in (1, 4, 6, 9)]
+        if compression.brotli is not None:
+            encodings += [("br", "RESPONSE_BROTLI_QUALITY", quality) for quality in (1, 4, 11)]
+        else:
+            self.stdout.write("(brotli is not installed; br rows skipped)")
+
+        for encoding, setting, level in encodings:
+            with override_settings(**{setting: level}):
+                elapsed, compressed = best_of(repeat, lambda: compression.compress(body, encoding))
+            self.stdout.write(
+                f"{f'{encoding} {level}':<16} {elapsed:>10.1f} {len(compressed):>12,} "
+                f"{len(compressed) / len(body):>7.1%}"
+            )
@@ -0,0 +1,77 @@
+import gc
+import time
+import tracemalloc
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from api import services
+from api.models import GpsSessionRaw
+
+
+def fold_full_payloads(athlete_ids: list[str]):
+    # 以前の rebuild_gps_daily: raw_payload 全体を選手・日ごとのリストに溜めてから集計する
+    qs = GpsSessionRaw.objects.all()
+    if athlete_ids:
+        qs = qs.filter(athlete_id__in=athlete_ids)
+
+    grouped = defaultdict(list)
+    undated = defaultdict(list)
+    for row in qs.iterator(chunk_size=2000):
+        if row.date:
+            grouped[(row.athlete_id, row.date)].append(row.raw_payload)
+        else:
+            undated[row.upload_id].append((row.athlete_id, row.raw_payload))
+    for upload_id, rows in undated.items():
+        dates = services.parse_upload_dates(upload_id, [services._raw_date_value(payload) for _, payload in rows])
+        for (athlete_id, payload), date_ in zip(rows, dates):
+            if date_:
+                grouped[(athlete_id, date_)].append(payload)
+    for athlete_id, date_, payload in services._iter_archived_payloads(athlete_ids):
+        grouped[(athlete_id, date_)].append(payload)
+
+    accumulators = {}
+    for key, payloads in grouped.items():
+        accumulators[key] = services._RawDailyAccumulator()
+        for payload in payloads:
+            accumulators[key].add(payload)
+    return accumulators
+
+
+def measure(func, athlete_ids: list[str]) -> tuple[float, float, dict]:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func(athlete_ids)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+class Command(BaseCommand):
+    help = "Compare peak memory and time of the gps_daily rebuild fold (nothing is written)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--athlete_ids", nargs="*", default=[], help="Limit to these athletes (all if omitted)")
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        athlete_ids = options["athlete_ids"]
+        raw_rows = GpsSessionRaw.objects.filter(athlete_id__in=athlete_ids) if athlete_ids else GpsSessionRaw.objects
+        self.stdout.write(f"raw rows: {raw_rows.count()}")
+
+        # 1 回目は日付パース (pandas) の import などを含むので捨てる
+        services.fold_raw_daily(athlete_ids)
+
+        self.stdout.write(f"{'fold':<16} {'athlete-days':>12} {'peak MB':>8} {'best s':>7}")
+        results = {}
+        for name, func in (("full payloads", fold_full_payloads), ("streaming", services.fold_raw_daily)):
+            runs = [measure(func, athlete_ids) for _ in range(max(options["repeat"], 1))]
+            best = min(elapsed for elapsed, _, _ in runs)
+            peak = max(peak for _, peak, _ in runs)
+            results[name] = {
+                key: acc.to_daily(*key).metrics for key, acc in runs[-1][2].items()
+            }
+            self.stdout.write(f"{name:<16} {len(results[name]):>12} {peak / 2**20:>8.1f} {best:>7.3f}")
+        self.stdout.write(f"same totals: {results['full payloads'] == results['streaming']}")
@@ -0,0 +1,126 @@
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import services
+
+METRIC_COLUMNS = [
+    "total_duration",
+    "total_distance",
+    "total_player_load",
+    "max_vel",
+    "mean_heart_rate",
+    *[f"velocity_band{i}_total_distance" for i in range(1, 7)],
+    "dive_left_count",
+    "dive_right_count",
+    "dive_centre_count",
+    "total_jumps",
+    "ima_band2_decel_count",
+    "ima_band3_decel_count",
+    "total_time_to_feet_left",
+    "total_time_to_feet_right",
+]
+
+
+def write_daily_csv(path: Path, *, rows: int, athletes: int) -> None:
+    # 1 日 2 セッション程度の、日々のアップロードに近いファイル
+    rng = random.Random(0)
+    start = date(2025, 4, 1)
+    with path.open("w", encoding="cp932", newline="") as handle:
+        handle.write(",".join(["athlete_id", "athlete_name", "date", "session_name", *METRIC_COLUMNS]) + "\n")
+        for i in range(rows):
+            athlete = i % athletes
+            day = start + timedelta(days=i // (athletes * 2))
+            values = [f"{rng.random() * 100:.2f}" for _ in METRIC_COLUMNS]
+            handle.write(
+                ",".join([f"A{athlete:03d}", f"選手{athlete}", day.isoformat(), "練習", *values]) + "\n"
+            )
+
+
+def run_small(csv_path: Path):
+    parsed = [services.parse_small_statsallgroup_csv(csv_path)]
+    p = parsed[0]
+    columns, rows, _ = services.aggregate_small_daily(parsed, p.sum_cols, p.max_cols, p.mean_cols)
+    services._daily_dive_totals(columns, rows)
+    return [(row[0], row[1], list(row[2:])) for row in rows]
+
+
+def run_pandas(csv_path: Path):
+    p = services.parse_statsallgroup_csv(csv_path, native_dtypes=False)
+    df_daily = services.aggregate_daily(p.df_raw, p.sum_cols, p.max_cols, p.mean_cols)
+    df_daily = services.zero_pad_daily(df_daily, p.sum_cols)
+    dive_cols = [col for col in ("dive_right_count", "dive_left_count", "dive_centre_count") if col in df_daily]
+    df_daily[dive_cols].sum(axis=1).groupby(df_daily["athlete_id"]).agg(["sum", "max"])
+    services._athlete_names(df_daily)
+
+    metric_cols = [*p.sum_cols, *p.max_cols, *p.mean_cols]
+    values = df_daily[metric_cols].astype(object).where(df_daily[metric_cols].notna(), None)
+    return [
+        (day.date(), athlete_id, list(metrics))
+        for day, athlete_id, metrics in zip(df_daily["date_"], df_daily["athlete_id"], values.itertuples(index=False, name=None))
+    ]
+
+
+def best_of(func, csv_path: Path, repeat: int) -> tuple[float, float, object]:
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(csv_path)
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings), statistics.median(timings), result
+
+
+class Command(BaseCommand):
+    help = "Compare latency of the stdlib csv (small file) and pandas ingestion paths"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--csv", type=str, default=None, help="CSV to parse (synthetic files if omitted)")
+        parser.add_argument("--rows", type=int, nargs="+", default=[50, 200, 500, 2000, 10000])
+        parser.add_argument("--athletes", type=int, default=25)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        repeat = max(options["repeat"], 1)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            if options["csv"]:
+                csv_path = Path(options["csv"])
+                if not csv_path.exists():
+                    raise CommandError(f"CSV not found: {csv_path}")
+                files = [csv_path]
+            else:
+                files = []
+                for rows in options["rows"]:
+                    csv_path = Path(tmp_dir) / f"daily_{rows}.csv"
+                    write_daily_csv(csv_path, rows=rows, athletes=options["athletes"])
+                    files.append(csv_path)
+
+            # 小さいファイル経路は pandas を使わないので、最初の取り込みでは import の分も差が出る
+            if "pandas" not in sys.modules:
+                started = time.perf_counter()
+                import pandas  # noqa: F401
+
+                self.stdout.write(f"first pandas import: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+            self.stdout.write(
+                f"{'file':<18} {'KB':>7} {'csv best':>9} {'csv med':>8} "
+                f"{'pandas best':>12} {'pandas med':>11} {'speedup':>8}  same"
+            )
+            for csv_path in files:
+                try:
+                    small_best, small_median, small_rows = best_of(run_small, csv_path, repeat)
+                except services.PandasPathRequired as exc:
+                    self.stdout.write(f"{csv_path.name:<18} needs the pandas path: {exc}")
+                    continue
+                pandas_best, pandas_median, pandas_rows = best_of(run_pandas, csv_path, repeat)
+                self.stdout.write(
+                    f"{csv_path.name:<18} {csv_path.stat().st_size / 1024:>7.0f} {small_best:>9.1f} {small_median:>8.1f} "
+                    f"{pandas_best:>12.1f} {pandas_median:>11.1f} {pandas_median / small_median:>7.1f}x  "
+                    f"{small_rows == pandas_rows}"
+                )
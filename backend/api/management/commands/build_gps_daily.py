@@ -6,7 +6,15 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument("--upload_id", type=int, default=None)
-        parser.add_argument("--delete_existing", action="store_true")
+        parser.add_argument(
+            "--delete_existing",
+            action="store_true",
+            help=(
+                "Delete gps_daily rows that the raw rows no longer produce. Days inside partitions "
+                "detached by manage_raw_partitions are never deleted: their raw rows are gone and "
+                "those days cannot be rebuilt."
+            ),
+        )
         parser.add_argument("--athlete_id", action="append", default=[])
 
     def handle(self, *args, **options):
@@ -0,0 +1,75 @@
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from api import exports
+
+
+class Command(BaseCommand):
+    help = "Export gps_daily joined with workload_features_daily as CSV or Parquet"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--athlete_ids", nargs="*", default=None, help="Athletes to export (default: all)")
+        parser.add_argument("--start", type=str, default=None, help="First date (YYYY-MM-DD)")
+        parser.add_argument("--end", type=str, default=None, help="Last date (YYYY-MM-DD)")
+        parser.add_argument(
+            "--columns",
+            type=str,
+            default=None,
+            help="Comma separated columns, including metrics.<key> / params.<key> (default: all)",
+        )
+        parser.add_argument(
+            "--flatten",
+            nargs="*",
+            choices=exports.JSON_COLUMNS,
+            default=(),
+            help="Expand these JSON columns into one column per key",
+        )
+        parser.add_argument("--format", choices=exports.FORMATS, default="csv")
+        parser.add_argument("--output", type=str, default="-", help="Output file ('-' for stdout, CSV only)")
+        parser.add_argument("--chunk_size", type=int, default=exports.DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        dates = {}
+        for key in ("start", "end"):
+            value = options[key]
+            dates[key] = parse_date(value) if value else None
+            if value and dates[key] is None:
+                raise CommandError(f"Invalid --{key}: {value}")
+
+        spec = exports.ExportSpec(
+            athlete_ids=exports.parse_list(options["athlete_ids"]) or None,
+            start=dates["start"],
+            end=dates["end"],
+            flatten=tuple(options["flatten"]),
+        )
+        if options["columns"]:
+            spec.columns = exports.parse_list([options["columns"]])
+
+        fmt = options["format"]
+        output = options["output"]
+        if output == "-" and fmt != "csv":
+            raise CommandError("--output is required for Parquet exports.")
+        try:
+            chunks = exports.iter_export(spec, fmt, chunk_size=options["chunk_size"])
+        except exports.ExportError as exc:
+            raise CommandError(str(exc)) from exc
+
+        written = 0
+        if output == "-":
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+                written += len(chunk)
+            sys.stdout.buffer.flush()
+            return
+
+        path = Path(output)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with tmp_path.open("wb") as handle:
+            for chunk in chunks:
+                handle.write(chunk)
+                written += len(chunk)
+        tmp_path.replace(path)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written:,} bytes to {path}"))
@@ -1,11 +1,12 @@
+import json
 from pathlib import Path
 
 from django.core.management.base import BaseCommand, CommandError
 
+from api.csv_validation import validate_statsallgroup_csv
 from api.services import WorkloadIngestionError, import_statsallgroup_csv
 
 
-
 class Command(BaseCommand):
     help = "Import StatsAllGroup CSV and store rows as raw GPS sessions"
 
@@ -27,12 +28,25 @@ class Command(BaseCommand):
             action="store_true",
             help="Allow importing the same file hash again",
         )
+        parser.add_argument(
+            "--validate-only",
+            action="store_true",
+            help="Only check the CSV (headers, dates, numeric values, athletes); nothing is written",
+        )
 
     def handle(self, *args, **options):
         csv_path = Path(options["csv"])
 
         if not csv_path.exists():
             raise CommandError(f"CSV not found: {csv_path}")
+
+        if options["validate_only"]:
+            report = validate_statsallgroup_csv(csv_path)
+            self.stdout.write(json.dumps(report.as_dict(), ensure_ascii=False, indent=2))
+            if not report.ok:
+                raise CommandError("Validation failed: " + "; ".join(report.errors))
+            return
+
         try:
             summary = import_statsallgroup_csv(
                 csv_path,
@@ -51,7 +65,12 @@ class Command(BaseCommand):
             return
 
         self.stdout.write(self.style.NOTICE(f"Upload created: id={summary.upload_id}"))
-        self.stdout.write(self.style.NOTICE(f"CSV encoding detected: {summary.encoding}"))
+        self.stdout.write(
+            self.style.NOTICE(
+                f"CSV encoding detected: {summary.encoding} "
+                f"({summary.encoding_detect_ms} ms)"
+            )
+        )
         self.stdout.write(
             self.style.SUCCESS(
                 f"Imported {summary.rows_imported} rows into gps_sessions_raw"
@@ -1,48 +1,81 @@
+import json
 from pathlib import Path
 
 from django.core.management.base import BaseCommand, CommandError
-from django.db import transaction
 
-from api.services import WorkloadIngestionError, run_gps_pipeline
+from api.csv_validation import validate_statsallgroup_csv
+from api.services import WorkloadIngestionError, run_gps_pipeline_files
 
 
 class Command(BaseCommand):
     help = "Ingest GPS CSV and rebuild workload features"
 
     def add_arguments(self, parser):
-        parser.add_argument("csv_path", type=str, help="Path to GPS CSV file")
+        parser.add_argument(
+            "csv_path",
+            type=str,
+            nargs="+",
+            help="Path(s) to GPS CSV files; several files are imported as one batch",
+        )
         parser.add_argument(
             "--user",
             type=str,
             default="system",
             help="Uploaded by (optional)",
         )
+        parser.add_argument(
+            "--validate-only",
+            action="store_true",
+            help="Only check the CSVs (headers, dates, numeric values, athletes); nothing is written",
+        )
 
     def handle(self, *args, **options):
-        csv_path = Path(options["csv_path"])
+        csv_paths = [Path(path) for path in options["csv_path"]]
         uploaded_by = options["user"] or "system"
 
+        if options["validate_only"]:
+            reports = [validate_statsallgroup_csv(csv_path) for csv_path in csv_paths]
+            self.stdout.write(
+                json.dumps([report.as_dict() for report in reports], ensure_ascii=False, indent=2)
+            )
+            failed = [report.file_name for report in reports if not report.ok]
+            if failed:
+                raise CommandError(f"Validation failed: {', '.join(failed)}")
+            return
+
         try:
-            with transaction.atomic():
-                summary, features = run_gps_pipeline(
-                    csv_path,
-                    uploaded_by=uploaded_by,
-                    allow_duplicate=False,
-                )
+            summaries, features = run_gps_pipeline_files(
+                [(csv_path, None) for csv_path in csv_paths],
+                uploaded_by=uploaded_by,
+                allow_duplicate=False,
+                defer_rebuild=False,
+                parallel_parse=True,
+            )
 
+            for summary in summaries:
                 if summary.skipped:
                     self.stdout.write(
                         self.style.WARNING(
                             f"Duplicate CSV detected (upload id={summary.duplicate_of}). Skipping."
                         )
                     )
-                    return
+                    continue
+
+                self.stdout.write(self.style.NOTICE(f"Upload created: id={summary.upload_id}"))
+                self.stdout.write(
+                    self.style.NOTICE(
+                        f"CSV encoding detected: {summary.encoding} "
+                        f"({summary.encoding_detect_ms} ms)"
+                    )
+                )
+
+            if all(summary.skipped for summary in summaries):
+                return
 
-            self.stdout.write(self.style.NOTICE(f"Upload created: id={summary.upload_id}"))
-            self.stdout.write(self.style.NOTICE(f"CSV encoding detected: {summary.encoding}"))
+            rows_imported = sum(summary.rows_imported for summary in summaries)
             self.stdout.write(
                 self.style.SUCCESS(
-                    f"Imported {summary.rows_imported} rows; rebuilt {features} feature rows."
+                    f"Imported {rows_imported} rows; rebuilt {features} feature rows."
                 )
             )
         except WorkloadIngestionError as exc:
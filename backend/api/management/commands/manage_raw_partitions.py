@@ -0,0 +1,100 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.partitions import (
+    GRANULARITIES,
+    detach_partition,
+    ensure_partitions,
+    is_partitioned,
+    list_partitions,
+    next_period,
+    partition_name,
+    period_start,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create upcoming gps_sessions_raw partitions and detach/archive old ones. "
+        "WARNING: detaching (archive or --drop) removes those raw rows from gps_sessions_raw. "
+        "gps_daily for those dates can no longer be rebuilt from raw data; the range is recorded "
+        "in raw_detached_partitions and build_gps_daily --delete_existing keeps those days. "
+        "backfill_raw_dates no longer sees the detached rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--granularity", choices=GRANULARITIES, default="season")
+        parser.add_argument(
+            "--ahead",
+            type=int,
+            default=1,
+            help="Number of future periods to create beyond the current one",
+        )
+        parser.add_argument(
+            "--detach-before",
+            type=date.fromisoformat,
+            default=None,
+            help="Detach partitions whose range ends on or before this date (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            "--archive-schema",
+            type=str,
+            default="raw_archive",
+            help="Schema detached partitions are moved into",
+        )
+        parser.add_argument(
+            "--drop",
+            action="store_true",
+            help="Drop detached partitions instead of archiving (their raw rows are deleted for good)",
+        )
+        parser.add_argument("--dry_run", action="store_true")
+
+    def handle(self, *args, **options):
+        if not is_partitioned(connection):
+            raise CommandError("gps_sessions_raw is not a partitioned table (PostgreSQL only).")
+
+        granularity = options["granularity"]
+        dry_run = options["dry_run"]
+
+        today = date.today()
+        last_start = period_start(today, granularity)
+        for _ in range(max(options["ahead"], 0)):
+            last_start = next_period(last_start, granularity)
+
+        if dry_run:
+            ranges = [(lower, upper) for _, lower, upper in list_partitions(connection) if lower]
+            start = period_start(today, granularity)
+            while start <= last_start:
+                end = next_period(start, granularity)
+                if not any(lower < end and start < upper for lower, upper in ranges):
+                    self.stdout.write(f"would create {partition_name(start, granularity)}")
+                start = end
+        else:
+            with transaction.atomic():
+                created = ensure_partitions(connection, today, last_start, granularity)
+            for name in created:
+                self.stdout.write(self.style.SUCCESS(f"created {name}"))
+            if not created:
+                self.stdout.write("partitions up to date")
+
+        detach_before = options["detach_before"]
+        if detach_before is None:
+            return
+
+        for name, lower, upper in list_partitions(connection):
+            if upper is None or upper > detach_before:
+                continue
+            action = "drop" if options["drop"] else f"archive to {options['archive_schema']}"
+            if dry_run:
+                self.stdout.write(f"would detach {name} [{lower}, {upper}) and {action}")
+                continue
+            with transaction.atomic():
+                detach_partition(
+                    connection,
+                    name,
+                    archive_schema=options["archive_schema"],
+                    drop=options["drop"],
+                )
+            self.stdout.write(self.style.WARNING(f"detached {name} [{lower}, {upper}) and {action}"))
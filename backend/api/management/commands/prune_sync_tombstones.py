@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from api.change_feed import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = "Delete delta-sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=float,
+            default=None,
+            help="Retention in days (default: SYNC_TOMBSTONE_RETENTION_DAYS)",
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones(retention_days=options["days"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} tombstones"))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.rebuild_scheduler import pending_status, run_due
+
+
+class Command(BaseCommand):
+    help = "Run coalesced workload feature rebuilds queued by uploads (FEATURE_REBUILD_MODE=debounced)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Rebuild queued athletes now, ignoring the quiet period")
+        parser.add_argument("--loop", action="store_true", help="Keep polling the queue (dedicated worker)")
+        parser.add_argument("--interval", type=float, default=5.0, help="Polling interval in seconds for --loop")
+
+    def handle(self, *args, **options):
+        if not options["loop"]:
+            self._run_once(options["force"])
+            return
+
+        while True:
+            close_old_connections()
+            self._run_once(options["force"])
+            time.sleep(options["interval"])
+
+    def _run_once(self, force: bool) -> None:
+        status = pending_status()
+        if status["status"] == "idle":
+            self.stdout.write("no pending rebuilds")
+            return
+
+        rows = run_due(force=force)
+        if rows:
+            self.stdout.write(
+                self.style.SUCCESS(f"rebuilt {rows} feature rows for {status['athletes']} athletes")
+            )
+        else:
+            self.stdout.write(f"{status['athletes']} athletes pending; due at {status['run_after']}")
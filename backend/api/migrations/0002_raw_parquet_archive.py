@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-19 06:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataupload',
+            name='raw_storage',
+            field=models.CharField(choices=[('db', 'db'), ('parquet', 'parquet')], default='db', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='GpsSessionRawIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_column='date_')),
+                ('row_start', models.IntegerField()),
+                ('row_end', models.IntegerField()),
+                ('athlete', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='raw_index', to='api.athlete')),
+                ('upload', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='raw_index', to='api.dataupload')),
+            ],
+            options={
+                'db_table': 'gps_sessions_raw_index',
+                'indexes': [models.Index(fields=['upload'], name='gps_session_upload__e3755a_idx'), models.Index(fields=['athlete', 'date'], name='gps_session_athlete_9b4d11_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,138 @@
+from datetime import date, timedelta
+
+from django.db import migrations
+
+# api.partitions の当時の値と DDL をここに固定する (後から変わってもこのマイグレーションの結果は変えない)
+PARENT_TABLE = "gps_sessions_raw"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+LEGACY_TABLE = f"{PARENT_TABLE}_legacy"
+# RAW_PARTITION_SEASON_START_MONTH の既定値。以降のパーティションは manage_raw_partitions が設定に従って作る
+SEASON_START_MONTH = 1
+
+COLUMNS = "id, row_number, date_, session_name, raw_payload, created_at, athlete_id, upload_id"
+
+
+def _create_columns_sql(table: str, partition_clause: str = "") -> str:
+    return f"""
+        CREATE TABLE "{table}" (
+            id bigint NOT NULL,
+            row_number integer NOT NULL,
+            date_ date NULL,
+            session_name varchar(255) NOT NULL,
+            raw_payload jsonb NOT NULL,
+            created_at timestamp with time zone NOT NULL,
+            athlete_id varchar(64) NOT NULL
+                REFERENCES athletes (athlete_id) DEFERRABLE INITIALLY DEFERRED,
+            upload_id bigint NOT NULL
+                REFERENCES data_uploads (id) DEFERRABLE INITIALLY DEFERRED
+        ) {partition_clause}
+    """
+
+
+def _create_indexes(cursor) -> None:
+    # GpsSessionRaw.Meta.indexes と同じ名前で作り直す
+    cursor.execute(f'CREATE INDEX "gps_session_upload__41af69_idx" ON "{PARENT_TABLE}" (upload_id)')
+    cursor.execute(
+        f'CREATE INDEX "gps_session_athlete_3332ec_idx" ON "{PARENT_TABLE}" (athlete_id, date_)'
+    )
+
+
+def _attach_sequence(cursor, table: str) -> None:
+    cursor.execute(f'CREATE SEQUENCE "{table}_id_seq" OWNED BY "{table}".id')
+    cursor.execute(
+        f"""ALTER TABLE "{table}" ALTER COLUMN id SET DEFAULT nextval('"{table}_id_seq"')"""
+    )
+    cursor.execute(
+        f"""SELECT setval('"{table}_id_seq"', COALESCE((SELECT MAX(id) FROM "{table}"), 0) + 1, false)"""
+    )
+
+
+def _create_id_unique_index(cursor, table: str) -> None:
+    # 分割表の一意制約にはパーティションキーを含める必要があるので、id の一意性はパーティションごとに保証する
+    cursor.execute(f'CREATE UNIQUE INDEX "{table}_id_key" ON "{table}" (id)')
+
+
+def _season_start(day: date) -> date:
+    year = day.year if day.month >= SEASON_START_MONTH else day.year - 1
+    return date(year, SEASON_START_MONTH, 1)
+
+
+def _create_season_partitions(cursor, first_day: date, last_day: date) -> list[str]:
+    """Create a season partition for every season from first_day's through last_day's; returns their names."""
+    names = []
+    start = _season_start(first_day)
+    while start <= last_day:
+        end = date(start.year + 1, start.month, 1)
+        name = f"{PARENT_TABLE}_s{start:%Y%m}"
+        cursor.execute(f'CREATE TABLE "{name}" (LIKE "{PARENT_TABLE}" INCLUDING DEFAULTS)')
+        cursor.execute(
+            f'ALTER TABLE "{PARENT_TABLE}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)',
+            [start, end],
+        )
+        names.append(name)
+        start = end
+    return names
+
+
+def partition_raw_sessions(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{PARENT_TABLE}" RENAME TO "{LEGACY_TABLE}"')
+        # 分割表の主キーにはパーティションキーを含める必要がある。(id, date_) にするには date_ を
+        # NOT NULL にして日付なしの行を番兵の日付に寄せることになり、モデルの date (NULL = 未補完) と
+        # backfill_raw_dates の意味が変わる。そうはせず、親には主キーを付けずに各パーティションの
+        # id に一意インデックスを張る。id は 1 本の sequence から振るのでパーティションをまたいでも重ならない
+        cursor.execute(_create_columns_sql(PARENT_TABLE, "PARTITION BY RANGE (date_)"))
+        cursor.execute(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{PARENT_TABLE}" DEFAULT')
+        cursor.execute(f'SELECT MIN(date_) FROM "{LEGACY_TABLE}"')
+        first_day = cursor.fetchone()[0]
+        # 空の新テーブルに作るので既定パーティションから行を移す必要はない
+        today = date.today()
+        partitions = [
+            DEFAULT_PARTITION,
+            *_create_season_partitions(cursor, first_day or today, today + timedelta(days=366)),
+        ]
+
+        # 遅延 FK チェックが残っていると同一トランザクション内で CREATE INDEX できない
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(
+            f'INSERT INTO "{PARENT_TABLE}" ({COLUMNS}) SELECT {COLUMNS} FROM "{LEGACY_TABLE}"'
+        )
+        cursor.execute(f'DROP TABLE "{LEGACY_TABLE}"')
+        # インデックスはコピー後に作る (旧テーブルと同名なので DROP の後)
+        for partition in partitions:
+            _create_id_unique_index(cursor, partition)
+        _create_indexes(cursor)
+        _attach_sequence(cursor, PARENT_TABLE)
+
+
+def unpartition_raw_sessions(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{PARENT_TABLE}" RENAME TO "{LEGACY_TABLE}"')
+        cursor.execute(_create_columns_sql(PARENT_TABLE))
+        cursor.execute(f'ALTER TABLE "{PARENT_TABLE}" ADD PRIMARY KEY (id)')
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(
+            f'INSERT INTO "{PARENT_TABLE}" ({COLUMNS}) SELECT {COLUMNS} FROM "{LEGACY_TABLE}"'
+        )
+        cursor.execute(f'DROP TABLE "{LEGACY_TABLE}" CASCADE')
+        _create_indexes(cursor)
+        _attach_sequence(cursor, PARENT_TABLE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_raw_parquet_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_raw_sessions, unpartition_raw_sessions),
+    ]
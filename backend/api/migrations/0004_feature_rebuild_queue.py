@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-19 06:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_partition_gps_sessions_raw'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeatureRebuildQueue',
+            fields=[
+                ('athlete', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='pending_rebuild', serialize=False, to='api.athlete')),
+                ('earliest_date', models.DateField(blank=True, null=True)),
+                ('first_marked_at', models.DateTimeField()),
+                ('last_marked_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'feature_rebuild_queue',
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2 on 2026-10-19 06:32
+
+from django.db import migrations, models
+
+
+def seed_revision(apps, schema_editor):
+    # 既存の行はリビジョン 1 として扱い、since=0 の初回同期で全件返るようにする
+    SyncRevision = apps.get_model("api", "SyncRevision")
+    GpsDaily = apps.get_model("api", "GpsDaily")
+    WorkloadFeaturesDaily = apps.get_model("api", "WorkloadFeaturesDaily")
+    GpsDaily.objects.update(revision=1)
+    WorkloadFeaturesDaily.objects.update(revision=1)
+    SyncRevision.objects.create(id=1, value=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_feature_rebuild_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(default=0)),
+                ('pruned_through', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'sync_revision',
+            },
+        ),
+        migrations.AddField(
+            model_name='gpsdaily',
+            name='revision',
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='workloadfeaturesdaily',
+            name='revision',
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.CreateModel(
+            name='SyncTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('daily', 'gps_daily'), ('features', 'workload_features_daily')], max_length=16)),
+                ('athlete_id', models.CharField(max_length=64)),
+                ('date', models.DateField(db_column='date_')),
+                ('revision', models.BigIntegerField(db_index=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'sync_tombstones',
+                'indexes': [models.Index(fields=['athlete_id', 'revision'], name='sync_tombst_athlete_f6c7c6_idx')],
+            },
+        ),
+        migrations.RunPython(seed_revision, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2 on 2026-10-19 07:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_live_events'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='gpsdaily',
+            name='gps_daily_athlete_23d310_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='gpssessionraw',
+            name='gps_session_upload__41af69_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='gpssessionrawindex',
+            name='gps_session_upload__e3755a_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='workloadfeaturesdaily',
+            name='workload_fe_athlete_3d187f_idx',
+        ),
+        migrations.AlterField(
+            model_name='gpsdaily',
+            name='athlete',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='daily', to='api.athlete'),
+        ),
+        migrations.AlterField(
+            model_name='gpssessionrawindex',
+            name='athlete',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='raw_index', to='api.athlete'),
+        ),
+        migrations.AlterField(
+            model_name='gpssessionrawindex',
+            name='upload',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='raw_index', to='api.dataupload'),
+        ),
+        migrations.AlterField(
+            model_name='workloadfeaturesdaily',
+            name='athlete',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='workload_features', to='api.athlete'),
+        ),
+        migrations.AlterField(
+            model_name='workloadfeaturesdaily',
+            name='risk_level',
+            field=models.CharField(choices=[('safety', 'Safety (Green)'), ('caution', 'Caution (Yellow)'), ('risky', 'Risky (Red)')], default='safety', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='gpssessionraw',
+            index=models.Index(fields=['upload', 'athlete'], name='gps_raw_upload_athlete_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gpssessionrawindex',
+            index=models.Index(fields=['upload', 'athlete'], include=('row_start', 'row_end'), name='gps_raw_index_upload_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workloadfeaturesdaily',
+            index=models.Index(fields=['athlete', '-date'], include=('risk_level',), name='wfd_athlete_latest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workloadfeaturesdaily',
+            index=models.Index(condition=models.Q(('risk_level', 'safety'), _negated=True), fields=['-date'], include=('athlete', 'risk_level'), name='wfd_at_risk_idx'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2 on 2026-10-19 07:20
+
+from django.db import migrations, models
+from django.db.models import Count, F, Max, Min, Sum
+
+
+def backfill_upload_stats(apps, schema_editor):
+    # 既存のアップロードは生データ (gps_sessions_raw / Parquet のインデックス表) から 1 回だけ数える
+    DataUpload = apps.get_model("api", "DataUpload")
+    GpsSessionRaw = apps.get_model("api", "GpsSessionRaw")
+    GpsSessionRawIndex = apps.get_model("api", "GpsSessionRawIndex")
+
+    stats = {}
+    for model, rows in ((GpsSessionRaw, Count("*")), (GpsSessionRawIndex, Sum(F("row_end") - F("row_start")))):
+        grouped = model.objects.values("upload_id").annotate(
+            rows=rows,
+            athletes=Count("athlete_id", distinct=True),
+            first=Min("date"),
+            last=Max("date"),
+        )
+        for row in grouped:
+            stats[row["upload_id"]] = row
+
+    uploads = []
+    for upload in DataUpload.objects.filter(id__in=list(stats)):
+        row = stats[upload.id]
+        upload.row_count = row["rows"] or 0
+        upload.athlete_count = row["athletes"]
+        upload.first_date = row["first"]
+        upload.last_date = row["last"]
+        uploads.append(upload)
+    DataUpload.objects.bulk_update(
+        uploads, ["row_count", "athlete_count", "first_date", "last_date"], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_dashboard_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataupload',
+            name='athlete_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dataupload',
+            name='encoding',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='dataupload',
+            name='first_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dataupload',
+            name='last_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dataupload',
+            name='row_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dataupload',
+            name='stage_ms',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(backfill_upload_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-19 07:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_upload_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DetachedRawPartition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=63)),
+                ('start', models.DateField()),
+                ('end', models.DateField()),
+                ('archive_schema', models.CharField(blank=True, default='', max_length=63)),
+                ('dropped', models.BooleanField(default=False)),
+                ('detached_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'raw_detached_partitions',
+            },
+        ),
+    ]
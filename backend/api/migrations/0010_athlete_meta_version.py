@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-19 07:51
+
+from django.db import migrations, models
+
+
+def seed_version(apps, schema_editor):
+    apps.get_model("api", "AthleteMetaVersion").objects.create(id=1, value=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_detached_raw_partitions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AthleteMetaVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(default=1)),
+            ],
+            options={
+                'db_table': 'athlete_meta_version',
+            },
+        ),
+        migrations.RunPython(seed_version, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,4 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
 
@@ -18,6 +19,27 @@ class DataUpload(models.Model):
     note = models.TextField(blank=True, default="")
     error_log = models.TextField(blank=True, default="")
 
+    # 生データの保存先: "db" は gps_sessions_raw (行ごとの JSON)、
+    # "parquet" は TRAINING_DATA_DIR/raw/upload_<id>.parquet + gps_sessions_raw_index
+    raw_storage = models.CharField(
+        max_length=20,
+        default="db",
+        choices=[
+            ("db", "db"),
+            ("parquet", "parquet"),
+        ],
+    )
+
+    # 取り込み時に記録する集計。アップロード履歴は gps_sessions_raw を数えずにこれを読む
+    # (0008 で既存のアップロード分を埋めた。encoding / stage_ms は空のまま)
+    row_count = models.IntegerField(default=0)
+    athlete_count = models.IntegerField(default=0)
+    first_date = models.DateField(null=True, blank=True)
+    last_date = models.DateField(null=True, blank=True)
+    encoding = models.CharField(max_length=32, blank=True, default="")
+    # 段階ごとの所要時間 (ms): encoding_detect / parsing / aggregating / raw_rows / daily_rows
+    stage_ms = models.JSONField(default=dict, blank=True)
+
     class Meta:
         db_table = "data_uploads"
 
@@ -48,6 +70,18 @@ class Athlete(models.Model):
         return f"{number}{uniform}{label} ({self.position})"
 
 
+class AthleteMetaVersion(models.Model):
+    """Single-row version of the athletes table, bumped after every committed write (see api.athlete_cache)."""
+
+    value = models.BigIntegerField(default=1)
+
+    class Meta:
+        db_table = "athlete_meta_version"
+
+    def __str__(self):
+        return f"athlete meta version={self.value}"
+
+
 class GpsSessionRaw(models.Model):
     upload = models.ForeignKey(DataUpload, on_delete=models.PROTECT, related_name="raw_rows")
     row_number = models.IntegerField()
@@ -60,7 +94,8 @@ class GpsSessionRaw(models.Model):
     class Meta:
         db_table = "gps_sessions_raw"
         indexes = [
-            models.Index(fields=["upload"]),
+            # アップロード履歴の行数・選手数をインデックスだけで数える
+            models.Index(fields=["upload", "athlete"], name="gps_raw_upload_athlete_idx"),
             models.Index(fields=["athlete", "date"]),
         ]
 
@@ -68,8 +103,56 @@ class GpsSessionRaw(models.Model):
         return f"raw#{self.id} athlete={self.athlete.athlete_id} date={self.date}"
 
 
+class GpsSessionRawIndex(models.Model):
+    """Row ranges of a Parquet raw archive, one entry per (upload, athlete, date)."""
+
+    # FK 単独のインデックスは Meta.indexes の複合インデックスの先頭列と重なるので作らない
+    upload = models.ForeignKey(DataUpload, on_delete=models.PROTECT, related_name="raw_index", db_index=False)
+    athlete = models.ForeignKey(Athlete, on_delete=models.PROTECT, related_name="raw_index", db_index=False)
+    date = models.DateField(db_column="date_")
+    row_start = models.IntegerField()
+    row_end = models.IntegerField()  # exclusive
+
+    class Meta:
+        db_table = "gps_sessions_raw_index"
+        indexes = [
+            models.Index(
+                fields=["upload", "athlete"],
+                include=["row_start", "row_end"],
+                name="gps_raw_index_upload_idx",
+            ),
+            models.Index(fields=["athlete", "date"]),
+        ]
+
+    def __str__(self):
+        return f"raw_index upload={self.upload_id} athlete={self.athlete_id} date={self.date}"
+
+
+class DetachedRawPartition(models.Model):
+    """A gps_sessions_raw partition detached by manage_raw_partitions (archived or dropped).
+
+    Its raw rows are gone from gps_sessions_raw, so gps_daily rows in
+    [start, end) can no longer be rebuilt; rebuild_gps_daily keeps them.
+    """
+
+    name = models.CharField(max_length=63)
+    start = models.DateField()
+    end = models.DateField()  # exclusive
+    # 移した先のスキーマ (元のスキーマに残したときは空)。dropped なら表ごと削除済み
+    archive_schema = models.CharField(max_length=63, blank=True, default="")
+    dropped = models.BooleanField(default=False)
+    detached_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "raw_detached_partitions"
+
+    def __str__(self):
+        return f"{self.name} [{self.start}, {self.end})"
+
+
 class GpsDaily(models.Model):
-    athlete = models.ForeignKey(Athlete, on_delete=models.PROTECT, related_name="daily")
+    # athlete_id の検索は一意制約 (athlete, date) のインデックスで引ける
+    athlete = models.ForeignKey(Athlete, on_delete=models.PROTECT, related_name="daily", db_index=False)
     date = models.DateField(db_column="date_")
 
     is_match_day = models.BooleanField(default=False)
@@ -102,6 +185,9 @@ class GpsDaily(models.Model):
     # 頻繁にフィルタリングしないものは metrics JSON に逃がしてもOK
     metrics = models.JSONField(default=dict, blank=True)
 
+    # 差分同期用: この行を最後に書き込んだ変更のリビジョン (api.change_feed)
+    revision = models.BigIntegerField(default=0, db_index=True)
+
     class Meta:
         db_table = "gps_daily"
         constraints = [
@@ -112,7 +198,6 @@ class GpsDaily(models.Model):
         ]
         indexes = [
             models.Index(fields=["date"]),
-            models.Index(fields=["athlete", "date"]),
         ]
 
     def __str__(self):
@@ -120,7 +205,9 @@ class GpsDaily(models.Model):
 
 
 class WorkloadFeaturesDaily(models.Model):
-    athlete = models.ForeignKey(Athlete, on_delete=models.PROTECT, related_name="workload_features")
+    athlete = models.ForeignKey(
+        Athlete, on_delete=models.PROTECT, related_name="workload_features", db_index=False
+    )
     date = models.DateField(db_column="date_")
 
     # 1. ACWR (Acute:Chronic Workload Ratio)
@@ -144,7 +231,6 @@ class WorkloadFeaturesDaily(models.Model):
         max_length=20,
         choices=RISK_LEVEL_CHOICES,
         default='safety',
-        db_index=True,  # ダッシュボードで「Riskyな選手」を即座に抽出するために必須
     )
 
     # 具体的なリスク要因のリスト (例: ["HSR ACWR > 1.5", "Efficiency Low"])
@@ -155,6 +241,9 @@ class WorkloadFeaturesDaily(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # 差分同期用: この行を最後に書き込んだ変更のリビジョン (api.change_feed)
+    revision = models.BigIntegerField(default=0, db_index=True)
+
     class Meta:
         db_table = "workload_features_daily"
         constraints = [
@@ -162,8 +251,90 @@ class WorkloadFeaturesDaily(models.Model):
         ]
         indexes = [
             models.Index(fields=["date"]),
-            models.Index(fields=["athlete", "date"]),
+            # 選手ごとの最新のリスクレベル (選手一覧) をテーブルを読まずに引く
+            models.Index(fields=["athlete", "-date"], include=["risk_level"], name="wfd_athlete_latest_idx"),
+            # ダッシュボードで「Riskyな選手」を即座に抽出する。大半の safety 行は載せない
+            models.Index(
+                fields=["-date"],
+                include=["athlete", "risk_level"],
+                condition=~models.Q(risk_level="safety"),
+                name="wfd_at_risk_idx",
+            ),
         ]
 
     def __str__(self):
         return f"features athlete={self.athlete.athlete_id} date={self.date}"
+
+
+class FeatureRebuildQueue(models.Model):
+    """Athletes whose workload features are stale, waiting for a coalesced rebuild."""
+
+    athlete = models.OneToOneField(
+        Athlete,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="pending_rebuild",
+    )
+    # この日付以降の特徴量を書き直す (None は全期間)
+    earliest_date = models.DateField(null=True, blank=True)
+    first_marked_at = models.DateTimeField()
+    last_marked_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "feature_rebuild_queue"
+
+    def __str__(self):
+        return f"rebuild athlete={self.athlete_id} since={self.earliest_date}"
+
+
+class SyncRevision(models.Model):
+    """Single-row change-feed counter (see api.change_feed); the xid offset on PostgreSQL."""
+
+    value = models.BigIntegerField(default=0)
+    # これ以下のリビジョンの削除記録は消してあるので、古いトークンは全件取り直しになる
+    pruned_through = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = "sync_revision"
+
+    def __str__(self):
+        return f"revision={self.value} pruned_through={self.pruned_through}"
+
+
+class SyncTombstone(models.Model):
+    """A gps_daily / workload_features_daily row deleted at ``revision``."""
+
+    KIND_CHOICES = [
+        ("daily", "gps_daily"),
+        ("features", "workload_features_daily"),
+    ]
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    # 選手が消えても記録は残すので FK にしない
+    athlete_id = models.CharField(max_length=64)
+    date = models.DateField(db_column="date_")
+    revision = models.BigIntegerField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "sync_tombstones"
+        indexes = [
+            models.Index(fields=["athlete_id", "revision"]),
+        ]
+
+    def __str__(self):
+        return f"tombstone {self.kind} athlete={self.athlete_id} date={self.date} rev={self.revision}"
+
+
+class LiveEvent(models.Model):
+    """Ingestion progress / risk level change, streamed by /api/workload/events/ (api.live_events)."""
+
+    kind = models.CharField(max_length=32)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = "live_events"
+
+    def __str__(self):
+        return f"event#{self.id} {self.kind}"
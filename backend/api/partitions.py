@@ -0,0 +1,156 @@
+"""Range partitions of gps_sessions_raw by date_ (PostgreSQL only).
+
+The parent table is partitioned by ``date_``. Rows without a date (and rows
+outside every range) land in ``gps_sessions_raw_default``. Partitions cover
+either a season (12 months from ``RAW_PARTITION_SEASON_START_MONTH``) or a
+calendar month. The parent has no primary key (it would have to include the
+nullable ``date_``); every partition carries a unique index on ``id`` instead.
+"""
+from __future__ import annotations
+
+import re
+from datetime import date
+
+from django.conf import settings
+
+PARENT_TABLE = "gps_sessions_raw"
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+GRANULARITIES = ("season", "month")
+
+_BOUND_RE = re.compile(r"FROM \('([\d-]+)'\) TO \('([\d-]+)'\)")
+
+
+def season_start_month() -> int:
+    return int(getattr(settings, "RAW_PARTITION_SEASON_START_MONTH", 1))
+
+
+def period_start(day: date, granularity: str) -> date:
+    if granularity == "month":
+        return day.replace(day=1)
+    start_month = season_start_month()
+    year = day.year if day.month >= start_month else day.year - 1
+    return date(year, start_month, 1)
+
+
+def next_period(start: date, granularity: str) -> date:
+    if granularity == "month":
+        return date(start.year + (start.month // 12), start.month % 12 + 1, 1)
+    return date(start.year + 1, start.month, 1)
+
+
+def partition_name(start: date, granularity: str) -> str:
+    if granularity == "month":
+        return f"{PARENT_TABLE}_m{start:%Y%m}"
+    return f"{PARENT_TABLE}_s{start:%Y%m}"
+
+
+def is_partitioned(connection) -> bool:
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE relname = %s", [PARENT_TABLE])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == "p"
+
+
+def list_partitions(connection) -> list[tuple[str, date | None, date | None]]:
+    """Return (name, lower, upper) for each attached partition; the default partition has no bounds."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            ORDER BY child.relname
+            """,
+            [PARENT_TABLE],
+        )
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, bound in rows:
+        match = _BOUND_RE.search(bound or "")
+        if match:
+            lower, upper = (date.fromisoformat(value) for value in match.groups())
+            partitions.append((name, lower, upper))
+        else:
+            partitions.append((name, None, None))
+    return partitions
+
+
+def create_partition(cursor, start: date, end: date, name: str) -> int:
+    """Create and attach a partition for [start, end), moving matching rows out of the default partition.
+
+    Returns the number of rows moved from the default partition.
+    """
+    cursor.execute(f'CREATE TABLE "{name}" (LIKE "{PARENT_TABLE}" INCLUDING DEFAULTS)')
+    cursor.execute(
+        f"""
+        WITH moved AS (
+            DELETE FROM "{DEFAULT_PARTITION}"
+            WHERE date_ >= %s AND date_ < %s
+            RETURNING *
+        )
+        INSERT INTO "{name}" SELECT * FROM moved
+        """,
+        [start, end],
+    )
+    moved = cursor.rowcount
+    # 親には主キーがない (0003 を参照) ので、id の一意性はパーティションごとのインデックスで保つ
+    cursor.execute(f'CREATE UNIQUE INDEX "{name}_id_key" ON "{name}" (id)')
+    cursor.execute(
+        f'ALTER TABLE "{PARENT_TABLE}" ATTACH PARTITION "{name}" '
+        f"FOR VALUES FROM (%s) TO (%s)",
+        [start, end],
+    )
+    return moved
+
+
+def ensure_partitions(connection, first_day: date, last_day: date, granularity: str) -> list[str]:
+    """Create every missing partition between the periods containing first_day and last_day.
+
+    Periods already covered by an existing partition (e.g. a season partition when
+    switching to monthly granularity) are skipped.
+    """
+    ranges = [(lower, upper) for _, lower, upper in list_partitions(connection) if lower]
+    created = []
+    start = period_start(first_day, granularity)
+    with connection.cursor() as cursor:
+        while start <= last_day:
+            end = next_period(start, granularity)
+            if not any(lower < end and start < upper for lower, upper in ranges):
+                name = partition_name(start, granularity)
+                create_partition(cursor, start, end, name)
+                ranges.append((start, end))
+                created.append(name)
+            start = end
+    return created
+
+
+def detach_partition(connection, name: str, *, archive_schema: str | None = None, drop: bool = False) -> None:
+    """Detach a partition and archive or drop it, recording its range in DetachedRawPartition."""
+    from .models import DetachedRawPartition
+
+    bounds = {partition: (lower, upper) for partition, lower, upper in list_partitions(connection)}
+    lower, upper = bounds.get(name, (None, None))
+    if lower is None:
+        raise ValueError(f"{name} is not a ranged partition of {PARENT_TABLE}")
+    with connection.cursor() as cursor:
+        # 同じトランザクションで書いた行の遅延 FK チェックが残っていると DROP できない
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(f'ALTER TABLE "{PARENT_TABLE}" DETACH PARTITION "{name}"')
+        if drop:
+            cursor.execute(f'DROP TABLE "{name}"')
+        elif archive_schema:
+            cursor.execute(f'CREATE SCHEMA IF NOT EXISTS "{archive_schema}"')
+            cursor.execute(f'ALTER TABLE "{name}" SET SCHEMA "{archive_schema}"')
+    # rebuild_gps_daily(delete_existing=True) がこの期間の gps_daily を消さないように残す
+    DetachedRawPartition.objects.using(connection.alias).create(
+        name=name,
+        start=lower,
+        end=upper,
+        archive_schema="" if drop else (archive_schema or ""),
+        dropped=drop,
+    )
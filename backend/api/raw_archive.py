@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+from django.conf import settings
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def raw_archive_dir() -> Path:
+    data_root = getattr(settings, "TRAINING_DATA_DIR", settings.BASE_DIR / "data")
+    return Path(data_root) / "raw"
+
+
+def raw_archive_path(upload_id: int) -> Path:
+    return raw_archive_dir() / f"upload_{upload_id}.parquet"
+
+
+def write_raw_archive(df_raw: pd.DataFrame, upload_id: int) -> Path:
+    """Write one upload's raw rows as a Parquet file and return its path.
+
+    The caller is expected to pass rows already sorted by (athlete_id, date_)
+    so that each athlete-day is a contiguous row range.
+    """
+    path = raw_archive_path(upload_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".parquet.tmp")
+    df_raw.to_parquet(tmp_path, index=False)
+    tmp_path.replace(path)
+    return path
+
+
+def read_raw_archive(
+    upload_id: int,
+    *,
+    column_filter: Callable[[str], bool] | None = None,
+) -> pd.DataFrame:
+    """Read an upload's Parquet archive, loading only columns accepted by ``column_filter``."""
+    import pandas as pd
+    import pyarrow.parquet as pq
+
+    path = raw_archive_path(upload_id)
+    columns = None
+    if column_filter is not None:
+        columns = [name for name in pq.read_schema(path).names if column_filter(name)]
+    return pd.read_parquet(path, columns=columns)
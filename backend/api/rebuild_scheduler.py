@@ -0,0 +1,193 @@
+"""Debounced, coalesced rebuilds of workload features.
+
+Uploads mark their athletes dirty in ``feature_rebuild_queue`` (keeping the
+earliest affected date) instead of calling ``rebuild_workload_features``
+right away. A rebuild of every queued athlete runs once the queue has been
+quiet for ``FEATURE_REBUILD_QUIET_SECONDS``, once the oldest entry has waited
+``FEATURE_REBUILD_MAX_DELAY_SECONDS``, or as soon as
+``FEATURE_REBUILD_MAX_ATHLETES`` athletes are queued.
+
+The queue lives in the database, so it is shared by every server worker.
+Each process arms a timer after marking; ``manage.py run_feature_rebuilds``
+can be run as a dedicated worker instead. Entries are claimed with
+``SELECT ... FOR UPDATE SKIP LOCKED`` where supported, so a rebuild never
+runs twice for the same marks.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from typing import Mapping
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import FeatureRebuildQueue
+
+logger = logging.getLogger(__name__)
+
+_timer_lock = threading.Lock()
+_timer: threading.Timer | None = None
+
+
+def quiet_seconds() -> float:
+    return float(getattr(settings, "FEATURE_REBUILD_QUIET_SECONDS", 10))
+
+
+def max_delay_seconds() -> float:
+    return float(getattr(settings, "FEATURE_REBUILD_MAX_DELAY_SECONDS", 120))
+
+
+def max_athletes() -> int:
+    return int(getattr(settings, "FEATURE_REBUILD_MAX_ATHLETES", 200))
+
+
+def is_deferred() -> bool:
+    return getattr(settings, "FEATURE_REBUILD_MODE", "immediate") == "debounced"
+
+
+def mark_dirty(first_dates: Mapping[str, date | None]) -> None:
+    """Queue athletes for a rebuild, keeping the earliest date seen for each."""
+    if not first_dates:
+        return
+
+    now = timezone.now()
+    with transaction.atomic():
+        existing = {
+            entry.athlete_id: entry
+            for entry in FeatureRebuildQueue.objects.select_for_update().filter(
+                athlete_id__in=list(first_dates)
+            )
+        }
+        created, updated = [], []
+        for athlete_id, day in first_dates.items():
+            entry = existing.get(athlete_id)
+            if entry is None:
+                created.append(
+                    FeatureRebuildQueue(
+                        athlete_id=athlete_id,
+                        earliest_date=day,
+                        first_marked_at=now,
+                        last_marked_at=now,
+                    )
+                )
+                continue
+            # None (全期間) は常に最も古い扱い
+            if entry.earliest_date is not None and (day is None or day < entry.earliest_date):
+                entry.earliest_date = day
+            entry.last_marked_at = now
+            updated.append(entry)
+
+        # 同時に別ワーカーが作成した行とぶつかっても落ちないように ignore_conflicts
+        FeatureRebuildQueue.objects.bulk_create(created, ignore_conflicts=True)
+        FeatureRebuildQueue.objects.bulk_update(updated, ["earliest_date", "last_marked_at"])
+
+
+def _due_at(stats: dict) -> datetime | None:
+    if not stats["count"]:
+        return None
+    if stats["count"] >= max_athletes():
+        return timezone.now()
+    return min(
+        stats["last_marked"] + timedelta(seconds=quiet_seconds()),
+        stats["first_marked"] + timedelta(seconds=max_delay_seconds()),
+    )
+
+
+def _queue_stats() -> dict:
+    stats = FeatureRebuildQueue.objects.aggregate(
+        first_marked=Min("first_marked_at"),
+        last_marked=Max("last_marked_at"),
+        earliest_date=Min("earliest_date"),
+    )
+    stats["count"] = FeatureRebuildQueue.objects.count()
+    return stats
+
+
+def pending_status() -> dict:
+    """Status of the pending rebuild, as reported in upload responses."""
+    stats = _queue_stats()
+    due_at = _due_at(stats)
+    if due_at is None:
+        return {"status": "idle", "athletes": 0}
+    return {
+        "status": "pending",
+        "athletes": stats["count"],
+        "earliest_date": stats["earliest_date"],
+        "run_after": due_at,
+    }
+
+
+def _claim(force: bool) -> dict[str, date | None]:
+    with transaction.atomic():
+        due_at = _due_at(_queue_stats())
+        if due_at is None or (not force and due_at > timezone.now()):
+            return {}
+        qs = FeatureRebuildQueue.objects.select_for_update(
+            skip_locked=connection.features.has_select_for_update_skip_locked
+        )
+        claimed = {entry.athlete_id: entry.earliest_date for entry in qs}
+        FeatureRebuildQueue.objects.filter(athlete_id__in=list(claimed)).delete()
+    return claimed
+
+
+def run_due(*, force: bool = False) -> int:
+    """Run one coalesced rebuild if the queue is due (or ``force``); returns feature rows written."""
+    from .services import rebuild_workload_features
+
+    claimed = _claim(force)
+    if not claimed:
+        return 0
+
+    dates = list(claimed.values())
+    since = None if None in dates else min(dates)
+    try:
+        return rebuild_workload_features(athlete_ids=sorted(claimed), since=since)
+    except Exception:
+        # 失敗したら印を戻して次回に回す
+        mark_dirty(claimed)
+        raise
+
+
+def schedule() -> None:
+    """Arm (or re-arm) this process's timer for the next due time."""
+    global _timer
+
+    due_at = _due_at(_queue_stats())
+    if due_at is None:
+        return
+    delay = max((due_at - timezone.now()).total_seconds(), 0)
+    with _timer_lock:
+        if _timer is not None:
+            _timer.cancel()
+        _timer = threading.Timer(delay, _on_timer)
+        _timer.daemon = True
+        _timer.start()
+
+
+def _on_timer() -> None:
+    close_old_connections()
+    try:
+        rows = run_due()
+        if rows:
+            logger.info("coalesced feature rebuild wrote %s rows", rows)
+        schedule()
+    except Exception:
+        logger.exception("coalesced feature rebuild failed")
+    finally:
+        connection.close()
+
+
+def request_rebuild(first_dates: Mapping[str, date | None]) -> dict:
+    """Queue athletes after an upload and return the pending-rebuild status."""
+    mark_dirty(first_dates)
+    due_at = _due_at(_queue_stats())
+    if due_at is not None and due_at <= timezone.now():
+        # 件数の閾値を超えたらその場で実行する
+        rows = run_due()
+        return {"status": "completed", "athletes": len(first_dates), "rows": rows}
+    transaction.on_commit(schedule)
+    return pending_status()
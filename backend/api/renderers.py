@@ -0,0 +1,62 @@
+"""JSON renderer for the API, backed by orjson.
+
+``ORJSONRenderer`` replaces DRF's ``JSONRenderer`` and produces the same bytes
+for the same data: orjson encodes containers, strings and numbers (NumPy arrays
+and scalars included), while ``date`` / ``datetime`` / ``time`` and anything
+else orjson does not know (Decimal, timedelta, lazy strings, ...) go through
+DRF's encoder, so datetimes keep DRF's millisecond precision and ``Z`` suffix.
+U+2028 / U+2029 are escaped as DRF does, and indented responses (``; indent=``)
+are rendered by ``JSONRenderer`` itself.
+
+The one deliberate difference: NaN / Infinity become ``null``, where DRF (with
+``STRICT_JSON``) raises ``ValueError``. Workload metrics computed with pandas
+can be NaN, and a ``null`` there is better than a 500 for the whole response.
+Without orjson installed it behaves exactly like ``JSONRenderer``.
+"""
+from __future__ import annotations
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson は任意依存
+    orjson = None
+
+_fallback_encoder = JSONEncoder()
+
+
+# DRF と同じく JavaScript で改行扱いになる文字はエスケープする
+_LINE_SEPARATORS = ((b"\xe2\x80\xa8", b"\\u2028"), (b"\xe2\x80\xa9", b"\\u2029"))
+
+
+def _default(obj):
+    # numpy の bool_ や pandas の値など orjson が知らない型は DRF の変換に任せる
+    if hasattr(obj, "item") and callable(obj.item):
+        return obj.item()
+    # date / datetime / time も OPT_PASSTHROUGH_DATETIME でここに来る (ミリ秒に切り詰め、UTC は Z)
+    return _fallback_encoder.default(obj)
+
+
+def dumps(data) -> bytes:
+    """Encode ``data`` the way ``ORJSONRenderer`` does (compact)."""
+    if orjson is None:
+        return JSONRenderer().render(data)
+    option = (
+        orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    )
+    ret = orjson.dumps(data, default=_default, option=option)
+    for raw, escaped in _LINE_SEPARATORS:
+        if raw in ret:
+            ret = ret.replace(raw, escaped)
+    return ret
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        # インデント付きはデバッグ用なので、区切り文字や幅まで DRF に合わせるためそのまま任せる
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
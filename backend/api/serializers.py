@@ -4,21 +4,26 @@ from rest_framework import serializers
 class WorkloadIngestionRequestSerializer(serializers.Serializer):
     filename = serializers.CharField(required=False, allow_blank=False)
     file = serializers.FileField(required=False)
+    # 複数 CSV (同じキーで複数送る) または zip を file / files で受け付ける
+    files = serializers.ListField(child=serializers.FileField(), required=False, allow_empty=False)
     uploaded_by = serializers.CharField(required=False, allow_blank=True)
     allow_duplicate = serializers.BooleanField(required=False, default=False)
+    # /api/workload/events/ の "ingest" イベントに付くクライアント側の識別子
+    progress_id = serializers.CharField(required=False, allow_blank=True, max_length=64)
 
     def validate(self, attrs):
         filename = attrs.get('filename')
         uploaded_file = attrs.get('file')
+        uploaded_files = attrs.get('files')
 
-        if not filename and not uploaded_file:
+        if not filename and not uploaded_file and not uploaded_files:
             raise serializers.ValidationError(
-                'filename または file のいずれかを指定してください。'
+                'filename / file / files のいずれかを指定してください。'
             )
 
-        if filename and uploaded_file:
+        if sum(bool(value) for value in (filename, uploaded_file, uploaded_files)) > 1:
             raise serializers.ValidationError(
-                'filename と file を同時に指定することはできません。'
+                'filename / file / files は同時に指定できません。'
             )
 
         return attrs
@@ -1,25 +1,46 @@
 from __future__ import annotations
 
+import codecs
+import csv
 import hashlib
-from collections import defaultdict
-from dataclasses import dataclass
-from datetime import datetime
+import importlib.util
+import math
+import multiprocessing
+import re
+import threading
+import time
+from array import array
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime, timedelta
 from pathlib import Path
 from typing import Iterable
 
-import numpy as np
-import pandas as pd
+import django
 from django.conf import settings
-from django.db import transaction
-from django.db.models import Sum
-
+from django.db import connections, transaction
+from django.db.models import JSONField, Max, Min, Q, Sum
+from django.db.models.expressions import RawSQL
+from django.db.models.fields.json import KeyTextTransform
+
+from . import change_feed, live_events, rebuild_scheduler
+from .athlete_cache import athlete_positions, get_athlete_metadata
+from .lazy_imports import lazy_module
 from .models import (
     Athlete,
     DataUpload,
+    DetachedRawPartition,
     GpsDaily,
     GpsSessionRaw,
+    GpsSessionRawIndex,
     WorkloadFeaturesDaily,
 )
+from .raw_archive import raw_archive_path, read_raw_archive, write_raw_archive
+
+# pandas / numpy は取り込み・特徴量計算で初めて読み込む (manage.py や API の起動を軽くするため)
+np = lazy_module("numpy")
+pd = lazy_module("pandas")
 
 ACWR_ALPHA_ACUTE = 2 / (7 + 1)    # EWMA近似で7日急性
 ACWR_ALPHA_CHRONIC = 2 / (28 + 1)  # EWMA近似で28日慢性
@@ -30,6 +51,104 @@ EPS = 1e-6
 MIN_DIST_FOR_DECEL_DENSITY = 100  # meters
 MIN_DIST_FOR_MECH_EFF = 500       # meters
 
+CSV_ENCODINGS = ("utf-8", "cp932", "euc_jp", "latin-1")
+CSV_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+ENCODING_CHUNK_SIZE = 1024 * 16
+
+# uploaded_by -> 直近に成功したエンコーディング (プロセス内キャッシュ)
+_encoding_hints: dict[str, str] = {}
+
+ATHLETE_ID_COLUMNS = ["athlete_id", "AthleteID", "player_id"]
+ATHLETE_NAME_COLUMNS = ["athlete_name", "AthleteName", "player_name"]
+DATE_COLUMNS = ["date_", "date", "Date", "session_date"]
+SESSION_NAME_COLUMNS = ["session_name", "SessionName"]
+IDENTIFIER_CANONICALS = ("athlete_id", "athlete_name", "session_name", "date_")
+
+# gps_daily の upsert で上書きする列
+DAILY_UPDATE_FIELDS = [
+    "total_duration",
+    "total_distance",
+    "total_player_load",
+    "max_vel",
+    "mean_heart_rate",
+    "hsr_distance",
+    "high_decel_count",
+    "total_dive_count",
+    "avg_time_to_feet",
+    "total_jumps",
+    "metrics",
+    "revision",
+]
+
+# rebuild_workload_features の差し替え時に上書きする列
+FEATURE_UPDATE_FIELDS = [
+    "acwr_load",
+    "acwr_hsr",
+    "acwr_dive",
+    "efficiency_index",
+    "monotony_load",
+    "load_per_meter",
+    "risk_level",
+    "risk_reasons",
+    "params",
+    "revision",
+]
+
+# rebuild_gps_daily が raw_payload から合計する列
+RAW_SUM_COLUMNS = [
+    "total_duration",
+    "total_distance",
+    "total_player_load",
+    "total_jumps",
+    "max_vel",
+    "mean_heart_rate",
+    "velocity_band5_total_distance",
+    "velocity_band6_total_distance",
+    "high_decel_count",
+    "ima_band2_decel_count",
+    "ima_band3_decel_count",
+    "total_time_to_feet",
+    "dive_left_count",
+    "dive_right_count",
+    "dive_centre_count",
+]
+RAW_EXTRA_COLUMNS = ["Max Velocity", "Avg HR"]
+# rebuild_gps_daily が raw_payload から読むキー (日付キーは date_ 列が空の行で使う)
+RAW_REBUILD_KEYS = list(
+    dict.fromkeys(
+        [*RAW_SUM_COLUMNS, *RAW_EXTRA_COLUMNS, "total_time_to_feet", "date_", "date", "Date", "session_date"]
+    )
+)
+TIME_TO_FEET_PREFIX = "total_time_to_feet_"
+
+# スラッシュ区切りで年が最後のものは月が先 (以前の pd.to_datetime の既定と同じく 01/02/2024 は 1 月 2 日)
+DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%m/%d/%Y")
+
+# read_csv が既定で NaN とみなす文字列
+CSV_NA_VALUES = frozenset(
+    {"", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND",
+     "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"}
+)
+# read_csv (C パーサ) と float() が同じ値を返す数値表記: 指数表記なし・数字 15 桁まで
+PLAIN_NUMBER = re.compile(r"\s*[+-]?(?=\.?\d)(\d*)\.?(\d*)\s*")
+PLAIN_NUMBER_MAX_DIGITS = 15
+# pd.Timestamp で表せる年 (範囲外の日付は pandas 経路では読めずに捨てられる)
+TIMESTAMP_YEARS = (1678, 2261)
+
+# upload_id -> その upload でヒットした日付フォーマット (ヒット数の多い順)。最近使った順に上限件数まで
+_upload_date_formats: OrderedDict[int, tuple[str, ...]] = OrderedDict()
+_upload_date_formats_lock = threading.Lock()
+UPLOAD_DATE_FORMATS_MAX = 1024
+
+# ヘッダ行のハッシュ -> CsvSchemaPlan (プロセス内レジストリ)。最近使った順に上限件数まで
+_schema_plans: OrderedDict[str, "CsvSchemaPlan"] = OrderedDict()
+_schema_plans_lock = threading.Lock()
+SCHEMA_PLANS_MAX = 256
+
 
 class WorkloadIngestionError(Exception):
     """Raised when workload CSV ingestion fails."""
@@ -44,6 +163,11 @@ class WorkloadIngestionSummary:
     encoding: str
     duplicate_of: int | None = None
     skipped: bool = False
+    encoding_detect_ms: float | None = None
+    # athlete_id -> このファイルで最も古い日付 (再計算の起点)
+    first_dates: dict[str, date] = field(default_factory=dict)
+    # 特徴量の再計算の状態 (rebuild_scheduler.request_rebuild / 即時実行の結果)
+    feature_rebuild: dict | None = None
 
     def as_dict(self) -> dict:
         return {
@@ -52,11 +176,54 @@ class WorkloadIngestionSummary:
             "rows_imported": self.rows_imported,
             "athletes": self.athletes,
             "encoding": self.encoding,
+            "encoding_detect_ms": self.encoding_detect_ms,
             "duplicate_of": self.duplicate_of,
             "skipped": self.skipped,
+            "feature_rebuild": self.feature_rebuild,
         }
 
 
+@dataclass(frozen=True)
+class ColumnSpec:
+    source: str           # CSV ヘッダ上の列名 (strip 前)
+    name: str             # strip 後の列名
+    canonical: str        # athlete_id / athlete_name / date_ / session_name または name
+    dtype: str            # read_csv に渡す dtype
+    agg: str | None = None  # "sum" / "max" / "mean"
+
+
+@dataclass(frozen=True)
+class CsvSchemaPlan:
+    header_hash: str
+    columns: tuple[ColumnSpec, ...]
+    sum_cols: tuple[str, ...]
+    max_cols: tuple[str, ...]
+    mean_cols: tuple[str, ...]
+
+    def dtype_map(self, *, native: bool = False, float_dtype: str = "float64") -> dict[str, str]:
+        if not native:
+            return {spec.source: spec.dtype for spec in self.columns}
+
+        # native: 集計列は float、識別子・名前・日付は category、それ以外は型推論に任せる
+        dtypes = {}
+        for spec in self.columns:
+            if spec.agg:
+                dtypes[spec.source] = float_dtype
+            elif spec.canonical in IDENTIFIER_CANONICALS:
+                dtypes[spec.source] = "category"
+        return dtypes
+
+    def column_for(self, canonical: str) -> str | None:
+        for spec in self.columns:
+            if spec.canonical == canonical:
+                return spec.name
+        return None
+
+    @property
+    def numeric_cols(self) -> list[str]:
+        return [spec.name for spec in self.columns if spec.agg]
+
+
 def _resolve_csv_path(filename: str | Path) -> Path:
     csv_path = Path(filename)
     if csv_path.is_absolute():
@@ -73,7 +240,7 @@ def parse_date(value):
     if not value:
         return None
 
-    for fmt in ("%Y-%m-%d", "%Y/%m/%d", "%d/%m/%Y"):
+    for fmt in DATE_FORMATS:
         try:
             return datetime.strptime(value, fmt).date()
         except ValueError:
@@ -86,6 +253,68 @@ def parse_date_any(value):
     return parse_date(value)
 
 
+def parse_date_series(
+    values: Iterable,
+    *,
+    formats: Iterable[str] | None = None,
+    fallback: bool = False,
+) -> tuple[pd.Series, tuple[str, ...]]:
+    """Parse many date strings at once with the same formats as parse_date.
+
+    Each format is one vectorized pass over the values not matched yet, so
+    passing the formats seen last time first (see ``parse_upload_dates``)
+    usually finishes in a single pass. With ``fallback`` the leftovers are
+    handed to pandas' per-element parser (e.g. values with a time part).
+    Returns the parsed timestamps (NaT when unparseable) and the formats that
+    matched, most frequent first.
+    """
+    text = pd.Series(list(values), dtype=object)
+    text = text.where(text.notna(), "").astype(str).str.strip()
+    result = pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+    pending = text != ""
+
+    ordered = list(dict.fromkeys([*(formats or ()), *DATE_FORMATS]))
+    hits = {}
+    for fmt in ordered:
+        if not pending.any():
+            break
+        parsed = pd.to_datetime(text[pending], format=fmt, errors="coerce")
+        matched = parsed[parsed.notna()]
+        if matched.empty:
+            continue
+        result.loc[matched.index] = matched
+        pending.loc[matched.index] = False
+        hits[fmt] = len(matched)
+
+    if fallback and pending.any():
+        parsed = pd.to_datetime(text[pending], format="mixed", errors="coerce")
+        matched = parsed[parsed.notna()]
+        result.loc[matched.index] = matched
+
+    return result, tuple(sorted(hits, key=hits.get, reverse=True))
+
+
+def parse_upload_dates(upload_id: int | None, values: Iterable) -> list:
+    """parse_date_series for one upload's values, remembering which formats that upload uses."""
+    parsed, matched = parse_date_series(values, formats=_upload_date_formats.get(upload_id))
+    if upload_id is not None and matched:
+        with _upload_date_formats_lock:
+            _upload_date_formats[upload_id] = matched
+            _upload_date_formats.move_to_end(upload_id)
+            while len(_upload_date_formats) > UPLOAD_DATE_FORMATS_MAX:
+                _upload_date_formats.popitem(last=False)
+    return [None if pd.isna(ts) else ts.date() for ts in parsed]
+
+
+def _raw_date_value(payload: dict):
+    return (
+        payload.get("date_")
+        or payload.get("date")
+        or payload.get("Date")
+        or payload.get("session_date")
+    )
+
+
 def to_float(value):
     if value is None:
         return 0.0
@@ -93,53 +322,104 @@ def to_float(value):
         val = float(value)
     except (TypeError, ValueError):
         return 0.0
-    if np.isnan(val):
+    if math.isnan(val):
         return 0.0
     return val
 
 
-def detect_csv_encoding(csv_path: Path, sample_size: int = 1024 * 256) -> str:
+def _sniff_bom(head: bytes) -> str | None:
+    for bom, enc in CSV_BOMS:
+        if head.startswith(bom):
+            return enc
+    return None
+
+
+def _decodes_cleanly(handle, encoding: str, sample_size: int) -> bool:
+    # 先頭からチャンク単位でインクリメンタルにデコードし、不正バイトが出た時点で打ち切る。
+    # サンプル末尾で途切れたマルチバイト文字は失敗扱いにしない (final=False)。
+    handle.seek(0)
+    decoder = codecs.getincrementaldecoder(encoding)(errors="strict")
+    remaining = sample_size
+    try:
+        while remaining > 0:
+            chunk = handle.read(min(ENCODING_CHUNK_SIZE, remaining))
+            if not chunk:
+                decoder.decode(b"", final=True)
+                break
+            decoder.decode(chunk)
+            remaining -= len(chunk)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def detect_csv_encoding(
+    csv_path: Path,
+    sample_size: int = 1024 * 256,
+    *,
+    hint: str | None = None,
+) -> str:
     with csv_path.open("rb") as handle:
-        sample = handle.read(sample_size)
-
-    encodings = [
-        "utf-8-sig",
-        "utf-8",
-        "cp932",
-        "shift_jis",
-        "euc_jp",
-        "latin-1",
-    ]
+        return detect_stream_encoding(handle, sample_size, hint=hint)
 
-    last_error = None
 
-    for enc in encodings:
-        try:
-            sample.decode(enc, errors="strict")
+def detect_stream_encoding(
+    handle,
+    sample_size: int = 1024 * 256,
+    *,
+    hint: str | None = None,
+) -> str:
+    """detect_csv_encoding for an already open, seekable binary file object."""
+    handle.seek(0)
+    bom_encoding = _sniff_bom(handle.read(4))
+    if bom_encoding:
+        return bom_encoding
+
+    # UTF-8 は不正バイトで即座に失敗するので常に先頭。ヒントはその次に試す。
+    # latin-1 は何でもデコードできてしまうためヒントとしては採用しない。
+    candidates = list(CSV_ENCODINGS)
+    if hint and hint in candidates[1:-1]:
+        candidates.remove(hint)
+        candidates.insert(1, hint)
+
+    for enc in candidates:
+        if _decodes_cleanly(handle, enc, sample_size):
             return enc
-        except Exception as exc:
-            last_error = exc
-            continue
 
     raise WorkloadIngestionError(
-        f"Failed to detect CSV encoding. last_error={last_error}"
+        f"Failed to detect CSV encoding. tried={candidates}"
     )
 
 
-def _resolve_column(df: pd.DataFrame, candidates: list[str]) -> str | None:
+def _resolve_column(columns: Iterable[str], candidates: list[str]) -> str | None:
     for col in candidates:
-        if col in df.columns:
+        if col in columns:
             return col
     return None
 
 
-def _coerce_numeric(df: pd.DataFrame, columns: Iterable[str]) -> None:
-    for col in columns:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
+def _coerce_numeric(df: pd.DataFrame, dtypes: dict[str, str]) -> pd.DataFrame:
+    """Cast the aggregation columns (name -> dtype) read with inferred types.
+
+    Columns with cells that are not numbers ("-" etc.) come back as strings;
+    only their string cells are converted, anything else becomes NaN, as when
+    the whole file was read as text.
+    """
+    converted = {}
+    for col, dtype in dtypes.items():
+        if col not in df.columns:
+            continue
+        values = df[col]
+        if values.dtype.kind not in "iuf":
+            values = pd.to_numeric(values.where(values.map(lambda value: isinstance(value, str))), errors="coerce")
+            converted[col] = values.astype(dtype)
+        elif values.dtype != dtype:
+            converted[col] = values.astype(dtype)
+    return df.assign(**converted) if converted else df
 
 
-def _collect_sum_columns(df: pd.DataFrame) -> list[str]:
+def _collect_sum_columns(columns: Iterable[str]) -> list[str]:
+    columns = list(columns)
     base_cols = [
         "total_duration",
         "total_distance",
@@ -159,62 +439,160 @@ def _collect_sum_columns(df: pd.DataFrame) -> list[str]:
     ]
     velocity_cols = [f"velocity_band{i}_total_distance" for i in range(1, 7)]
     dynamic_cols = []
-    for col in df.columns:
+    for col in columns:
         if col.startswith("ima_band2_") or col.startswith("ima_band3_"):
             dynamic_cols.append(col)
         elif col.startswith("total_time_to_feet_"):
             dynamic_cols.append(col)
 
+    present = set(columns)
     cols = []
     seen = set()
     for col in base_cols + velocity_cols + dynamic_cols:
-        if col in df.columns and col not in seen:
+        if col in present and col not in seen:
             cols.append(col)
             seen.add(col)
     return cols
 
 
-def _collect_aggregation_columns(df: pd.DataFrame) -> tuple[list[str], list[str], list[str]]:
-    sum_cols = _collect_sum_columns(df)
+def _collect_aggregation_columns(columns: Iterable[str]) -> tuple[list[str], list[str], list[str]]:
+    columns = list(columns)
+    sum_cols = _collect_sum_columns(columns)
     
     # max_cols に max_vel が入っているか確認
-    max_cols = [col for col in ["max_vel", "Max Velocity"] if col in df.columns]
+    max_cols = [col for col in ["max_vel", "Max Velocity"] if col in columns]
     
     # mean_cols に mean_heart_rate が入っているか確認
-    mean_cols = [col for col in ["mean_heart_rate", "Avg HR"] if col in df.columns]
+    mean_cols = [col for col in ["mean_heart_rate", "Avg HR"] if col in columns]
     
     return sum_cols, max_cols, mean_cols
 
 
-def load_statsallgroup_dataframe(csv_path: Path) -> tuple[pd.DataFrame, str, list[str], list[str], list[str]]:
-    encoding = detect_csv_encoding(csv_path)
-    df = pd.read_csv(csv_path, encoding=encoding, dtype=str)
-    df.columns = [str(col).strip() for col in df.columns]
+def _header_hash(header: list[str]) -> str:
+    return hashlib.sha256("\x1f".join(header).encode("utf-8")).hexdigest()
 
-    athlete_id_col = _resolve_column(df, ["athlete_id", "AthleteID", "player_id"])
-    if not athlete_id_col:
-        raise WorkloadIngestionError("Missing athlete_id column.")
-    df["athlete_id"] = df[athlete_id_col].astype(str).str.strip().replace({"nan": ""})
 
-    athlete_name_col = _resolve_column(df, ["athlete_name", "AthleteName", "player_name"])
-    if athlete_name_col:
-        df["athlete_name"] = df[athlete_name_col].astype(str).str.strip().replace({"nan": ""})
-    else:
-        df["athlete_name"] = ""
+def _discover_schema_plan(header: list[str], header_hash: str) -> CsvSchemaPlan:
+    names = [col.strip() for col in header]
 
-    date_col = _resolve_column(df, ["date_", "date", "Date", "session_date"])
+    athlete_id_col = _resolve_column(names, ATHLETE_ID_COLUMNS)
+    if not athlete_id_col:
+        raise WorkloadIngestionError("Missing athlete_id column.")
+    date_col = _resolve_column(names, DATE_COLUMNS)
     if not date_col:
         raise WorkloadIngestionError("Missing date column.")
-    df["date_"] = pd.to_datetime(df[date_col], errors="coerce").dt.normalize()
+    canonical_map = {
+        athlete_id_col: "athlete_id",
+        date_col: "date_",
+    }
+    athlete_name_col = _resolve_column(names, ATHLETE_NAME_COLUMNS)
+    if athlete_name_col:
+        canonical_map[athlete_name_col] = "athlete_name"
+    session_name_col = _resolve_column(names, SESSION_NAME_COLUMNS)
+    if session_name_col:
+        canonical_map[session_name_col] = "session_name"
+
+    sum_cols, max_cols, mean_cols = _collect_aggregation_columns(names)
+    agg_map = {col: "sum" for col in sum_cols}
+    agg_map.update({col: "max" for col in max_cols})
+    agg_map.update({col: "mean" for col in mean_cols})
+
+    specs = tuple(
+        ColumnSpec(
+            source=source,
+            name=name,
+            canonical=canonical_map.get(name, name),
+            dtype="float64" if name in agg_map else "str",
+            agg=agg_map.get(name),
+        )
+        for source, name in zip(header, names)
+    )
+    return CsvSchemaPlan(
+        header_hash=header_hash,
+        columns=specs,
+        sum_cols=tuple(sum_cols),
+        max_cols=tuple(max_cols),
+        mean_cols=tuple(mean_cols),
+    )
+
+
+def get_schema_plan(header: list[str]) -> CsvSchemaPlan:
+    """Return the column plan for a CSV header, discovering and registering it on first sight."""
+    header_hash = _header_hash(header)
+    with _schema_plans_lock:
+        plan = _schema_plans.get(header_hash)
+        if plan is not None:
+            _schema_plans.move_to_end(header_hash)
+            return plan
+    # 判定はロックの外で行う (同じヘッダを同時に判定しても結果は同じなので後勝ちでよい)
+    plan = _discover_schema_plan(header, header_hash)
+    with _schema_plans_lock:
+        _schema_plans[header_hash] = plan
+        while len(_schema_plans) > SCHEMA_PLANS_MAX:
+            _schema_plans.popitem(last=False)
+    return plan
+
+
+def _csv_engine(engine: str) -> str:
+    if engine == "auto":
+        return "pyarrow" if importlib.util.find_spec("pyarrow") else "c"
+    return engine
+
+
+def load_statsallgroup_dataframe(
+    csv_path: Path,
+    *,
+    encoding: str | None = None,
+    native_dtypes: bool | None = None,
+    float_dtype: str | None = None,
+    engine: str | None = None,
+) -> tuple[pd.DataFrame, str, list[str], list[str], list[str]]:
+    if encoding is None:
+        encoding = detect_csv_encoding(csv_path)
+    if native_dtypes is None:
+        native_dtypes = getattr(settings, "WORKLOAD_CSV_NATIVE_DTYPES", False)
+    if float_dtype is None:
+        float_dtype = getattr(settings, "WORKLOAD_CSV_FLOAT_DTYPE", "float64")
+    if engine is None:
+        engine = getattr(settings, "WORKLOAD_CSV_ENGINE", "auto")
+    # pyarrow エンジンは dtype=str の空セルを "None" 文字列にしてしまうので native モード専用
+    engine = _csv_engine(engine) if native_dtypes else "c"
+
+    with csv_path.open(encoding=encoding, newline="") as handle:
+        # ヘッダも本体も同じ (デコード済みの) ストリームから読む
+        header = [str(col) for col in pd.read_csv(handle, nrows=0).columns]
+        plan = get_schema_plan(header)
+        handle.seek(0)
+
+        # 集計列は型推論で 1 回だけ読み、"-" などの数値化できないセルがある列だけ後で変換する
+        dtypes = plan.dtype_map(native=native_dtypes, float_dtype=float_dtype)
+        numeric_dtypes = {spec.name: dtypes[spec.source] for spec in plan.columns if spec.agg}
+        df = pd.read_csv(
+            handle,
+            dtype={spec.source: dtypes[spec.source] for spec in plan.columns if not spec.agg and spec.source in dtypes},
+            engine=engine,
+        )
+    df.columns = [str(col).strip() for col in df.columns]
+    df = _coerce_numeric(df, numeric_dtypes)
+
+    # pyarrow エンジンの結果は列ごとにブロックが分かれているので、派生列は assign でまとめて追加する
+    athlete_id_col = plan.column_for("athlete_id")
+    athlete_name_col = plan.column_for("athlete_name")
+    date_col = plan.column_for("date_")
+    df = df.assign(
+        athlete_id=df[athlete_id_col].astype(str).str.strip().replace({"nan": ""}),
+        athlete_name=(
+            df[athlete_name_col].astype(str).str.strip().replace({"nan": ""})
+            if athlete_name_col
+            else ""
+        ),
+        date_=parse_date_series(df[date_col], fallback=True)[0].set_axis(df.index).dt.normalize(),
+    )
 
     df = df[df["athlete_id"] != ""]
     df = df[df["date_"].notna()]
 
-    sum_cols, max_cols, mean_cols = _collect_aggregation_columns(df)
-    numeric_cols = set(sum_cols + max_cols + mean_cols)
-    _coerce_numeric(df, numeric_cols)
-
-    return df, encoding, sum_cols, max_cols, mean_cols
+    return df, encoding, list(plan.sum_cols), list(plan.max_cols), list(plan.mean_cols)
 
 
 def aggregate_daily(
@@ -240,19 +618,36 @@ def aggregate_daily(
     return agg_df.merge(name_df, on=group_cols, how="left")
 
 
-def zero_pad_daily(df_daily: pd.DataFrame, sum_cols: list[str]) -> pd.DataFrame:
+def zero_pad_daily(
+    df_daily: pd.DataFrame,
+    sum_cols: list[str],
+    pad_days: set[tuple[str, date]] | None = None,
+) -> pd.DataFrame:
+    """Fill athlete-days without records with zero sums (max / mean columns stay missing).
+
+    Without ``pad_days`` every athlete gets every date between the frame's first
+    and last date; ``pad_days`` (see batch_days) limits the fill to those pairs.
+    """
     if df_daily.empty:
         return df_daily
 
-    min_date = df_daily["date_"].min()
-    max_date = df_daily["date_"].max()
-    all_dates = pd.DataFrame({"date_": pd.date_range(min_date, max_date, freq="D")})
     athletes = (
         df_daily.groupby("athlete_id", as_index=False)["athlete_name"]
         .agg(_first_non_empty)
     )
-
-    base = all_dates.assign(key=1).merge(athletes.assign(key=1), on="key").drop("key", axis=1)
+    if pad_days is None:
+        min_date = df_daily["date_"].min()
+        max_date = df_daily["date_"].max()
+        all_dates = pd.DataFrame({"date_": pd.date_range(min_date, max_date, freq="D")})
+        base = all_dates.assign(key=1).merge(athletes.assign(key=1), on="key").drop("key", axis=1)
+    else:
+        keys = sorted(pad_days, key=lambda key: (key[1], key[0]))
+        base = pd.DataFrame(
+            {
+                "date_": pd.to_datetime([day for _, day in keys]).astype(df_daily["date_"].dtype),
+                "athlete_id": [athlete_id for athlete_id, _ in keys],
+            }
+        ).merge(athletes, on="athlete_id", how="left")
     daily_payload = df_daily.drop(columns=["athlete_name"], errors="ignore")
     merged = base.merge(
         daily_payload,
@@ -281,38 +676,57 @@ def determine_positions(
 
     total_dives = df_daily[dive_cols].sum(axis=1)
     athlete_ids = df_daily["athlete_id"].dropna().unique().tolist()
-    existing_positions = {
-        athlete.athlete_id: (athlete.position if athlete.position in ("GK", "FP") else "FP")
-        for athlete in Athlete.objects.filter(athlete_id__in=athlete_ids)
-    }
+    by_athlete = total_dives.groupby(df_daily["athlete_id"])
+    positions = _decide_positions(
+        athlete_ids,
+        totals=by_athlete.sum(),
+        daily_max=by_athlete.max(),
+        dive_threshold=dive_threshold,
+        daily_dive_threshold=daily_dive_threshold,
+    )
+
+    df_daily["position"] = df_daily["athlete_id"].map(positions).fillna("FP")
+    return df_daily, positions
+
+
+def _decide_positions(
+    athlete_ids: list[str],
+    *,
+    totals,
+    daily_max,
+    dive_threshold: float,
+    daily_dive_threshold: float,
+) -> dict[str, str]:
+    # totals / daily_max: athlete_id -> 期間中のダイブ合計 / 1 日の最大ダイブ数 (Series でも dict でもよい)
+    existing_positions = athlete_positions(athlete_ids)
 
     positions: dict[str, str] = {}
-    if not Athlete.objects.exists():
-        totals = total_dives.groupby(df_daily["athlete_id"]).sum()
+    if not get_athlete_metadata():
         positions = {
             athlete_id: ("GK" if total >= dive_threshold else "FP")
             for athlete_id, total in totals.items()
         }
     else:
         positions.update(existing_positions)
-        daily_max = total_dives.groupby(df_daily["athlete_id"]).max()
         for athlete_id in athlete_ids:
             if athlete_id in positions:
                 continue
             day_total = daily_max.get(athlete_id, 0)
             positions[athlete_id] = "GK" if day_total > daily_dive_threshold else "FP"
-
-    df_daily["position"] = df_daily["athlete_id"].map(positions).fillna("FP")
-    return df_daily, positions
+    return positions
 
 
 def _safe_json_value(value):
-    if value is None:
-        return None
-    if isinstance(value, (pd.Timestamp, datetime)):
+    if value is None or isinstance(value, str):
+        return value
+    # pd.Timestamp も datetime のサブクラス。pyarrow エンジンは日付列を date で返す
+    if isinstance(value, (datetime, date)):
         return value.isoformat()
-    if isinstance(value, float) and np.isnan(value):
+    if isinstance(value, float) and math.isnan(value):
         return None
+    # 組み込み型なら numpy を読み込まずに返す (小さいファイルの取り込み経路は pandas を使わない)
+    if type(value) in (float, int, bool):
+        return value
     if isinstance(value, (np.integer, np.floating)):
         return value.item()
     return value
@@ -328,21 +742,45 @@ def _first_non_empty(values) -> str:
     return ""
 
 
+@dataclass
+class RawRowStats:
+    """What one upload stored as raw rows; recorded on its DataUpload for the upload history."""
+
+    rows: int = 0
+    athletes: set[str] = field(default_factory=set)
+    first_date: date | None = None
+    last_date: date | None = None
+
+    def add_date(self, day: date | None) -> None:
+        if day is None:
+            return
+        if self.first_date is None or day < self.first_date:
+            self.first_date = day
+        if self.last_date is None or day > self.last_date:
+            self.last_date = day
+
+    def upload_fields(self) -> dict:
+        return {
+            "row_count": self.rows,
+            "athlete_count": len(self.athletes),
+            "first_date": self.first_date,
+            "last_date": self.last_date,
+        }
+
+
 def _ingest_raw_rows(
-    df_raw: pd.DataFrame,
+    columns: list[str],
+    rows: Iterable[tuple],
     *,
     upload: DataUpload,
     athlete_map: dict[str, Athlete],
-) -> int:
-    if df_raw.empty:
-        return 0
-
-    session_name_col = _resolve_column(df_raw, ["session_name", "SessionName"])
-    columns = list(df_raw.columns)
-    total = 0
+) -> RawRowStats:
+    # rows: ParsedCsv.iter_raw_rows() (DataFrame の行でも csv から作った行タプルでもよい)
+    session_name_col = _resolve_column(columns, SESSION_NAME_COLUMNS)
+    stats = RawRowStats()
     batch = []
 
-    for i, values in enumerate(df_raw.itertuples(index=False, name=None), start=1):
+    for i, values in enumerate(rows, start=1):
         row = dict(zip(columns, values))
         athlete_id = str(row.get("athlete_id", "")).strip()
         if not athlete_id:
@@ -352,8 +790,10 @@ def _ingest_raw_rows(
             continue
 
         date_value = row.get("date_")
-        if isinstance(date_value, pd.Timestamp):
+        if isinstance(date_value, datetime):
             date_value = date_value.date()
+        stats.athletes.add(athlete_id)
+        stats.add_date(date_value)
 
         session_name = ""
         if session_name_col:
@@ -376,34 +816,97 @@ def _ingest_raw_rows(
 
         if len(batch) >= 1000:
             GpsSessionRaw.objects.bulk_create(batch, batch_size=1000)
-            total += len(batch)
+            stats.rows += len(batch)
             batch = []
 
     if batch:
         GpsSessionRaw.objects.bulk_create(batch, batch_size=1000)
-        total += len(batch)
+        stats.rows += len(batch)
 
-    return total
+    return stats
+
+
+def _archive_raw_rows(
+    df_raw: pd.DataFrame,
+    *,
+    upload: DataUpload,
+    athlete_map: dict[str, Athlete],
+) -> RawRowStats:
+    if importlib.util.find_spec("pyarrow") is None:
+        raise WorkloadIngestionError("pyarrow is required for RAW_STORAGE_BACKEND=parquet.")
+    if df_raw.empty:
+        return RawRowStats()
+
+    # row_number は _ingest_raw_rows と同じく読み込み順の 1 始まり
+    df_archive = df_raw.assign(row_number=range(1, len(df_raw) + 1))
+    df_archive = df_archive[df_archive["athlete_id"].isin(list(athlete_map))]
+    df_archive = df_archive.sort_values(["athlete_id", "date_"], kind="stable").reset_index(drop=True)
+    if df_archive.empty:
+        return RawRowStats()
+
+    write_raw_archive(df_archive, upload.id)
+
+    index_rows = []
+    for (athlete_id, date_value), positions in df_archive.groupby(
+        ["athlete_id", "date_"], sort=False
+    ).indices.items():
+        index_rows.append(
+            GpsSessionRawIndex(
+                upload=upload,
+                athlete=athlete_map[athlete_id],
+                date=pd.Timestamp(date_value).date(),
+                row_start=int(positions.min()),
+                row_end=int(positions.max()) + 1,
+            )
+        )
+    GpsSessionRawIndex.objects.bulk_create(index_rows, batch_size=2000)
+    stats = RawRowStats(rows=len(df_archive), athletes={row.athlete_id for row in index_rows})
+    for row in index_rows:
+        stats.add_date(row.date)
+    return stats
 
 
 def _ingest_daily_rows(
-    df_daily: pd.DataFrame,
+    columns: list[str],
+    rows: list[tuple],
     *,
     athlete_map: dict[str, Athlete],
     sum_cols: list[str],
     max_cols: list[str],
     mean_cols: list[str],
+    padded_days: set[tuple[str, date]] = frozenset(),
 ) -> int:
-    if df_daily.empty:
+    """Upsert daily rows; the zero-padded ``padded_days`` only fill days that have no row yet.
+
+    This holds for single-file uploads too: a padded day that already has a row
+    (from another upload) keeps it, because that row comes from raw rows that are
+    still stored and ``rebuild_gps_daily`` would bring it back anyway.
+    """
+    if not rows:
         return 0
 
-    metric_cols = [col for col in sum_cols + max_cols + mean_cols if col in df_daily.columns]
-    columns = list(df_daily.columns)
+    # 呼び出し側のトランザクション内でリビジョンを取る (コミットまで採番行をロック)
+    revision = change_feed.next_revision()
+    metric_cols = [col for col in sum_cols + max_cols + mean_cols if col in columns]
     time_to_feet_cols = [col for col in columns if col.startswith("total_time_to_feet_")]
     total = 0
     batch = []
+    padded_batch = []
 
-    for values in df_daily.itertuples(index=False, name=None):
+    def flush(objects: list[GpsDaily], padded: bool) -> None:
+        if padded:
+            # 記録のない日の 0 埋めで、既に取り込んだ日 (別のアップロード分) を上書きしない
+            GpsDaily.objects.bulk_create(objects, batch_size=2000, ignore_conflicts=True)
+        else:
+            GpsDaily.objects.bulk_create(
+                objects,
+                batch_size=2000,
+                update_conflicts=True,
+                update_fields=DAILY_UPDATE_FIELDS,
+                unique_fields=["athlete", "date"],
+            )
+
+    for values in rows:
         row = dict(zip(columns, values))
         athlete_id = str(row.get("athlete_id", "")).strip()
         athlete = athlete_map.get(athlete_id)
@@ -411,7 +914,7 @@ def _ingest_daily_rows(
             continue
 
         date_value = row.get("date_")
-        if isinstance(date_value, pd.Timestamp):
+        if isinstance(date_value, datetime):
             date_value = date_value.date()
 
         total_duration = to_float(row.get("total_duration"))
@@ -460,7 +963,9 @@ def _ingest_daily_rows(
 
         metrics = {col: _safe_json_value(row.get(col)) for col in metric_cols}
 
-        batch.append(
+        padded = (athlete_id, date_value) in padded_days
+        target = padded_batch if padded else batch
+        target.append(
             GpsDaily(
                 athlete=athlete,
                 date=date_value,
@@ -475,156 +980,762 @@ def _ingest_daily_rows(
                 avg_time_to_feet=avg_time_to_feet,
                 total_jumps=total_jumps,
                 metrics=metrics,
+                revision=revision,
             )
         )
 
-        if len(batch) >= 2000:
-            GpsDaily.objects.bulk_create(
-                batch,
-                batch_size=2000,
-                update_conflicts=True,
-                update_fields=[
-                    "total_duration",
-                    "total_distance",
-                    "total_player_load",
-                    "max_vel",
-                    "mean_heart_rate",
-                    "hsr_distance",
-                    "high_decel_count",
-                    "total_dive_count",
-                    "avg_time_to_feet",
-                    "total_jumps",
-                    "metrics",
-                ],
-                unique_fields=["athlete", "date"],
-            )
-            total += len(batch)
-            batch = []
+        if len(target) >= 2000:
+            flush(target, padded)
+            total += len(target)
+            target.clear()
 
-    if batch:
-        GpsDaily.objects.bulk_create(
-            batch,
-            batch_size=2000,
-            update_conflicts=True,
-            update_fields=[
-                "total_duration",
-                "total_distance",
-                "total_player_load",
-                "max_vel",
-                "mean_heart_rate",
-                "hsr_distance",
-                "high_decel_count",
-                "total_dive_count",
-                "avg_time_to_feet",
-                "total_jumps",
-                "metrics",
-            ],
-            unique_fields=["athlete", "date"],
-        )
-        total += len(batch)
+    for objects, padded in ((batch, False), (padded_batch, True)):
+        if objects:
+            flush(objects, padded)
+            total += len(objects)
 
     return total
 
 
-def import_statsallgroup_csv(
-    filename: str | Path,
-    *,
-    uploaded_by: str = "",
-    source_filename: str | None = None,
-    allow_duplicate: bool = False,
-) -> WorkloadIngestionSummary:
-    csv_path = _resolve_csv_path(filename)
-    display_filename = Path(source_filename).name if source_filename else csv_path.name
-
-    if not csv_path.exists():
-        raise WorkloadIngestionError(f"CSV not found: {csv_path}")
-
-    file_hash = hashlib.sha256(csv_path.read_bytes()).hexdigest()
-    if not allow_duplicate:
-        existing = (
-            DataUpload.objects.filter(file_hash=file_hash, parse_status="success")
-            .order_by("-id")
-            .first()
-        )
-        if existing:
-            return WorkloadIngestionSummary(
-                upload_id=existing.id,
-                file_path=str(csv_path),
-                rows_imported=0,
-                athletes=[],
-                encoding="skipped",
-                duplicate_of=existing.id,
-                skipped=True,
-            )
+@dataclass
+class ParsedCsv:
+    csv_path: Path
+    df_raw: pd.DataFrame | None
+    encoding: str
+    encoding_detect_ms: float
+    sum_cols: list[str]
+    max_cols: list[str]
+    mean_cols: list[str]
+    # parse_small_statsallgroup_csv は DataFrame の代わりに df_raw と同じ列・値の行タプルを持つ
+    columns: list[str] = field(default_factory=list)
+    rows: list[tuple] | None = None
+    # エンコーディング判定を含む読み込み全体の時間
+    parse_ms: float = 0.0
+
+    @property
+    def row_count(self) -> int:
+        return len(self.rows) if self.rows is not None else len(self.df_raw)
+
+    def raw_columns(self) -> list[str]:
+        return self.columns if self.rows is not None else list(self.df_raw.columns)
+
+    def iter_raw_rows(self) -> Iterable[tuple]:
+        if self.rows is not None:
+            return self.rows
+        return self.df_raw.itertuples(index=False, name=None)
+
+    def day_keys(self) -> set[tuple[str, date]]:
+        """(athlete_id, date) pairs with at least one row in this file."""
+        if self.rows is None:
+            return {
+                (str(athlete_id), day.date())
+                for athlete_id, day in zip(self.df_raw["athlete_id"], self.df_raw["date_"])
+            }
+        id_index = self.columns.index("athlete_id")
+        date_index = self.columns.index("date_")
+        return {(row[id_index], row[date_index].date()) for row in self.rows}
+
+    def with_rows(self) -> "ParsedCsv":
+        """This file with ``rows`` taken from ``df_raw`` (NaN as None), for aggregate_small_daily."""
+        if self.rows is not None:
+            return self
+        rows = [
+            tuple(None if value != value else value for value in row)
+            for row in self.df_raw.itertuples(index=False, name=None)
+        ]
+        return replace(self, df_raw=None, columns=list(self.df_raw.columns), rows=rows)
+
+    def athlete_ids(self) -> set[str]:
+        if self.rows is None:
+            return {str(athlete_id) for athlete_id in self.df_raw["athlete_id"].unique()}
+        id_index = self.columns.index("athlete_id")
+        return {row[id_index] for row in self.rows}
+
+
+def _csv_load_options() -> dict:
+    # ワーカープロセスで settings を読まずに済むよう、親プロセスで解決して渡す
+    return {
+        "native_dtypes": getattr(settings, "WORKLOAD_CSV_NATIVE_DTYPES", False),
+        "float_dtype": getattr(settings, "WORKLOAD_CSV_FLOAT_DTYPE", "float64"),
+        "engine": getattr(settings, "WORKLOAD_CSV_ENGINE", "auto"),
+    }
+
 
-    upload = DataUpload.objects.create(
-        source_filename=display_filename,
-        file_hash=file_hash,
-        uploaded_by=uploaded_by or "",
-        parse_status="pending",
+def parse_statsallgroup_csv(
+    csv_path: Path,
+    *,
+    encoding_hint: str | None = None,
+    native_dtypes: bool | None = None,
+    float_dtype: str | None = None,
+    engine: str | None = None,
+) -> ParsedCsv:
+    """Detect the encoding and load one CSV. Touches no database, so it can run in a worker process."""
+    started = time.perf_counter()
+    encoding = detect_csv_encoding(csv_path, hint=encoding_hint)
+    encoding_detect_ms = (time.perf_counter() - started) * 1000
+
+    df_raw, encoding, sum_cols, max_cols, mean_cols = load_statsallgroup_dataframe(
+        csv_path,
+        encoding=encoding,
+        native_dtypes=native_dtypes,
+        float_dtype=float_dtype,
+        engine=engine,
     )
+    return ParsedCsv(
+        csv_path=csv_path,
+        df_raw=df_raw,
+        encoding=encoding,
+        encoding_detect_ms=encoding_detect_ms,
+        sum_cols=sum_cols,
+        max_cols=max_cols,
+        mean_cols=mean_cols,
+        parse_ms=(time.perf_counter() - started) * 1000,
+    )
+
+
+class PandasPathRequired(Exception):
+    """The small-file parser met input it cannot read exactly like read_csv."""
+
+
+def _plain_float(text: str) -> float:
+    match = PLAIN_NUMBER.fullmatch(text)
+    if match is None or len(match[1]) + len(match[2]) > PLAIN_NUMBER_MAX_DIGITS:
+        # 数値でないセル (read_csv では列ごと文字列で読み直す) や丸めが read_csv と食い違いうる表記
+        raise PandasPathRequired(f"numeric cell {text!r}")
+    return float(text)
+
+
+def _numeric_column(cells: list[str]) -> list[float | None]:
+    values = [None if text in CSV_NA_VALUES else text for text in cells]
+    present = [text for text in values if text is not None]
+    # 大半の列は符号・空白・指数のない 15 文字以下の小数だけなので、判定は列ごとにまとめて行う
+    digits = "".join(present).replace(".", "")
+    if digits.isascii() and digits.isdigit() and max(map(len, present)) <= PLAIN_NUMBER_MAX_DIGITS:
+        try:
+            return [None if text is None else float(text) for text in values]
+        except ValueError:
+            pass
+    return [None if text is None else _plain_float(text) for text in values]
+
+
+def _parse_fixed_date(text: str) -> datetime:
+    for fmt in DATE_FORMATS:
+        try:
+            parsed = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        if not TIMESTAMP_YEARS[0] <= parsed.year <= TIMESTAMP_YEARS[1]:
+            break
+        return parsed
+    # 時刻付きなどは parse_date_series(fallback=True) の解釈に任せる
+    raise PandasPathRequired(f"date {text!r}")
+
+
+def _identifier_value(text: str) -> str:
+    # load_statsallgroup_dataframe の astype(str).str.strip().replace({"nan": ""}) と同じ
+    if text in CSV_NA_VALUES:
+        return ""
+    text = text.strip()
+    return "" if text == "nan" else text
+
+
+def parse_small_statsallgroup_csv(
+    csv_path: Path,
+    *,
+    encoding_hint: str | None = None,
+) -> ParsedCsv:
+    """parse_statsallgroup_csv for small files, with the stdlib csv module instead of pandas.
+
+    Returns the rows ``load_statsallgroup_dataframe`` would keep, as tuples
+    holding the same values (None where pandas has NaN, datetimes for
+    ``date_``). Input whose values read_csv could read differently (non-numeric
+    or exponent / more than 15 digit metric cells, dates outside
+    DATE_FORMATS, ragged rows, duplicate headers) raises PandasPathRequired.
+    """
+    started = time.perf_counter()
+    encoding = detect_csv_encoding(csv_path, hint=encoding_hint)
+    encoding_detect_ms = (time.perf_counter() - started) * 1000
 
     try:
-        df_raw, encoding, sum_cols, max_cols, mean_cols = load_statsallgroup_dataframe(csv_path)
-        rows_imported = len(df_raw)
-
-        df_daily = aggregate_daily(df_raw, sum_cols, max_cols, mean_cols)
-        df_daily = zero_pad_daily(df_daily, sum_cols)
-        df_daily, positions = determine_positions(
-            df_daily,
-            dive_threshold=50,
-            daily_dive_threshold=3,
-        )
+        with csv_path.open(encoding=encoding, newline="") as handle:
+            reader = csv.reader(handle)
+            # read_csv と同じく空行は読み飛ばす
+            header = next((record for record in reader if record), None)
+            if header is None:
+                raise PandasPathRequired("empty file")
+            plan = get_schema_plan(header)
+            names = [spec.name for spec in plan.columns]
+            if not all(names) or len(set(names)) != len(names):
+                raise PandasPathRequired("blank or duplicate column names")
+
+            columns = names + [col for col in ("athlete_id", "athlete_name", "date_") if col not in names]
+            id_slot, name_slot, date_slot = (
+                columns.index(col) for col in ("athlete_id", "athlete_name", "date_")
+            )
+            id_index = names.index(plan.column_for("athlete_id"))
+            date_index = names.index(plan.column_for("date_"))
+            athlete_name_col = plan.column_for("athlete_name")
+            name_index = names.index(athlete_name_col) if athlete_name_col else None
+            width = len(names)
+
+            records = []
+            for record in reader:
+                if not record:
+                    continue
+                if len(record) > width:
+                    raise PandasPathRequired("row with extra fields")
+                if len(record) < width:
+                    record += [""] * (width - len(record))
+                records.append(record)
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise PandasPathRequired(str(exc)) from exc
+
+    # 値は列ごとに変換する。捨てる行の数値セルも見る (read_csv は 1 セルでも数値でなければ全体を読み直す)
+    cells = [list(column) for column in zip(*records)]
+    for i, spec in enumerate(plan.columns if records else ()):
+        if spec.agg:
+            cells[i] = _numeric_column(cells[i])
+        else:
+            cells[i] = [None if text in CSV_NA_VALUES else text for text in cells[i]]
+
+    padding = [None] * (len(columns) - width)
+    dates: dict[str, datetime] = {}
+    rows = []
+    for record, values in zip(records, zip(*cells)):
+        athlete_id = _identifier_value(record[id_index])
+        date_text = "" if record[date_index] in CSV_NA_VALUES else record[date_index].strip()
+        if not athlete_id or not date_text:
+            continue
+        day = dates.get(date_text)
+        if day is None:
+            day = dates[date_text] = _parse_fixed_date(date_text)
+        row = [*values, *padding]
+        row[id_slot] = athlete_id
+        row[name_slot] = _identifier_value(record[name_index]) if name_index is not None else ""
+        row[date_slot] = day
+        rows.append(tuple(row))
+
+    return ParsedCsv(
+        csv_path=csv_path,
+        df_raw=None,
+        encoding=encoding,
+        encoding_detect_ms=encoding_detect_ms,
+        sum_cols=list(plan.sum_cols),
+        max_cols=list(plan.max_cols),
+        mean_cols=list(plan.mean_cols),
+        columns=columns,
+        rows=rows,
+        parse_ms=(time.perf_counter() - started) * 1000,
+    )
+
+
+def _kahan_add(total: float, compensation: float, value: float) -> tuple[float, float]:
+    # pandas の groupby sum / mean と同じ補正付き加算 (同じ順に足せば結果がビット単位で一致する)
+    y = value - compensation
+    t = total + y
+    c = t - total - y
+    return t, (0.0 if c != c else c)
+
+
+class _DailyAccumulator:
+    """Running aggregates of one (athlete, date): sums, then maxima, then means."""
+
+    __slots__ = ("name", "totals", "compensation", "counts", "maxima")
+
+    def __init__(self, n_sum: int, n_max: int, n_mean: int):
+        self.name = ""
+        self.totals = [0.0] * (n_sum + n_mean)
+        self.compensation = [0.0] * (n_sum + n_mean)
+        self.counts = [0] * n_mean
+        self.maxima: list[float | None] = [None] * n_max
+
+    def add(self, row: tuple, sum_at: list[tuple[int, int]], max_at: list[tuple[int, int]], n_sum: int) -> None:
+        # sum_at / max_at: (集計値の位置, 行の位置)。合計・平均は _kahan_add を展開した補正付き加算
+        totals, compensation = self.totals, self.compensation
+        for i, at in sum_at:
+            value = row[at]
+            if value is not None:
+                y = value - compensation[i]
+                t = totals[i] + y
+                c = t - totals[i] - y
+                compensation[i] = c if c == c else 0.0
+                totals[i] = t
+                if i >= n_sum:
+                    self.counts[i - n_sum] += 1
+        maxima = self.maxima
+        for i, at in max_at:
+            value = row[at]
+            if value is not None and (maxima[i] is None or value > maxima[i]):
+                maxima[i] = value
+
+    def values(self, n_sum: int) -> list[float | None]:
+        means = [
+            total / count if count else None
+            for total, count in zip(self.totals[n_sum:], self.counts)
+        ]
+        return [*self.totals[:n_sum], *self.maxima, *means]
+
+
+def batch_days(parsed: list[ParsedCsv]) -> tuple[set[tuple[str, date]], set[tuple[str, date]]]:
+    """(athlete_id, date) pairs recorded in a batch, and the pairs its zero padding covers.
+
+    Each file pads only its own athletes over its own first..last date, so a batch
+    pads the same days as importing its files one at a time (the recorded pairs
+    are always inside the padded ones).
+    """
+    recorded: set[tuple[str, date]] = set()
+    pad_days: set[tuple[str, date]] = set()
+    for p in parsed:
+        keys = p.day_keys()
+        if not keys:
+            continue
+        recorded |= keys
+        first_day = min(day for _, day in keys)
+        span = (max(day for _, day in keys) - first_day).days + 1
+        days = [first_day + timedelta(days=offset) for offset in range(span)]
+        pad_days.update((athlete_id, day) for athlete_id in {athlete_id for athlete_id, _ in keys} for day in days)
+    return recorded, pad_days
+
+
+def aggregate_small_daily(
+    parsed: list[ParsedCsv],
+    sum_cols: list[str],
+    max_cols: list[str],
+    mean_cols: list[str],
+    pad_days: set[tuple[str, date]] | None = None,
+) -> tuple[list[str], list[tuple], dict[str, str]]:
+    """aggregate_daily + zero_pad_daily for ParsedCsv rows, without pandas.
+
+    Returns the daily columns, the zero-padded daily rows (date-major, athletes
+    sorted, like zero_pad_daily) and athlete_id -> athlete_name. ``pad_days``
+    defaults to batch_days(parsed).
+    """
+    n_sum, n_max = len(sum_cols), len(max_cols)
+    accumulators: dict[tuple[str, date], _DailyAccumulator] = {}
+    for p in parsed:
+        index = {col: i for i, col in enumerate(p.columns)}
+        id_index, name_index, date_index = index["athlete_id"], index["athlete_name"], index["date_"]
+        # ファイルにない列は飛ばす (pandas の concat 後の NaN と同じく集計に入らない)
+        sum_at = [(i, index[col]) for i, col in enumerate((*sum_cols, *mean_cols)) if col in index]
+        max_at = [(i, index[col]) for i, col in enumerate(max_cols) if col in index]
+
+        for row in p.rows:
+            key = (row[id_index], row[date_index].date())
+            acc = accumulators.get(key)
+            if acc is None:
+                acc = accumulators[key] = _DailyAccumulator(n_sum, n_max, len(mean_cols))
+            if not acc.name:
+                acc.name = _first_non_empty((row[name_index],))
+            acc.add(row, sum_at, max_at, n_sum)
+
+    columns = ["date_", "athlete_id", *sum_cols, *max_cols, *mean_cols]
+    if not accumulators:
+        return columns, [], {}
+
+    if pad_days is None:
+        _, pad_days = batch_days(parsed)
+    names_by_athlete = defaultdict(list)
+    for athlete_id, day in sorted(accumulators, key=lambda key: key[1]):
+        names_by_athlete[athlete_id].append(accumulators[(athlete_id, day)].name)
+    names = {athlete_id: _first_non_empty(names_by_athlete[athlete_id]) for athlete_id in sorted(names_by_athlete)}
+    # 記録のない日は合計列 0、max / mean 列は欠損 (zero_pad_daily の fillna(0) と同じ)
+    padded = [0.0] * n_sum + [None] * (n_max + len(mean_cols))
+    rows = []
+    for athlete_id, day in sorted(pad_days, key=lambda key: (key[1], key[0])):
+        acc = accumulators.get((athlete_id, day))
+        rows.append((day, athlete_id, *(acc.values(n_sum) if acc else padded)))
+    return columns, rows, names
+
+
+def _daily_first_dates(columns: list[str], rows: list[tuple]) -> dict[str, date]:
+    """athlete_id -> earliest date among the daily rows written (zero-padded days included)."""
+    id_index = columns.index("athlete_id")
+    date_index = columns.index("date_")
+    first: dict[str, date] = {}
+    for row in rows:
+        athlete_id, day = str(row[id_index]), row[date_index]
+        if isinstance(day, datetime):
+            day = day.date()
+        if athlete_id not in first or day < first[athlete_id]:
+            first[athlete_id] = day
+    return first
+
+
+def _daily_dive_totals(columns: list[str], rows: list[tuple]) -> tuple[dict[str, float], dict[str, float]]:
+    """athlete_id -> (sum, max) of the daily dive counts, as determine_positions computes them."""
+    dive_at = [
+        columns.index(col)
+        for col in ("dive_right_count", "dive_left_count", "dive_centre_count")
+        if col in columns
+    ]
+    id_index = columns.index("athlete_id")
+    totals: dict[str, tuple[float, float]] = {}
+    daily_max: dict[str, float] = {}
+    for row in rows:
+        athlete_id = row[id_index]
+        day_total = 0.0
+        for at in dive_at:
+            day_total += row[at]
+        if athlete_id in totals:
+            totals[athlete_id] = _kahan_add(*totals[athlete_id], day_total)
+            daily_max[athlete_id] = max(daily_max[athlete_id], day_total)
+        else:
+            totals[athlete_id] = _kahan_add(0.0, 0.0, day_total)
+            daily_max[athlete_id] = day_total
+    return {athlete_id: total for athlete_id, (total, _) in sorted(totals.items())}, daily_max
+
+
+def _ingest_workers() -> int:
+    return max(int(getattr(settings, "WORKLOAD_INGEST_WORKERS", 1)), 1)
+
+
+def _use_small_csv_path(csv_paths: list[Path]) -> bool:
+    # native dtypes は値の型が変わり、Parquet 保存は DataFrame を書き出すので pandas 経路のまま
+    limit = int(getattr(settings, "WORKLOAD_CSV_FAST_PATH_BYTES", 0))
+    if limit <= 0 or getattr(settings, "WORKLOAD_CSV_NATIVE_DTYPES", False):
+        return False
+    if getattr(settings, "RAW_STORAGE_BACKEND", "db") == "parquet":
+        return False
+    return sum(csv_path.stat().st_size for csv_path in csv_paths) <= limit
+
+
+def _parse_small_csv_files(csv_paths: list[Path], *, encoding_hint: str | None) -> list[ParsedCsv | Exception]:
+    """parse_small_statsallgroup_csv for each file; files it cannot read exactly go through pandas."""
+    results = []
+    for csv_path in csv_paths:
+        try:
+            try:
+                results.append(parse_small_statsallgroup_csv(csv_path, encoding_hint=encoding_hint))
+            except PandasPathRequired:
+                # このファイルだけ pandas で読み直す (集計は aggregate_small_daily にまとめる)
+                results.append(parse_statsallgroup_csv(csv_path, encoding_hint=encoding_hint, **_csv_load_options()))
+        except Exception as exc:
+            results.append(exc)
+    return results
+
+
+def _parse_csv_files(
+    csv_paths: list[Path], *, encoding_hint: str | None, parallel: bool = False
+) -> list[ParsedCsv | Exception]:
+    """Parse CSVs one after another, or in worker processes with ``parallel``.
+
+    Batches up to WORKLOAD_CSV_FAST_PATH_BYTES in total are read with the
+    stdlib csv module (parse_small_statsallgroup_csv) instead. ``parallel`` is
+    only for the management command: the workers are started with "spawn", so
+    nothing of the calling process (DB connections, threads) is inherited.
+    """
+    if _use_small_csv_path(csv_paths):
+        return _parse_small_csv_files(csv_paths, encoding_hint=encoding_hint)
+
+    options = _csv_load_options()
+    workers = min(_ingest_workers(), len(csv_paths)) if parallel else 1
+    if workers <= 1:
+        results = []
+        for csv_path in csv_paths:
+            try:
+                results.append(parse_statsallgroup_csv(csv_path, encoding_hint=encoding_hint, **options))
+            except Exception as exc:
+                results.append(exc)
+        return results
+
+    # spawn したワーカーは Django を自分で初期化してから api.services を読み込む
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=django.setup,
+    ) as pool:
+        futures = [
+            pool.submit(parse_statsallgroup_csv, csv_path, encoding_hint=encoding_hint, **options)
+            for csv_path in csv_paths
+        ]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as exc:
+                results.append(exc)
+    return results
+
+
+def _merge_columns(column_lists) -> list[str]:
+    return list(dict.fromkeys(col for cols in column_lists for col in cols))
+
+
+def _athlete_names(df_daily: pd.DataFrame) -> dict[str, str]:
+    return df_daily.groupby("athlete_id")["athlete_name"].agg(_first_non_empty).to_dict()
+
+
+def _upsert_athletes(athlete_names: dict[str, str], positions: dict[str, str]) -> dict[str, Athlete]:
+    athlete_map = {}
+    with transaction.atomic():
+        for athlete_id, athlete_name in sorted(athlete_names.items()):
+            athlete_id = str(athlete_id).strip()
+            if not athlete_id:
+                continue
+            athlete_name = str(athlete_name or "").strip()
+            defaults = {
+                "is_active": True,
+                "position": positions.get(athlete_id, "FP"),
+            }
+            if athlete_name:
+                defaults["athlete_name"] = athlete_name
+            athlete, _ = Athlete.objects.update_or_create(
+                athlete_id=athlete_id,
+                defaults=defaults,
+            )
+            athlete_map[athlete_id] = athlete
+    return athlete_map
+
+
+def _discard_upload(upload: DataUpload, error: str) -> None:
+    GpsSessionRaw.objects.filter(upload=upload).delete()
+    GpsSessionRawIndex.objects.filter(upload=upload).delete()
+    if upload.raw_storage == "parquet":
+        raw_archive_path(upload.id).unlink(missing_ok=True)
+    upload.parse_status = "failed"
+    upload.error_log = error
+    # 生データは消したので履歴の件数・期間も空にする
+    upload.row_count = 0
+    upload.athlete_count = 0
+    upload.first_date = None
+    upload.last_date = None
+    upload.save(update_fields=["parse_status", "error_log", "row_count", "athlete_count", "first_date", "last_date"])
+
+
+def _report_progress(progress_id: str, stage: str, **payload) -> None:
+    live_events.publish("ingest", progress_id=progress_id, stage=stage, **payload)
+
+
+def import_statsallgroup_files(
+    files: list[tuple[str | Path, str | None]],
+    *,
+    uploaded_by: str = "",
+    allow_duplicate: bool = False,
+    progress_id: str = "",
+    parallel_parse: bool = False,
+) -> list[WorkloadIngestionSummary]:
+    """Import several CSVs as one batch: one DataUpload per file, merged daily aggregates.
+
+    ``files`` is a list of (path, original filename or None). Files are parsed in
+    the calling process, or with ``parallel_parse`` in WORKLOAD_INGEST_WORKERS
+    spawned worker processes (management command only, never in a request), then
+    their raw rows are concatenated so athlete-days spread over several files are
+    aggregated together.
+    If any file fails, every upload of the batch is marked failed.
+    Each file zero-pads its own athletes over its own first..last date
+    (batch_days); padded days that already have a daily row keep it.
+    Each stage is published as an "ingest" live event tagged with ``progress_id``.
+    """
+    resolved = []
+    for filename, source_filename in files:
+        csv_path = _resolve_csv_path(filename)
+        if not csv_path.exists():
+            raise WorkloadIngestionError(f"CSV not found: {csv_path}")
+        resolved.append((csv_path, Path(source_filename).name if source_filename else csv_path.name))
+
+    summaries: list[WorkloadIngestionSummary | None] = []
+    pending: list[tuple[int, Path, DataUpload]] = []
+    batch_hashes: dict[str, int] = {}
+
+    for csv_path, display_filename in resolved:
+        file_hash = hashlib.sha256(csv_path.read_bytes()).hexdigest()
+        if not allow_duplicate:
+            existing_id = batch_hashes.get(file_hash)
+            if existing_id is None:
+                existing_id = (
+                    DataUpload.objects.filter(file_hash=file_hash, parse_status="success")
+                    .order_by("-id")
+                    .values_list("id", flat=True)
+                    .first()
+                )
+            if existing_id:
+                summaries.append(
+                    WorkloadIngestionSummary(
+                        upload_id=existing_id,
+                        file_path=str(csv_path),
+                        rows_imported=0,
+                        athletes=[],
+                        encoding="skipped",
+                        duplicate_of=existing_id,
+                        skipped=True,
+                    )
+                )
+                continue
 
-        athletes = (
-            df_daily.groupby("athlete_id", as_index=False)["athlete_name"]
-            .agg(_first_non_empty)
-            .sort_values("athlete_id")
+        upload = DataUpload.objects.create(
+            source_filename=display_filename,
+            file_hash=file_hash,
+            uploaded_by=uploaded_by or "",
+            parse_status="pending",
+            raw_storage=getattr(settings, "RAW_STORAGE_BACKEND", "db"),
         )
+        batch_hashes[file_hash] = upload.id
+        pending.append((len(summaries), csv_path, upload))
+        summaries.append(None)
+
+    if not pending:
+        _report_progress(progress_id, "skipped", upload_ids=[summary.upload_id for summary in summaries])
+        return summaries
+
+    upload_ids = [upload.id for _, _, upload in pending]
+    live_events.prune()
+    _report_progress(progress_id, "parsing", upload_ids=upload_ids, files=len(pending))
+    results = _parse_csv_files(
+        [csv_path for _, csv_path, _ in pending],
+        encoding_hint=_encoding_hints.get(uploaded_by) if uploaded_by else None,
+        parallel=parallel_parse,
+    )
+    failures = [
+        (csv_path, result)
+        for (_, csv_path, _), result in zip(pending, results)
+        if isinstance(result, Exception)
+    ]
+    if failures:
+        failed_path, failed_exc = failures[0]
+        message = str(failed_exc) if len(pending) == 1 else f"{failed_path.name}: {failed_exc}"
+        for (_, csv_path, upload), result in zip(pending, results):
+            _discard_upload(upload, str(result) if isinstance(result, Exception) else f"batch aborted: {message}")
+        _report_progress(progress_id, "failed", upload_ids=upload_ids, error=message)
+        raise WorkloadIngestionError(message) from failed_exc
+
+    parsed: list[ParsedCsv] = results
+    _report_progress(progress_id, "aggregating", upload_ids=upload_ids, rows=sum(p.row_count for p in parsed))
+    # 段階ごとの所要時間 (ms)。aggregating / daily_rows はバッチ全体の時間を各 upload に記録する
+    stage_ms = {}
+    raw_stats: list[RawRowStats] = []
+    started = time.perf_counter()
+    try:
+        sum_cols = _merge_columns(p.sum_cols for p in parsed)
+        max_cols = _merge_columns(p.max_cols for p in parsed)
+        mean_cols = _merge_columns(p.mean_cols for p in parsed)
+        # 0 埋めはファイルごとの選手・期間に限る (複数ファイルをまとめても 1 件ずつ取り込むのと同じ日だけ)
+        recorded_days, pad_days = batch_days(parsed)
+        if any(p.rows is not None for p in parsed):
+            # 小さいファイル: 行タプルを選手・日ごとのアキュムレータに畳み込む (pandas 経路と同じ結果)。
+            # pandas で読み直したファイルも行タプルにして同じ集計に入れる
+            daily_columns, daily_rows, athlete_names = aggregate_small_daily(
+                [p.with_rows() for p in parsed], sum_cols, max_cols, mean_cols, pad_days
+            )
+            totals, daily_max = _daily_dive_totals(daily_columns, daily_rows)
+            positions = _decide_positions(
+                list(athlete_names),
+                totals=totals,
+                daily_max=daily_max,
+                dive_threshold=50,
+                daily_dive_threshold=3,
+            )
+        else:
+            df_all = (
+                parsed[0].df_raw
+                if len(parsed) == 1
+                else pd.concat([p.df_raw for p in parsed], ignore_index=True)
+            )
 
-        athlete_map = {}
-        with transaction.atomic():
-            for _, row in athletes.iterrows():
-                athlete_id = str(row["athlete_id"]).strip()
-                if not athlete_id:
-                    continue
-                athlete_name = str(row.get("athlete_name") or "").strip()
-                defaults = {
-                    "is_active": True,
-                    "position": positions.get(athlete_id, "FP"),
-                }
-                if athlete_name:
-                    defaults["athlete_name"] = athlete_name
-                athlete, _ = Athlete.objects.update_or_create(
-                    athlete_id=athlete_id,
-                    defaults=defaults,
+            df_daily = aggregate_daily(df_all, sum_cols, max_cols, mean_cols)
+            df_daily = zero_pad_daily(df_daily, sum_cols, pad_days)
+            df_daily, positions = determine_positions(
+                df_daily,
+                dive_threshold=50,
+                daily_dive_threshold=3,
+            )
+            daily_columns = list(df_daily.columns)
+            daily_rows = list(df_daily.itertuples(index=False, name=None))
+            athlete_names = _athlete_names(df_daily)
+
+        # 取り込みは短いトランザクションに分ける: 選手 -> 生データ -> 日次集計 + 状態
+        athlete_map = _upsert_athletes(athlete_names, positions)
+        stage_ms["aggregating"] = (time.perf_counter() - started) * 1000
+
+        # 生データはバッチごとにコミットする (失敗時は except で upload 分を削除)
+        _report_progress(progress_id, "raw_rows", upload_ids=upload_ids)
+        raw_ms = []
+        for (_, _, upload), p in zip(pending, parsed):
+            started = time.perf_counter()
+            if upload.raw_storage == "parquet":
+                raw_stats.append(_archive_raw_rows(p.df_raw, upload=upload, athlete_map=athlete_map))
+            else:
+                raw_stats.append(
+                    _ingest_raw_rows(p.raw_columns(), p.iter_raw_rows(), upload=upload, athlete_map=athlete_map)
                 )
-                athlete_map[athlete_id] = athlete
+            raw_ms.append((time.perf_counter() - started) * 1000)
 
-            _ingest_raw_rows(df_raw, upload=upload, athlete_map=athlete_map)
+        _report_progress(progress_id, "daily_rows", upload_ids=upload_ids, daily_rows=len(daily_rows))
+        started = time.perf_counter()
+        with transaction.atomic():
             _ingest_daily_rows(
-                df_daily,
+                daily_columns,
+                daily_rows,
                 athlete_map=athlete_map,
                 sum_cols=sum_cols,
                 max_cols=max_cols,
                 mean_cols=mean_cols,
+                padded_days=pad_days - recorded_days,
             )
+            stage_ms["daily_rows"] = (time.perf_counter() - started) * 1000
+            # アップロード履歴は gps_sessions_raw を数えずにこの値を読む
+            for (_, _, upload), p, stats, ms in zip(pending, parsed, raw_stats, raw_ms):
+                timings = {
+                    "encoding_detect": p.encoding_detect_ms,
+                    "parsing": p.parse_ms,
+                    "aggregating": stage_ms["aggregating"],
+                    "raw_rows": ms,
+                    "daily_rows": stage_ms["daily_rows"],
+                }
+                stats_fields = stats.upload_fields()
+                for name, value in stats_fields.items():
+                    setattr(upload, name, value)
+                upload.parse_status = "success"
+                upload.encoding = p.encoding
+                upload.stage_ms = {name: round(value, 1) for name, value in timings.items()}
+                upload.save(update_fields=["parse_status", "encoding", "stage_ms", *stats_fields])
+    except Exception as exc:
+        for _, _, upload in pending:
+            _discard_upload(upload, str(exc))
+        _report_progress(progress_id, "failed", upload_ids=upload_ids, error=str(exc))
+        raise WorkloadIngestionError(str(exc)) from exc
 
-        upload.parse_status = "success"
-        upload.save(update_fields=["parse_status"])
+    if uploaded_by:
+        _encoding_hints[uploaded_by] = parsed[-1].encoding
 
-        return WorkloadIngestionSummary(
+    # 再計算の起点は書き込んだ日次行 (0 埋めした日を含む) から取る
+    daily_first = _daily_first_dates(daily_columns, daily_rows)
+    for (index, csv_path, upload), p in zip(pending, parsed):
+        first_dates = {
+            athlete_id: daily_first[athlete_id]
+            for athlete_id in sorted(p.athlete_ids())
+            if athlete_id in athlete_map and athlete_id in daily_first
+        }
+        summaries[index] = WorkloadIngestionSummary(
             upload_id=upload.id,
             file_path=str(csv_path),
-            rows_imported=rows_imported,
-            athletes=sorted(athlete_map.keys()),
-            encoding=encoding,
+            rows_imported=p.row_count,
+            athletes=sorted(first_dates),
+            encoding=p.encoding,
+            encoding_detect_ms=round(p.encoding_detect_ms, 3),
+            first_dates=first_dates,
         )
-    except Exception as exc:
-        upload.parse_status = "failed"
-        upload.error_log = str(exc)
-        upload.save(update_fields=["parse_status", "error_log"])
-        raise WorkloadIngestionError(str(exc)) from exc
+    _report_progress(
+        progress_id,
+        "imported",
+        upload_ids=upload_ids,
+        rows=sum(p.row_count for p in parsed),
+        athletes=len(athlete_map),
+    )
+    return summaries
+
+
+def import_statsallgroup_csv(
+    filename: str | Path,
+    *,
+    uploaded_by: str = "",
+    source_filename: str | None = None,
+    allow_duplicate: bool = False,
+) -> WorkloadIngestionSummary:
+    return import_statsallgroup_files(
+        [(filename, source_filename)],
+        uploaded_by=uploaded_by,
+        allow_duplicate=allow_duplicate,
+    )[0]
 
 
 def run_gps_pipeline(
@@ -633,25 +1744,269 @@ def run_gps_pipeline(
     uploaded_by: str = "",
     source_filename: str | None = None,
     allow_duplicate: bool = False,
+    defer_rebuild: bool | None = None,
+    progress_id: str = "",
 ) -> tuple[WorkloadIngestionSummary, int]:
-    summary = import_statsallgroup_csv(
-        filename,
+    summaries, features = run_gps_pipeline_files(
+        [(filename, source_filename)],
         uploaded_by=uploaded_by,
-        source_filename=source_filename,
         allow_duplicate=allow_duplicate,
+        defer_rebuild=defer_rebuild,
+        progress_id=progress_id,
     )
-    if summary.skipped:
-        return summary, 0
-    features = rebuild_workload_features(athlete_ids=summary.athletes)
-    return summary, features
+    return summaries[0], features
+
+
+def run_gps_pipeline_files(
+    files: list[tuple[str | Path, str | None]],
+    *,
+    uploaded_by: str = "",
+    allow_duplicate: bool = False,
+    defer_rebuild: bool | None = None,
+    progress_id: str = "",
+    parallel_parse: bool = False,
+) -> tuple[list[WorkloadIngestionSummary], int]:
+    """Import a batch of CSVs and rebuild features once for the union of their athletes.
+
+    With ``defer_rebuild`` (default: FEATURE_REBUILD_MODE == "debounced") the
+    athletes are queued for a coalesced rebuild instead and the returned feature
+    count is 0 unless the queue was due and rebuilt on the spot; each summary's
+    ``feature_rebuild`` reports the rebuild status.
+    """
+    summaries = import_statsallgroup_files(
+        files,
+        uploaded_by=uploaded_by,
+        allow_duplicate=allow_duplicate,
+        progress_id=progress_id,
+        parallel_parse=parallel_parse,
+    )
+    first_dates: dict[str, date] = {}
+    for summary in summaries:
+        if summary.skipped:
+            continue
+        for athlete_id, day in summary.first_dates.items():
+            first_dates[athlete_id] = min(day, first_dates.get(athlete_id, day))
+    if not first_dates:
+        if not all(summary.skipped for summary in summaries):
+            _report_progress(progress_id, "done", upload_ids=[s.upload_id for s in summaries], feature_rebuild=None)
+        return summaries, 0
+
+    if defer_rebuild is None:
+        defer_rebuild = rebuild_scheduler.is_deferred()
+    upload_ids = [summary.upload_id for summary in summaries if not summary.skipped]
+    _report_progress(progress_id, "features", upload_ids=upload_ids, athletes=len(first_dates))
+    if defer_rebuild:
+        status = rebuild_scheduler.request_rebuild(first_dates)
+        features = status.get("rows", 0)
+    else:
+        features = rebuild_workload_features(athlete_ids=sorted(first_dates))
+        status = {"status": "completed", "athletes": len(first_dates), "rows": features}
+    _report_progress(progress_id, "done", upload_ids=upload_ids, feature_rebuild=status)
+
+    for summary in summaries:
+        if not summary.skipped:
+            summary.feature_rebuild = status
+    return summaries, features
+
+
+def refresh_upload_date_ranges(upload_ids: Iterable[int]) -> int:
+    """Recompute DataUpload.first_date / last_date from the stored raw rows (e.g. after backfilling dates).
+
+    Returns the number of uploads updated.
+    """
+    upload_ids = list(upload_ids)
+    ranges: dict[int, tuple[date | None, date | None]] = {}
+    for model in (GpsSessionRaw, GpsSessionRawIndex):
+        grouped = (
+            model.objects.filter(upload_id__in=upload_ids)
+            .values("upload_id")
+            .annotate(first=Min("date"), last=Max("date"))
+        )
+        for row in grouped:
+            first, last = ranges.get(row["upload_id"], (None, None))
+            ranges[row["upload_id"]] = (
+                min(filter(None, (first, row["first"])), default=None),
+                max(filter(None, (last, row["last"])), default=None),
+            )
+
+    uploads = list(DataUpload.objects.filter(id__in=upload_ids))
+    for upload in uploads:
+        upload.first_date, upload.last_date = ranges.get(upload.id, (None, None))
+    DataUpload.objects.bulk_update(uploads, ["first_date", "last_date"], batch_size=500)
+    return len(uploads)
 
 
 def athlete_ids_for_upload(upload_id: int) -> list[str]:
-    return list(
+    raw_ids = (
         GpsSessionRaw.objects.filter(upload_id=upload_id)
         .values_list("athlete_id", flat=True)
         .distinct()
     )
+    archived_ids = (
+        GpsSessionRawIndex.objects.filter(upload_id=upload_id)
+        .values_list("athlete_id", flat=True)
+        .distinct()
+    )
+    return list(dict.fromkeys([*raw_ids, *archived_ids]))
+
+
+# 年が最後のスラッシュ区切り。一時期 (と以前の parse_date) は日が先として読んでいた
+SLASH_DATE_PATTERN = r"^\s*\d{1,2}/\d{1,2}/\d{4}\s*$"
+
+
+@dataclass
+class SlashDateRepair:
+    rows: int = 0
+    upload_ids: list[int] = field(default_factory=list)
+    athlete_ids: list[str] = field(default_factory=list)
+    daily_rows: int = 0
+    removed_days: int = 0
+
+
+def repair_slash_dates(
+    *,
+    upload_id: int | None = None,
+    dry_run: bool = False,
+    batch_size: int = 2000,
+) -> SlashDateRepair:
+    """Re-read raw dates like "01/02/2024" month-first and repair rows stored day-first.
+
+    ``parse_date`` and, for a while, DATE_FORMATS read such values day-first, so
+    raw rows imported or backfilled then can carry the wrong date. Rows whose
+    stored date differs from ``parse_date`` (month-first) are moved to the
+    month-first date, and the affected athletes' gps_daily is rebuilt from the
+    raw rows. Old days (moved rows' dates and the uploads' old zero-padded
+    ranges) that no raw row backs any more become zero-padded days when an upload
+    of that athlete covers them and are deleted otherwise; the moved uploads'
+    corrected ranges are zero-padded like an import. Values that only
+    read day-first (31/12/2024) are left alone. Parquet archives are not touched.
+    """
+    qs = (
+        GpsSessionRaw.objects.filter(date__isnull=False)
+        .annotate(raw_date=KeyTextTransform("date_", "raw_payload"))
+        .filter(raw_date__regex=SLASH_DATE_PATTERN)
+    )
+    if upload_id is not None:
+        qs = qs.filter(upload_id=upload_id)
+
+    moved: list[GpsSessionRaw] = []
+    old_days: set[tuple[str, date]] = set()
+    changed_days: set[date] = set()
+    upload_ids: set[int] = set()
+    rows = qs.values_list("id", "athlete_id", "upload_id", "date", "raw_date")
+    for row_id, athlete_id, row_upload_id, stored, raw_date in rows.iterator(chunk_size=batch_size):
+        parsed = parse_date(raw_date)
+        if parsed is None or parsed == stored:
+            continue
+        moved.append(GpsSessionRaw(id=row_id, date=parsed))
+        old_days.add((athlete_id, stored))
+        changed_days.update((stored, parsed))
+        upload_ids.add(row_upload_id)
+
+    athlete_ids = sorted({athlete_id for athlete_id, _ in old_days})
+    repair = SlashDateRepair(rows=len(moved), upload_ids=sorted(upload_ids), athlete_ids=athlete_ids)
+    if dry_run or not moved:
+        return repair
+
+    # 誤った日付の範囲で 0 埋めされた日も作り直しの対象にする
+    old_spans = Q()
+    for first, last in DataUpload.objects.filter(id__in=upload_ids, first_date__isnull=False).values_list(
+        "first_date", "last_date"
+    ):
+        old_spans |= Q(date__gte=first, date__lte=last)
+    if old_spans:
+        old_days.update(
+            GpsDaily.objects.filter(old_spans, athlete_id__in=athlete_ids).values_list("athlete_id", "date")
+        )
+
+    with transaction.atomic():
+        GpsSessionRaw.objects.bulk_update(moved, ["date"], batch_size=batch_size)
+    refresh_upload_date_ranges(upload_ids)
+    repair.daily_rows = rebuild_gps_daily(athlete_ids=athlete_ids)
+
+    # 0 埋めの範囲は選手が出てくるアップロードの first_date..last_date (batch_days と同じ)
+    spans: dict[str, list[tuple[int, date, date]]] = defaultdict(list)
+    for athlete_id, span_upload, first, last in (
+        GpsSessionRaw.objects.filter(athlete_id__in=athlete_ids, upload__first_date__isnull=False)
+        .values_list("athlete_id", "upload_id", "upload__first_date", "upload__last_date")
+        .distinct()
+    ):
+        spans[athlete_id].append((span_upload, first, last))
+
+    backed = set(
+        GpsSessionRaw.objects.filter(
+            athlete_id__in=athlete_ids, date__in={day for _, day in old_days}
+        ).values_list("athlete_id", "date")
+    )
+    stale = [key for key in old_days if key not in backed]
+    covered = [key for key in stale if any(first <= key[1] <= last for _, first, last in spans[key[0]])]
+    gone = sorted(set(stale) - set(covered))
+    padding = {
+        (athlete_id, first + timedelta(days=offset))
+        for athlete_id in athlete_ids
+        for span_upload, first, last in spans[athlete_id]
+        if span_upload in upload_ids
+        for offset in range((last - first).days + 1)
+    }
+
+    def zero_days(keys) -> list[GpsDaily]:
+        return [_RawDailyAccumulator().to_daily(athlete_id, day) for athlete_id, day in keys]
+
+    with transaction.atomic():
+        revision = change_feed.next_revision()
+        zeroed = zero_days(covered)
+        padded = zero_days(sorted(padding))
+        for obj in (*zeroed, *padded):
+            obj.revision = revision
+        # 誤った日付で集計されていた日は 0 に戻す。正しい範囲の 0 埋めは既存の行を上書きしない
+        GpsDaily.objects.bulk_create(
+            zeroed,
+            batch_size=2000,
+            update_conflicts=True,
+            update_fields=DAILY_UPDATE_FIELDS,
+            unique_fields=["athlete", "date"],
+        )
+        GpsDaily.objects.bulk_create(padded, batch_size=2000, ignore_conflicts=True)
+        removed = Q()
+        for athlete_id, day in gone:
+            removed |= Q(athlete_id=athlete_id, date=day)
+        if gone:
+            change_feed.record_tombstones("daily", gone, revision)
+            GpsDaily.objects.filter(removed).delete()
+    repair.removed_days = len(gone)
+
+    since = min(changed_days | {day for _, day in old_days})
+    rebuild_workload_features(athlete_ids=athlete_ids, since=since)
+    return repair
+
+
+def _is_rebuild_column(name: str) -> bool:
+    return (
+        name in RAW_SUM_COLUMNS
+        or name in RAW_EXTRA_COLUMNS
+        or name.startswith("total_time_to_feet_")
+    )
+
+
+def _iter_archived_payloads(athlete_ids_list: list[str]):
+    """Yield (athlete_id, date, payload) from Parquet archives, reading only rebuild columns."""
+    index_qs = GpsSessionRawIndex.objects.order_by("upload_id", "row_start")
+    if athlete_ids_list:
+        index_qs = index_qs.filter(athlete_id__in=athlete_ids_list)
+
+    ranges_by_upload = defaultdict(list)
+    for upload_id, athlete_id, date_, row_start, row_end in index_qs.values_list(
+        "upload_id", "athlete_id", "date", "row_start", "row_end"
+    ):
+        ranges_by_upload[upload_id].append((athlete_id, date_, row_start, row_end))
+
+    for upload_id, ranges in ranges_by_upload.items():
+        frame = read_raw_archive(upload_id, column_filter=_is_rebuild_column)
+        # JSON 側と同じく欠損は None として扱う (NaN は truthy なので `or` のフォールバックが効かない)
+        frame = frame.astype(object).where(frame.notna(), None)
+        for athlete_id, date_, row_start, row_end in ranges:
+            for payload in frame.iloc[row_start:row_end].to_dict("records"):
+                yield athlete_id, date_, payload
 
 
 def detect_positions(
@@ -698,74 +2053,42 @@ def detect_positions(
     }
 
 
-def rebuild_gps_daily(
-    *,
-    athlete_ids: Iterable[str] | None = None,
-    delete_existing: bool = False,
-) -> int:
-    qs = GpsSessionRaw.objects.all()
-    athlete_ids_list = list(athlete_ids) if athlete_ids else []
-    if athlete_ids_list:
-        qs = qs.filter(athlete_id__in=athlete_ids_list)
-
-    grouped = defaultdict(list)
-    for row in qs.iterator(chunk_size=2000):
-        date_ = row.date
-        if not date_:
-            date_ = parse_date_any(
-                row.raw_payload.get("date_")
-                or row.raw_payload.get("date")
-                or row.raw_payload.get("Date")
-                or row.raw_payload.get("session_date")
-            )
-        if date_:
-            grouped[(row.athlete_id, date_)].append(row)
-
-    daily_objects = []
-
-    needed_cols = [
-        "total_duration",
-        "total_distance",
-        "total_player_load",
-        "total_jumps",
-        "max_vel",
-        "mean_heart_rate",
-        "velocity_band5_total_distance",
-        "velocity_band6_total_distance",
-        "high_decel_count",
-        "ima_band2_decel_count",
-        "ima_band3_decel_count",
-        "total_time_to_feet",
-        "dive_left_count",
-        "dive_right_count",
-        "dive_centre_count",
-    ]
-
-    for (athlete_id, date_), rows in grouped.items():
-        sums = defaultdict(float)
-        max_vel = 0.0
-        hr_values: list[float] = []
-        total_time_to_feet = 0.0
-        for entry in rows:
-            payload = entry.raw_payload
-            max_vel = max(
-                max_vel,
-                to_float(payload.get("max_vel") or payload.get("Max Velocity")),
-            )
-            hr_value = safe_number(payload.get("mean_heart_rate") or payload.get("Avg HR"))
-            if hr_value is not None:
-                hr_values.append(hr_value)
+class _RawDailyAccumulator:
+    """Running totals of one (athlete, date) for rebuild_gps_daily, folded one payload at a time."""
 
-            total_time_to_feet += to_float(payload.get("total_time_to_feet"))
-            for key, value in payload.items():
-                if str(key).startswith("total_time_to_feet_"):
-                    total_time_to_feet += to_float(value)
+    # 選手・日ごとに 1 つだけ持つので、生データの行数ではなく選手日数に比例したメモリで済む
+    __slots__ = ("sums", "max_vel", "hr_total", "hr_count", "time_to_feet")
 
-            for key in needed_cols:
-                sums[key] += to_float(payload.get(key))
+    def __init__(self):
+        self.sums = array("d", [0.0] * len(RAW_SUM_COLUMNS))
+        self.max_vel = 0.0
+        self.hr_total = 0.0
+        self.hr_count = 0
+        self.time_to_feet = 0.0
 
+    def add(self, payload: dict) -> None:
+        self.max_vel = max(
+            self.max_vel,
+            to_float(payload.get("max_vel") or payload.get("Max Velocity")),
+        )
+        hr_value = safe_number(payload.get("mean_heart_rate") or payload.get("Avg HR"))
+        if hr_value is not None:
+            self.hr_total += hr_value
+            self.hr_count += 1
+
+        self.time_to_feet += to_float(payload.get("total_time_to_feet"))
+        for key, value in payload.items():
+            if str(key).startswith(TIME_TO_FEET_PREFIX):
+                self.time_to_feet += to_float(value)
+
+        sums = self.sums
+        for index, key in enumerate(RAW_SUM_COLUMNS):
+            sums[index] += to_float(payload.get(key))
+
+    def to_daily(self, athlete_id: str, date_: date) -> GpsDaily:
+        sums = dict(zip(RAW_SUM_COLUMNS, self.sums))
         hsr = sums["velocity_band5_total_distance"] + sums["velocity_band6_total_distance"]
-        mean_heart_rate = sum(hr_values) / len(hr_values) if hr_values else None
+        mean_heart_rate = self.hr_total / self.hr_count if self.hr_count else None
         high_decel_count = sums["high_decel_count"]
         if high_decel_count == 0:
             high_decel_count = sums["ima_band2_decel_count"] + sums["ima_band3_decel_count"]
@@ -773,51 +2096,120 @@ def rebuild_gps_daily(
         dive_l = sums["dive_left_count"]
         dive_r = sums["dive_right_count"]
         dive_total = dive_l + dive_r + sums["dive_centre_count"]
-        avg_time_to_feet = total_time_to_feet / dive_total if dive_total > 0 else None
+        avg_time_to_feet = self.time_to_feet / dive_total if dive_total > 0 else None
+
+        return GpsDaily(
+            athlete_id=athlete_id,
+            date=date_,
+            total_duration=sums["total_duration"],
+            total_distance=sums["total_distance"],
+            total_player_load=sums["total_player_load"],
+            max_vel=self.max_vel,
+            mean_heart_rate=mean_heart_rate,
+            hsr_distance=hsr,
+            high_decel_count=int(high_decel_count),
+            total_dive_count=int(dive_total),
+            avg_time_to_feet=avg_time_to_feet,
+            total_jumps=sums["total_jumps"],
+            metrics=sums,
+        )
 
-        daily_objects.append(
-            GpsDaily(
-                athlete_id=athlete_id,
-                date=date_,
-                total_duration=sums["total_duration"],
-                total_distance=sums["total_distance"],
-                total_player_load=sums["total_player_load"],
-                max_vel=max_vel,
-                mean_heart_rate=mean_heart_rate,
-                hsr_distance=hsr,
-                high_decel_count=int(high_decel_count),
-                total_dive_count=int(dive_total),
-                avg_time_to_feet=avg_time_to_feet,
-                total_jumps=sums["total_jumps"],
-                metrics=dict(sums),
-            )
+
+def _rebuild_payload(connection):
+    """raw_payload narrowed to RAW_REBUILD_KEYS and total_time_to_feet_* in the database."""
+    vendor = connection.vendor
+    column = f"{connection.ops.quote_name(GpsSessionRaw._meta.db_table)}.raw_payload"
+    prefix = TIME_TO_FEET_PREFIX.replace("_", "\\_") + "%"
+    # キーの順序は元の raw_payload と同じ (total_time_to_feet_* はその順に足す)
+    if vendor == "postgresql":
+        return RawSQL(
+            f"(SELECT jsonb_object_agg(key, value) FROM jsonb_each({column}) "
+            "WHERE key = ANY(%s) OR key LIKE %s)",
+            (RAW_REBUILD_KEYS, prefix),
+            output_field=JSONField(),
+        )
+    if vendor == "sqlite":
+        placeholders = ", ".join(["%s"] * len(RAW_REBUILD_KEYS))
+        return RawSQL(
+            f"(SELECT json_group_object(key, value) FROM json_each({column}) "
+            f"WHERE key IN ({placeholders}) OR key LIKE %s ESCAPE '\\')",
+            (*RAW_REBUILD_KEYS, prefix),
+            output_field=JSONField(),
         )
+    return RawSQL(column, (), output_field=JSONField())
+
+
+def fold_raw_daily(athlete_ids_list: list[str]) -> dict[tuple[str, date], _RawDailyAccumulator]:
+    qs = GpsSessionRaw.objects.all()
+    if athlete_ids_list:
+        qs = qs.filter(athlete_id__in=athlete_ids_list)
+
+    # 行は読んだそばから選手・日ごとのアキュムレータに足し込み、payload は使うキーだけを取り出す
+    accumulators: dict[tuple[str, date], _RawDailyAccumulator] = defaultdict(_RawDailyAccumulator)
+    undated = defaultdict(list)
+    rows = qs.annotate(rebuild_payload=_rebuild_payload(connections[qs.db])).values_list(
+        "athlete_id", "date", "upload_id", "rebuild_payload"
+    )
+    for athlete_id, date_, upload_id, payload in rows.iterator(chunk_size=2000):
+        if date_:
+            accumulators[(athlete_id, date_)].add(payload or {})
+        else:
+            undated[upload_id].append((athlete_id, payload or {}))
+
+    # date_ が空の行は upload ごとにまとめてベクトル化パースする
+    for upload_id, undated_rows in undated.items():
+        dates = parse_upload_dates(upload_id, [_raw_date_value(payload) for _, payload in undated_rows])
+        for (athlete_id, payload), date_ in zip(undated_rows, dates):
+            if date_:
+                accumulators[(athlete_id, date_)].add(payload)
+    del undated
+
+    for athlete_id, date_, payload in _iter_archived_payloads(athlete_ids_list):
+        accumulators[(athlete_id, date_)].add(payload)
+    return accumulators
+
+
+def rebuild_gps_daily(
+    *,
+    athlete_ids: Iterable[str] | None = None,
+    delete_existing: bool = False,
+) -> int:
+    """Rebuild gps_daily from the stored raw rows; returns the number of daily rows written.
+
+    With ``delete_existing`` the daily rows not rebuilt are deleted, except in
+    the date ranges of detached raw partitions (DetachedRawPartition): their raw
+    rows are gone, so those days could never be rebuilt.
+    """
+    athlete_ids_list = list(athlete_ids) if athlete_ids else []
+    accumulators = fold_raw_daily(athlete_ids_list)
+    daily_objects = [acc.to_daily(athlete_id, date_) for (athlete_id, date_), acc in accumulators.items()]
+    del accumulators
 
     with transaction.atomic():
+        revision = change_feed.next_revision()
+        for obj in daily_objects:
+            obj.revision = revision
+
         if delete_existing:
+            existing = GpsDaily.objects.all()
             if athlete_ids_list:
-                GpsDaily.objects.filter(athlete_id__in=athlete_ids_list).delete()
-            else:
-                GpsDaily.objects.all().delete()
+                existing = existing.filter(athlete_id__in=athlete_ids_list)
+            for start, end in DetachedRawPartition.objects.values_list("start", "end"):
+                existing = existing.exclude(date__gte=start, date__lt=end)
+            rebuilt = {(obj.athlete_id, obj.date) for obj in daily_objects}
+            change_feed.record_tombstones(
+                "daily",
+                (key for key in existing.values_list("athlete_id", "date") if key not in rebuilt),
+                revision,
+            )
+            existing.delete()
 
         if daily_objects:
             GpsDaily.objects.bulk_create(
                 daily_objects,
                 batch_size=2000,
                 update_conflicts=True,
-                update_fields=[
-                    "total_duration",
-                    "total_distance",
-                    "total_player_load",
-                    "max_vel",
-                    "mean_heart_rate",
-                    "hsr_distance",
-                    "high_decel_count",
-                    "total_dive_count",
-                    "avg_time_to_feet",
-                    "total_jumps",
-                    "metrics",
-                ],
+                update_fields=DAILY_UPDATE_FIELDS,
                 unique_fields=["athlete", "date"],
             )
 
@@ -854,7 +2246,7 @@ def safe_number(value: float | int | None):
         v = float(value)
     except (TypeError, ValueError):
         return None
-    return v if np.isfinite(v) else None
+    return v if math.isfinite(v) else None
 
 
 def classify_fp(
@@ -930,7 +2322,17 @@ def classify_gk(
     return level, reasons
 
 
-def rebuild_workload_features(*, athlete_ids: Iterable[str] | None = None) -> int:
+def rebuild_workload_features(
+    *,
+    athlete_ids: Iterable[str] | None = None,
+    since: date | None = None,
+) -> int:
+    """Recompute features for the given athletes (all if None).
+
+    EWMA/rolling values depend on the whole history, so every athlete is
+    recomputed from the start; with ``since`` only rows on or after that date
+    are written back (earlier rows cannot have changed).
+    """
     athlete_ids_list = list(athlete_ids) if athlete_ids else []
     qs = GpsDaily.objects.all().values(
         "athlete_id",
@@ -952,25 +2354,13 @@ def rebuild_workload_features(*, athlete_ids: Iterable[str] | None = None) -> in
 
     df = pd.DataFrame(list(qs))
 
-    with transaction.atomic():
-        if athlete_ids_list:
-            WorkloadFeaturesDaily.objects.filter(
-                athlete_id__in=athlete_ids_list
-            ).delete()
-        else:
-            WorkloadFeaturesDaily.objects.all().delete()
-
     if df.empty:
+        _swap_feature_rows([], athlete_ids_list, since=since)
         return 0
 
     df["date"] = pd.to_datetime(df["date"])
 
-    athlete_position_qs = Athlete.objects.all()
-    if athlete_ids_list:
-        athlete_position_qs = athlete_position_qs.filter(
-            athlete_id__in=athlete_ids_list
-        )
-    athlete_positions = {a.athlete_id: a.position for a in athlete_position_qs}
+    positions = athlete_positions(athlete_ids_list or None)
 
     out_rows = []
 
@@ -988,7 +2378,7 @@ def rebuild_workload_features(*, athlete_ids: Iterable[str] | None = None) -> in
         )
         group["metrics"] = group["metrics"].apply(lambda m: m if isinstance(m, dict) else {})
 
-        is_gk = athlete_positions.get(athlete_id, "FP") == "GK"
+        is_gk = positions.get(athlete_id, "FP") == "GK"
 
         total_distance = group["total_distance"].fillna(0).astype(float)
         total_player_load = group["total_player_load"].fillna(0).astype(float)
@@ -1084,8 +2474,90 @@ def rebuild_workload_features(*, athlete_ids: Iterable[str] | None = None) -> in
                 )
             )
 
+    if since is not None:
+        out_rows = [row for row in out_rows if row.date >= since]
+    _swap_feature_rows(out_rows, athlete_ids_list, since=since)
+    return len(out_rows)
+
+
+def _swap_feature_rows(
+    out_rows: list[WorkloadFeaturesDaily],
+    athlete_ids_list: list[str],
+    *,
+    since: date | None = None,
+) -> None:
+    """Replace the feature rows of the given athletes (all athletes if empty) in one short transaction.
+
+    Rows are upserted on (athlete, date) and only rows outside each athlete's new
+    date span are deleted, so readers see either the old or the new set and never
+    an athlete without features. Written rows get a new change-feed revision and
+    deleted ones are recorded as tombstones.
+    """
+    spans: dict[str, tuple] = {}
+    for row in out_rows:
+        first, last = spans.get(row.athlete_id, (row.date, row.date))
+        spans[row.athlete_id] = (min(first, row.date), max(last, row.date))
+
+    stale = WorkloadFeaturesDaily.objects.all()
+    if athlete_ids_list:
+        stale = stale.filter(athlete_id__in=athlete_ids_list)
+    if since is not None:
+        stale = stale.filter(date__gte=since)
+    if spans:
+        keep = Q()
+        for athlete_id, (first, last) in spans.items():
+            keep |= Q(athlete_id=athlete_id, date__gte=first, date__lte=last)
+        stale = stale.exclude(keep)
+
     with transaction.atomic():
+        # 採番行のロックで同じ選手の差し替え同士も直列になるので、先に取ってから削除対象を読む
+        revision = change_feed.next_revision()
+        risk_before = _latest_risk_levels(athlete_ids_list)
+        stale_keys = list(stale.values_list("athlete_id", "date"))
         if out_rows:
-            WorkloadFeaturesDaily.objects.bulk_create(out_rows, batch_size=2000)
+            for row in out_rows:
+                row.revision = revision
+            WorkloadFeaturesDaily.objects.bulk_create(
+                out_rows,
+                batch_size=2000,
+                update_conflicts=True,
+                update_fields=FEATURE_UPDATE_FIELDS,
+                unique_fields=["athlete", "date"],
+            )
+        if stale_keys:
+            change_feed.record_tombstones("features", stale_keys, revision)
+            stale.delete()
+        _publish_risk_transitions(risk_before, _latest_risk_levels(athlete_ids_list))
 
-    return len(out_rows)
+
+def _latest_risk_levels(athlete_ids_list: list[str]) -> dict[str, tuple[date, str]]:
+    """athlete_id -> (date, risk_level) of each athlete's latest feature row."""
+    qs = WorkloadFeaturesDaily.objects.all()
+    if athlete_ids_list:
+        qs = qs.filter(athlete_id__in=athlete_ids_list)
+    latest_dates = qs.values("athlete_id").annotate(latest=Max("date")).values("latest")
+    latest = {}
+    for athlete_id, day, risk_level in (
+        qs.filter(date__in=latest_dates).values_list("athlete_id", "date", "risk_level")
+    ):
+        if athlete_id not in latest or day > latest[athlete_id][0]:
+            latest[athlete_id] = (day, risk_level)
+    return latest
+
+
+def _publish_risk_transitions(
+    before: dict[str, tuple[date, str]],
+    after: dict[str, tuple[date, str]],
+) -> None:
+    # ダッシュボードに出る「最新日のリスク」が変わった選手だけを通知する (コミット後)
+    for athlete_id in sorted(set(before) | set(after)):
+        previous = before.get(athlete_id, (None, None))[1]
+        day, current = after.get(athlete_id, (None, None))
+        if previous != current:
+            live_events.publish_on_commit(
+                "risk",
+                athlete_id=athlete_id,
+                date=day,
+                previous=previous,
+                current=current,
+            )
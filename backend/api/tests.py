@@ -1,3 +1,1740 @@
-from django.test import TestCase
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import zipfile
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from math import isnan
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.management import call_command
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+
+from . import (
+    change_feed,
+    db_router,
+    feature_store,
+    live_events,
+    partitions,
+    rebuild_scheduler,
+    renderers,
+    services,
+    views,
+)
+from .athlete_cache import get_athlete_metadata, invalidate_athlete_cache
+from .csv_validation import validate_statsallgroup_csv
+from .lazy_imports import HEAVY_MODULES
+from .models import (
+    Athlete,
+    AthleteMetaVersion,
+    DataUpload,
+    DetachedRawPartition,
+    GpsDaily,
+    GpsSessionRaw,
+    GpsSessionRawIndex,
+    LiveEvent,
+    SyncTombstone,
+    WorkloadFeaturesDaily,
+)
+from .raw_archive import raw_archive_path, read_raw_archive
+from .renderers import ORJSONRenderer
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+LOAD_URLCONF = (
+    "import django; django.setup(); "
+    "from django.urls import get_resolver; get_resolver().url_patterns"
+)
+
+
+def import_profile(*args: str) -> dict[str, int]:
+    """Run ``python -X importtime <args>`` in a fresh process; returns module -> cumulative µs."""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, sys.path))}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            profile[name.strip()] = int(cumulative)
+    return profile
+
+
+class StartupImportTests(SimpleTestCase):
+    """Django startup must not import pandas / numpy (see api.lazy_imports)."""
+
+    def assertNoHeavyImports(self, profile: dict[str, int]):
+        self.assertIn("api.views", profile)
+        heavy = sorted({name.split(".")[0] for name in profile} & set(HEAVY_MODULES))
+        self.assertFalse(heavy, f"imported at startup: {', '.join(heavy)}")
+
+    def test_urlconf_does_not_import_scientific_stack(self):
+        self.assertNoHeavyImports(import_profile("-c", LOAD_URLCONF))
+
+    def test_manage_py_check_does_not_import_scientific_stack(self):
+        # migrate なども同じシステムチェック (URLconf の読み込み) を通る
+        self.assertNoHeavyImports(import_profile("manage.py", "check"))
+
+    def test_pandas_is_loaded_on_first_use(self):
+        code = LOAD_URLCONF + "; " + "; ".join(
+            [
+                "import sys",
+                "from api import services",
+                "assert 'pandas' not in sys.modules",
+                "parsed, _ = services.parse_date_series(['2025-04-01'])",
+                "assert 'pandas' in sys.modules",
+                "assert str(parsed.iloc[0].date()) == '2025-04-01'",
+            ]
+        )
+        import_profile("-c", code)
+
+
+class DatabaseSettingsTests(SimpleTestCase):
+    """POSTGRES_* variables set connection reuse or the psycopg pool on every database alias."""
+
+    def database_settings(self, **env: str) -> dict:
+        base = {
+            key: value
+            for key, value in os.environ.items()
+            if not key.startswith("POSTGRES_") and key != "DATABASE_REPLICA_STANDIN"
+        }
+        base["PYTHONPATH"] = os.pathsep.join(filter(None, sys.path))
+        result = subprocess.run(
+            [sys.executable, "-c", "import json; from config import settings; print(json.dumps(settings.DATABASES))"],
+            cwd=BACKEND_DIR,
+            env={**base, **env},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return json.loads(result.stdout)
+
+    def test_connections_are_reused_by_default(self):
+        default = self.database_settings()["default"]
+        self.assertEqual((default["CONN_MAX_AGE"], default["CONN_HEALTH_CHECKS"]), (60, True))
+        self.assertNotIn("pool", default["OPTIONS"])
+
+    def test_conn_max_age_from_the_environment(self):
+        # 空文字は無期限 (None)、0 はリクエストごとに切断
+        for value, expected in (("", None), ("0", 0), ("300", 300)):
+            with self.subTest(value=value):
+                default = self.database_settings(POSTGRES_CONN_MAX_AGE=value)["default"]
+                self.assertEqual(default["CONN_MAX_AGE"], expected)
+        default = self.database_settings(POSTGRES_CONN_HEALTH_CHECKS="0")["default"]
+        self.assertFalse(default["CONN_HEALTH_CHECKS"])
+
+    def test_pool_replaces_persistent_connections(self):
+        databases = self.database_settings(
+            POSTGRES_POOL="1",
+            POSTGRES_POOL_MIN_SIZE="1",
+            POSTGRES_POOL_MAX_SIZE="4",
+            POSTGRES_POOL_TIMEOUT="2.5",
+            POSTGRES_REPLICA_HOST="replica.local",
+        )
+        for alias in ("default", "replica"):
+            with self.subTest(alias=alias):
+                self.assertEqual(databases[alias]["CONN_MAX_AGE"], 0)
+                self.assertEqual(databases[alias]["OPTIONS"]["pool"], {"min_size": 1, "max_size": 4, "timeout": 2.5})
+        self.assertEqual(databases["replica"]["HOST"], "replica.local")
+
+
+class CsvFilesMixin:
+    """Writes small statsallgroup CSVs into a per-test temporary directory."""
+
+    HEADER = "athlete_id,athlete_name,date,session_name,total_distance,total_player_load\n"
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def write_csv(self, name: str, rows: list[tuple[str, str, float]]) -> Path:
+        path = Path(self.tmp_dir.name) / name
+        path.write_text(
+            self.HEADER + "".join(f"{athlete},{athlete},{day},練習,{distance},{distance / 10}\n" for athlete, day, distance in rows),
+            encoding="utf-8",
+        )
+        return path
+
+    def distances(self) -> dict[tuple[str, str], float]:
+        return {
+            (athlete_id, day.isoformat()): distance
+            for athlete_id, day, distance in GpsDaily.objects.values_list("athlete_id", "date", "total_distance")
+        }
+
+
+class BatchZeroPaddingTests(CsvFilesMixin, TestCase):
+    """Uploads zero-pad only inside each file's own date range and never over existing days."""
+
+    def test_days_between_files_are_left_untouched(self):
+        # pandas 経路 (0) と標準 csv の経路 (既定) の両方
+        for fast_path_bytes in (0, 512 * 1024):
+            with self.subTest(fast_path_bytes=fast_path_bytes), override_settings(
+                WORKLOAD_CSV_FAST_PATH_BYTES=fast_path_bytes
+            ):
+                GpsDaily.objects.all().delete()
+                wednesday = self.write_csv(f"wed_{fast_path_bytes}.csv", [("A001", "2025-04-09", 300.0)])
+                services.import_statsallgroup_csv(wednesday, allow_duplicate=True)
+
+                monday = self.write_csv(f"mon_{fast_path_bytes}.csv", [("A001", "2025-04-07", 100.0), ("A002", "2025-04-07", 110.0)])
+                friday = self.write_csv(f"fri_{fast_path_bytes}.csv", [("A001", "2025-04-11", 500.0)])
+                services.import_statsallgroup_files([(monday, None), (friday, None)], allow_duplicate=True)
+
+                self.assertEqual(
+                    self.distances(),
+                    {
+                        ("A001", "2025-04-07"): 100.0,
+                        ("A002", "2025-04-07"): 110.0,
+                        ("A001", "2025-04-09"): 300.0,
+                        ("A001", "2025-04-11"): 500.0,
+                    },
+                )
+
+    def test_padding_does_not_overwrite_existing_days(self):
+        wednesday = self.write_csv("wed.csv", [("A001", "2025-04-09", 300.0)])
+        services.import_statsallgroup_csv(wednesday)
+
+        # 月〜金のファイルに A001 の水曜がない: 水曜は 0 埋めの対象だが既存の行は残す
+        week = self.write_csv(
+            "week.csv",
+            [("A001", "2025-04-07", 100.0), ("A002", "2025-04-09", 120.0), ("A001", "2025-04-11", 500.0)],
+        )
+        services.import_statsallgroup_csv(week)
+
+        distances = self.distances()
+        self.assertEqual(distances[("A001", "2025-04-09")], 300.0)
+        self.assertEqual(distances[("A001", "2025-04-08")], 0.0)
+        self.assertEqual(distances[("A002", "2025-04-07")], 0.0)
+        self.assertEqual(len(distances), 10)
+
+        # 残した水曜は生データから作り直した値と同じ
+        services.rebuild_gps_daily(athlete_ids=["A001"])
+        self.assertEqual(self.distances()[("A001", "2025-04-09")], 300.0)
+
+    def test_single_file_pads_its_own_range(self):
+        for fast_path_bytes in (0, 512 * 1024):
+            with self.subTest(fast_path_bytes=fast_path_bytes), override_settings(
+                WORKLOAD_CSV_FAST_PATH_BYTES=fast_path_bytes
+            ):
+                GpsDaily.objects.all().delete()
+                path = self.write_csv(
+                    f"single_{fast_path_bytes}.csv",
+                    [("A001", "2025-04-07", 100.0), ("A002", "2025-04-09", 120.0)],
+                )
+                services.import_statsallgroup_csv(path, allow_duplicate=True)
+
+                self.assertEqual(
+                    self.distances(),
+                    {
+                        ("A001", "2025-04-07"): 100.0,
+                        ("A001", "2025-04-08"): 0.0,
+                        ("A001", "2025-04-09"): 0.0,
+                        ("A002", "2025-04-07"): 0.0,
+                        ("A002", "2025-04-08"): 0.0,
+                        ("A002", "2025-04-09"): 120.0,
+                    },
+                )
+
+    def test_multi_file_padding_does_not_overwrite_existing_days(self):
+        for fast_path_bytes in (0, 512 * 1024):
+            with self.subTest(fast_path_bytes=fast_path_bytes), override_settings(
+                WORKLOAD_CSV_FAST_PATH_BYTES=fast_path_bytes
+            ):
+                GpsDaily.objects.all().delete()
+                wednesday = self.write_csv(f"wed_{fast_path_bytes}.csv", [("A001", "2025-04-09", 300.0)])
+                services.import_statsallgroup_csv(wednesday, allow_duplicate=True)
+
+                week = self.write_csv(
+                    f"week_{fast_path_bytes}.csv", [("A001", "2025-04-07", 100.0), ("A001", "2025-04-11", 500.0)]
+                )
+                other = self.write_csv(f"other_{fast_path_bytes}.csv", [("A002", "2025-04-08", 80.0)])
+                services.import_statsallgroup_files([(week, None), (other, None)], allow_duplicate=True)
+
+                self.assertEqual(
+                    self.distances(),
+                    {
+                        ("A001", "2025-04-07"): 100.0,
+                        ("A001", "2025-04-08"): 0.0,
+                        ("A001", "2025-04-09"): 300.0,
+                        ("A001", "2025-04-10"): 0.0,
+                        ("A001", "2025-04-11"): 500.0,
+                        ("A002", "2025-04-08"): 80.0,
+                    },
+                )
+
+
+class SmallCsvPathTests(CsvFilesMixin, TestCase):
+    """Small batches read with the stdlib csv module store what the pandas path stores."""
+
+    HEADER = "athlete_id,athlete_name,date,session_name,total_distance,total_player_load,max_vel\n"
+    CLEAN = "A001,選手A,2025-04-07,練習,100.5,10.25,7.5\nA001,選手A,2025-04-07,補強,20.25,2.5,8.0\nA002,,2025-04-09,練習,110,11,6.5\n"
+    CASES = {
+        "na_tokens": [
+            "A001,NA,2025-04-07,練習,NA,N/A,null\nA001,選手A,2025-04-07,,#N/A,,7.5\n"
+            "A002,nan,2025-04-08,練習,nan,1.5,\nA002,None,2025-04-08,練習,12.5,<NA>,NaN\n"
+        ],
+        "blank_ids": [
+            ",選手X,2025-04-07,練習,100,10,7\n  ,選手Y,2025-04-07,練習,100,10,7\nNA,選手Z,2025-04-07,練習,1,1,1\n"
+            "A001,選手A,,練習,5,5,5\nA001,選手A,NA,練習,5,5,5\nA001,選手A,2025-04-08,練習,50,5,6\n"
+        ],
+        "bad_dates": ["A001,選手A,2025-02-30,練習,100,10,7\nA001,選手A,someday,練習,5,5,5\nA001,選手A,2025-04-08,練習,50,5,6\n"],
+        "non_numeric": ["A001,選手A,2025-04-07,練習,12abc,10,7\nA001,選手A,2025-04-08,練習,1e2,5,fast\n"],
+        "mixed_batch": [CLEAN, "A001,選手A,2025-04-07,練習,1.5,x,9.5\nA002,,2025-04-10,練習,30,3,7\n"],
+    }
+
+    def write_files(self, name: str, texts: list[str]) -> list[tuple[Path, None]]:
+        paths = []
+        for index, text in enumerate(texts):
+            path = Path(self.tmp_dir.name) / f"{name}_{index}.csv"
+            path.write_text(self.HEADER + text, encoding="utf-8")
+            paths.append((path, None))
+        return paths
+
+    def stored(self) -> tuple[list[dict], list[tuple]]:
+        daily = list(GpsDaily.objects.order_by("athlete_id", "date").values(*(
+            field.attname for field in GpsDaily._meta.concrete_fields if field.name not in ("id", "revision")
+        )))
+        raw = list(GpsSessionRaw.objects.order_by("upload__source_filename", "row_number").values_list(
+            "upload__source_filename", "row_number", "athlete_id", "date", "raw_payload"
+        ))
+        return daily, raw
+
+    def import_with(self, fast_path_bytes: int, files: list[tuple[Path, None]]):
+        for model in (GpsSessionRaw, GpsSessionRawIndex, GpsDaily, DataUpload):
+            model.objects.all().delete()
+        with override_settings(WORKLOAD_CSV_FAST_PATH_BYTES=fast_path_bytes):
+            try:
+                services.import_statsallgroup_files(files, allow_duplicate=True)
+            except services.WorkloadIngestionError as exc:
+                return str(exc)
+        return self.stored()
+
+    def test_matches_pandas_path(self):
+        for name, texts in self.CASES.items():
+            with self.subTest(name):
+                files = self.write_files(name, texts)
+                pandas_result = self.import_with(0, files)
+                self.assertEqual(self.import_with(512 * 1024, files), pandas_result)
+
+    def test_pandas_fallback_is_per_file(self):
+        files = [path for path, _ in self.write_files("mixed", self.CASES["mixed_batch"])]
+        with override_settings(WORKLOAD_CSV_FAST_PATH_BYTES=512 * 1024):
+            clean, fallback = services._parse_csv_files(files, encoding_hint=None)
+        self.assertIsNotNone(clean.rows)
+        self.assertIsNone(clean.df_raw)
+        self.assertIsNone(fallback.rows)
+        self.assertIsNotNone(fallback.df_raw)
+
+
+class LoadDataFrameTests(CsvFilesMixin, SimpleTestCase):
+    """load_statsallgroup_dataframe reads the file once, whatever its cells hold."""
+
+    def test_non_numeric_cells_become_nan(self):
+        path = Path(self.tmp_dir.name) / "dash.csv"
+        path.write_text(
+            self.HEADER + "A001,選手A,2025-04-07,練習,-,1\nA001,選手A,2025-04-08,練習, 12 ,True\nA002,,2025-04-08,練習,,2.5\n",
+            encoding="utf-8",
+        )
+        opened = []
+        real_open = Path.open
+
+        def tracking_open(self, *args, **kwargs):
+            opened.append(self.name)
+            return real_open(self, *args, **kwargs)
+
+        with patch.object(Path, "open", tracking_open):
+            df, *_ = services.load_statsallgroup_dataframe(path, encoding="utf-8")
+        self.assertEqual(opened, ["dash.csv"])
+        self.assertEqual(str(df["total_distance"].dtype), "float64")
+        self.assertEqual(df["total_distance"].tolist()[1], 12.0)
+        self.assertTrue(df["total_distance"].iloc[[0, 2]].isna().all())
+        self.assertEqual(df["total_player_load"].iloc[[0, 2]].tolist(), [1.0, 2.5])
+        self.assertTrue(isnan(df["total_player_load"].iloc[1]))
+
+
+class NativeDtypeTests(CsvFilesMixin, TestCase):
+    """WORKLOAD_CSV_NATIVE_DTYPES reads the same values as the default (dtype=str) mode."""
+
+    HEADER = "athlete_id,athlete_name,date,session_name,total_distance,total_player_load,max_vel\n"
+    BODY = (
+        "A001,選手A,2025-04-07,練習,100.5,10.25,7.5\n"
+        "A001,選手A,2025-04-07,補強,-,2.5,\n"
+        "A002,,2025-04-08,練習,,11,6.5\n"
+    )
+
+    def engines(self) -> list[str]:
+        # pyarrow はあれば使う (auto と同じ条件)
+        return ["c", *(["pyarrow"] if services._csv_engine("auto") == "pyarrow" else [])]
+
+    def test_native_frame_matches_default(self):
+        path = Path(self.tmp_dir.name) / "native.csv"
+        path.write_text(self.HEADER + self.BODY, encoding="utf-8")
+        default, *_ = services.load_statsallgroup_dataframe(path, encoding="utf-8", native_dtypes=False)
+
+        for engine in self.engines():
+            for float_dtype in ("float64", "float32"):
+                with self.subTest(engine=engine, float_dtype=float_dtype):
+                    native, _, sum_cols, max_cols, _ = services.load_statsallgroup_dataframe(
+                        path, encoding="utf-8", native_dtypes=True, float_dtype=float_dtype, engine=engine
+                    )
+                    self.assertEqual(str(native["athlete_id"].dtype), "object")
+                    self.assertEqual(native["athlete_id"].tolist(), default["athlete_id"].tolist())
+                    self.assertEqual(native["athlete_name"].tolist(), default["athlete_name"].tolist())
+                    self.assertEqual(native["date_"].tolist(), default["date_"].tolist())
+                    for col in sum_cols + max_cols:
+                        self.assertEqual(str(native[col].dtype), float_dtype)
+                        self.assertEqual(
+                            native[col].astype("float64").fillna(-1).tolist(), default[col].fillna(-1).tolist()
+                        )
+
+    def test_native_ingestion_matches_default(self):
+        stored = {}
+        for native_dtypes in (False, True):
+            with self.subTest(native_dtypes=native_dtypes), override_settings(
+                WORKLOAD_CSV_NATIVE_DTYPES=native_dtypes
+            ):
+                GpsDaily.objects.all().delete()
+                path = Path(self.tmp_dir.name) / f"native_{native_dtypes}.csv"
+                path.write_text(self.HEADER + self.BODY, encoding="utf-8")
+                services.import_statsallgroup_csv(path, allow_duplicate=True)
+                upload = DataUpload.objects.latest("id")
+                stored[native_dtypes] = (
+                    list(
+                        GpsDaily.objects.order_by("athlete_id", "date").values_list(
+                            "athlete_id", "date", "total_distance", "total_player_load", "max_vel"
+                        )
+                    ),
+                    list(upload.raw_rows.order_by("row_number").values_list("date", "raw_payload")),
+                )
+        self.assertEqual(stored[True], stored[False])
+        self.assertEqual(stored[False][0][0][2:], (100.5, 12.75, 7.5))
+
+
+class SchemaPlanTests(SimpleTestCase):
+    """Header plans are reused per distinct header and the registry stays bounded."""
+
+    HEADER = ["athlete_id", "athlete_name", "date", "total_distance", "max_vel", "mean_heart_rate"]
+
+    def setUp(self):
+        services._schema_plans.clear()
+        self.addCleanup(services._schema_plans.clear)
+
+    def test_same_header_reuses_the_plan(self):
+        plan = services.get_schema_plan(self.HEADER)
+        self.assertIs(services.get_schema_plan(list(self.HEADER)), plan)
+        self.assertEqual(len(services._schema_plans), 1)
+        self.assertEqual(
+            (plan.sum_cols, plan.max_cols, plan.mean_cols),
+            (("total_distance",), ("max_vel",), ("mean_heart_rate",)),
+        )
+
+    def test_header_variants_get_their_own_plan(self):
+        plan = services.get_schema_plan(self.HEADER)
+        # 前後の空白・列の順序・別名の違いはそれぞれ別のプラン
+        padded = services.get_schema_plan([" athlete_id", *self.HEADER[1:]])
+        reordered = services.get_schema_plan([self.HEADER[2], *self.HEADER[:2], *self.HEADER[3:]])
+        renamed = services.get_schema_plan(["player_id" if col == "athlete_id" else col for col in self.HEADER])
+        self.assertEqual(len({id(p) for p in (plan, padded, reordered, renamed)}), 4)
+        self.assertEqual(padded.columns[0].source, " athlete_id")
+        self.assertEqual(padded.column_for("athlete_id"), "athlete_id")
+        self.assertEqual(reordered.columns[0].canonical, "date_")
+        self.assertEqual(renamed.column_for("athlete_id"), "player_id")
+
+    def test_unknown_header_is_not_registered(self):
+        with self.assertRaises(services.WorkloadIngestionError):
+            services.get_schema_plan(["name", "total_distance"])
+        self.assertEqual(len(services._schema_plans), 0)
+
+    def test_registry_is_bounded_and_keeps_recent_plans(self):
+        first = services.get_schema_plan(self.HEADER)
+        for index in range(services.SCHEMA_PLANS_MAX + 10):
+            services.get_schema_plan([*self.HEADER, f"extra_{index}"])
+            # 使い続けているプランは追い出されない
+            self.assertIs(services.get_schema_plan(self.HEADER), first)
+        self.assertEqual(len(services._schema_plans), services.SCHEMA_PLANS_MAX)
+        self.assertNotIn(services._header_hash([*self.HEADER, "extra_0"]), services._schema_plans)
+
+    @patch.object(services, "SCHEMA_PLANS_MAX", 8)
+    def test_concurrent_lookups_stay_bounded(self):
+        def lookups(worker: int):
+            for index in range(200):
+                services.get_schema_plan([*self.HEADER, f"w{worker}_{index % 20}"])
+
+        threads = [threading.Thread(target=lookups, args=(worker,)) for worker in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(services._schema_plans), 8)
+
+
+class CsvValidationTests(CsvFilesMixin, TestCase):
+    """validate_statsallgroup_csv scans small files, samples windows of large ones and writes nothing."""
+
+    NOTE = '"1本目\n2本目\n""ダッシュ"" 3本目\n4本目",'
+
+    def write_rows(self, name: str, count: int, *, note: str = "練習,") -> Path:
+        path = Path(self.tmp_dir.name) / name
+        start = date(2025, 4, 1)
+        path.write_text(
+            self.HEADER
+            + "".join(
+                f"A{index % 5:03d},選手,{(start + timedelta(days=index)).isoformat()},{note}{1000 + index},{index % 90}\n"
+                for index in range(count)
+            ),
+            encoding="utf-8",
+        )
+        return path
+
+    def test_small_file_is_scanned_completely(self):
+        path = Path(self.tmp_dir.name) / "small.csv"
+        path.write_text(
+            self.HEADER
+            + "A001,選手A,2025/04/07,練習,100,10\n,選手X,2025/04/07,練習,100,10\n"
+            "A002,選手B,2025/04/08,練習,abc,11\nA003,選手C,2025/04/09,練習,120\n",
+            encoding="utf-8",
+        )
+        report = validate_statsallgroup_csv(path, known_athletes=["A001"])
+        self.assertTrue(report.ok)
+        self.assertTrue(report.full_scan)
+        self.assertEqual(report.encoding, "utf-8")
+        self.assertEqual((report.rows_scanned, report.malformed_rows, report.blank_athlete_ids), (4, 1, 1))
+        self.assertEqual((report.date_min, report.date_max, report.date_parse_rate), ("2025-04-07", "2025-04-08", 1.0))
+        self.assertEqual(report.numeric_failures, {"total_distance": 1})
+        self.assertEqual(report.unknown_athletes, ["A002"])
+        self.assertEqual(len(report.warnings), 4)
+
+    def test_unreadable_dates_are_an_error(self):
+        path = Path(self.tmp_dir.name) / "dates.csv"
+        path.write_text(self.HEADER + "A001,選手A,someday,練習,100,10\nA001,選手A,2025/04/08,練習,100,10\n", encoding="utf-8")
+        report = validate_statsallgroup_csv(path, known_athletes=["A001"])
+        self.assertFalse(report.ok)
+        self.assertEqual(report.date_parse_rate, 0.5)
+
+    @override_settings(WORKLOAD_VALIDATION_SAMPLE_ROWS=80, WORKLOAD_VALIDATION_FULL_SCAN_BYTES=1024)
+    def test_large_file_is_sampled_across_the_file(self):
+        path = self.write_rows("large.csv", 2000)
+        report = validate_statsallgroup_csv(path, known_athletes=["A000", "A001", "A002", "A003", "A004"])
+        self.assertTrue(report.ok)
+        self.assertFalse(report.full_scan)
+        self.assertEqual(report.rows_scanned, 80)
+        self.assertEqual(report.malformed_rows, 0)
+        # 先頭だけでなく末尾近くの窓からも読んでいる
+        self.assertEqual(report.date_min, "2025-04-01")
+        self.assertGreater(report.date_max, (date(2025, 4, 1) + timedelta(days=1700)).isoformat())
+        self.assertEqual(DataUpload.objects.count(), 0)
+
+    def test_window_starting_inside_a_quoted_field(self):
+        # 全行のメモ列が 4 行にまたがるので、ほとんどの窓はクォートの途中から始まる
+        path = self.write_rows("notes.csv", 400, note=self.NOTE)
+        report = validate_statsallgroup_csv(
+            path, known_athletes=["A000", "A001", "A002", "A003", "A004"], sample_rows=80, full_scan_bytes=0
+        )
+        self.assertTrue(report.ok)
+        self.assertEqual(report.rows_scanned, 80)
+        self.assertEqual((report.malformed_rows, report.blank_athlete_ids), (0, 0))
+        self.assertEqual((report.date_parse_rate, report.numeric_failures), (1.0, {}))
+        self.assertEqual(report.warnings, [])
+
+    def test_view_reads_the_upload_without_importing(self):
+        invalidate_athlete_cache()
+        path = self.write_csv("upload.csv", [("A001", "2025-04-07", 100.0), ("A002", "2025-04-08", 110.0)])
+        with path.open("rb") as handle:
+            response = self.client.post("/api/workload/validate/", {"file": handle})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["ok"])
+        self.assertEqual(response.json()["files"][0]["file_name"], "upload.csv")
+        self.assertEqual(response.json()["files"][0]["unknown_athletes"], ["A001", "A002"])
+        self.assertEqual((DataUpload.objects.count(), Athlete.objects.count()), (0, 0))
+
+
+class DateFormatTests(CsvFilesMixin, TestCase):
+    """Slash dates with the year last are month-first, as pandas read them before."""
+
+    def test_slash_dates_are_month_first(self):
+        self.assertEqual(services.parse_date("01/02/2024"), date(2024, 1, 2))
+        parsed, formats = services.parse_date_series(["01/02/2024", "12/31/2024", "2024/03/04"])
+        self.assertEqual([ts.date() for ts in parsed], [date(2024, 1, 2), date(2024, 12, 31), date(2024, 3, 4)])
+        self.assertEqual(formats, ("%m/%d/%Y", "%Y/%m/%d"))
+        self.assertTrue(services.parse_date_series(["31/12/2024"])[0].isna().all())
+
+    def test_ingested_slash_dates_are_month_first(self):
+        for fast_path_bytes in (0, 512 * 1024):
+            with self.subTest(fast_path_bytes=fast_path_bytes), override_settings(
+                WORKLOAD_CSV_FAST_PATH_BYTES=fast_path_bytes
+            ):
+                GpsDaily.objects.all().delete()
+                path = self.write_csv(f"slash_{fast_path_bytes}.csv", [("A001", "01/02/2024", 100.0)])
+                services.import_statsallgroup_csv(path, allow_duplicate=True)
+                self.assertEqual(self.distances(), {("A001", "2024-01-02"): 100.0})
+
+    def test_recheck_moves_rows_stored_day_first(self):
+        path = self.write_csv(
+            "slash.csv",
+            [("A001", "01/02/2024", 100.0), ("A002", "01/03/2024", 120.0), ("A001", "01/04/2024", 140.0)],
+        )
+        services.import_statsallgroup_csv(path)
+        expected = self.distances()
+        upload = DataUpload.objects.get()
+        # 日が先としか読めない値はそのまま
+        GpsSessionRaw.objects.create(
+            upload=DataUpload.objects.create(source_filename="dmy.csv"),
+            row_number=0,
+            athlete_id="A001",
+            date=date(2024, 12, 31),
+            raw_payload={"date_": "31/12/2024"},
+        )
+
+        # 元の文字列のまま残っている行を以前の parse_date (日が先) で補完した状態を作る
+        # (誤った範囲の 0 埋めも含む)
+        for row in GpsSessionRaw.objects.filter(upload=upload):
+            row.raw_payload["date_"] = row.date.strftime("%m/%d/%Y")
+            row.date = date(row.date.year, row.date.day, row.date.month)
+            row.save(update_fields=["date", "raw_payload"])
+        GpsDaily.objects.all().delete()
+        services.rebuild_gps_daily()
+        services._RawDailyAccumulator().to_daily("A001", date(2024, 2, 15)).save()
+        services.refresh_upload_date_ranges([upload.id])
+
+        out = StringIO()
+        call_command("backfill_raw_dates", "--recheck_slash_dates", "--dry_run", stdout=out)
+        self.assertIn("rows stored day-first: 3", out.getvalue())
+        self.assertEqual(GpsDaily.objects.filter(date__month=1).count(), 0)
+
+        call_command("backfill_raw_dates", "--recheck_slash_dates", stdout=StringIO())
+        self.assertEqual(self.distances(), {**expected, ("A001", "2024-12-31"): 0.0})
+        self.assertEqual(
+            sorted(GpsSessionRaw.objects.values_list("date", flat=True)),
+            [date(2024, 1, 2), date(2024, 1, 3), date(2024, 1, 4), date(2024, 12, 31)],
+        )
+        self.assertTrue(SyncTombstone.objects.filter(kind="daily", athlete_id="A001", date=date(2024, 2, 1)).exists())
+        upload.refresh_from_db()
+        self.assertEqual((upload.first_date, upload.last_date), (date(2024, 1, 2), date(2024, 1, 4)))
+
+        out = StringIO()
+        call_command("backfill_raw_dates", "--recheck_slash_dates", stdout=out)
+        self.assertIn("no rows stored day-first", out.getvalue())
+
+    def test_upload_format_memory_is_bounded(self):
+        services._upload_date_formats.clear()
+        for upload_id in range(services.UPLOAD_DATE_FORMATS_MAX + 10):
+            services.parse_upload_dates(upload_id, ["2024-01-02"])
+        self.assertEqual(len(services._upload_date_formats), services.UPLOAD_DATE_FORMATS_MAX)
+        self.assertNotIn(0, services._upload_date_formats)
+        self.assertIn(services.UPLOAD_DATE_FORMATS_MAX + 9, services._upload_date_formats)
+
+
+class DebouncedRebuildTests(CsvFilesMixin, TestCase):
+    """A queued (debounced) rebuild writes the same features as rebuilding per upload."""
+
+    def features(self) -> list[tuple]:
+        return list(
+            WorkloadFeaturesDaily.objects.order_by("athlete_id", "date").values_list(
+                "athlete_id", "date", "acwr_load", "acwr_hsr", "load_per_meter", "monotony_load", "risk_level"
+            )
+        )
+
+    def upload_weeks(self, *, defer_rebuild: bool):
+        first = self.write_csv(
+            f"w1_{defer_rebuild}.csv",
+            [("A001", f"2025-04-{day:02d}", 100.0 + day) for day in range(1, 29)]
+            + [("A002", f"2025-04-{day:02d}", 90.0 + day) for day in range(1, 29, 2)],
+        )
+        services.run_gps_pipeline(first, allow_duplicate=True, defer_rebuild=False)
+        # A001 は水曜から: 月・火は 0 埋めされ、再計算の起点にも含まれる
+        second = self.write_csv(
+            f"w2_{defer_rebuild}.csv",
+            [("A002", "2025-04-28", 150.0), ("A001", "2025-04-30", 200.0), ("A001", "2025-05-02", 210.0)],
+        )
+        summary, _ = services.run_gps_pipeline(second, allow_duplicate=True, defer_rebuild=defer_rebuild)
+        if defer_rebuild:
+            rebuild_scheduler.run_due(force=True)
+        return summary
+
+    def test_matches_immediate_rebuild(self):
+        immediate_summary = self.upload_weeks(defer_rebuild=False)
+        immediate = self.features()
+        WorkloadFeaturesDaily.objects.all().delete()
+        GpsDaily.objects.all().delete()
+        GpsSessionRaw.objects.all().delete()
+        DataUpload.objects.all().delete()
+
+        debounced_summary = self.upload_weeks(defer_rebuild=True)
+        self.assertEqual(debounced_summary.first_dates, {"A001": date(2025, 4, 28), "A002": date(2025, 4, 28)})
+        self.assertEqual(immediate_summary.first_dates, debounced_summary.first_dates)
+        self.assertTrue(immediate)
+        self.assertEqual(self.features(), immediate)
+
+
+class FeatureSwapTests(CsvFilesMixin, TestCase):
+    """_swap_feature_rows replaces an athlete's features in place and drops rows outside the new span."""
+
+    def setUp(self):
+        super().setUp()
+        for athlete_id in ("A001", "A002"):
+            Athlete.objects.create(athlete_id=athlete_id)
+        WorkloadFeaturesDaily.objects.bulk_create(
+            WorkloadFeaturesDaily(athlete_id=athlete_id, date=date(2025, 4, day), risk_level="caution")
+            for athlete_id in ("A001", "A002")
+            for day in range(1, 11)
+        )
+
+    def features(self, athlete_id: str) -> dict[date, str]:
+        return dict(
+            WorkloadFeaturesDaily.objects.filter(athlete_id=athlete_id).values_list("date", "risk_level")
+        )
+
+    def new_rows(self, athlete_id: str, days: range) -> list[WorkloadFeaturesDaily]:
+        return [WorkloadFeaturesDaily(athlete_id=athlete_id, date=date(2025, 4, day), risk_level="safety") for day in days]
+
+    def test_shrinking_span_removes_stale_rows(self):
+        services._swap_feature_rows(self.new_rows("A001", range(3, 8)), ["A001"])
+
+        self.assertEqual(self.features("A001"), {date(2025, 4, day): "safety" for day in range(3, 8)})
+        self.assertEqual(len(self.features("A002")), 10)
+        self.assertEqual(
+            sorted(
+                SyncTombstone.objects.filter(kind="features").values_list("athlete_id", "date")
+            ),
+            [("A001", date(2025, 4, day)) for day in (1, 2, 8, 9, 10)],
+        )
+
+    def test_since_keeps_earlier_rows(self):
+        services._swap_feature_rows(self.new_rows("A001", range(6, 8)), ["A001"], since=date(2025, 4, 6))
+
+        expected = {date(2025, 4, day): "caution" for day in range(1, 6)}
+        expected.update({date(2025, 4, day): "safety" for day in (6, 7)})
+        self.assertEqual(self.features("A001"), expected)
+
+    def test_no_rows_clears_the_athlete(self):
+        services._swap_feature_rows([], ["A001"])
+        self.assertEqual(self.features("A001"), {})
+        self.assertEqual(len(self.features("A002")), 10)
+
+    def test_rebuild_follows_shrinking_daily_rows(self):
+        services.run_gps_pipeline(
+            self.write_csv("april.csv", [("A001", f"2025-04-{day:02d}", 100.0 + day) for day in range(1, 11)]),
+            defer_rebuild=False,
+        )
+        self.assertEqual(max(self.features("A001")), date(2025, 4, 10))
+
+        GpsDaily.objects.filter(athlete_id="A001", date__gt=date(2025, 4, 7)).delete()
+        services.rebuild_workload_features(athlete_ids=["A001"])
+        self.assertEqual(sorted(self.features("A001")), [date(2025, 4, day) for day in range(1, 8)])
+
+
+class StagedIngestionTests(CsvFilesMixin, TransactionTestCase):
+    """A failing ingestion stage leaves a failed upload without raw rows, not a rolled-back one."""
+
+    def test_failed_daily_stage_keeps_the_failed_upload(self):
+        path = self.write_csv("week.csv", [("A001", "2025-04-07", 100.0), ("A002", "2025-04-09", 120.0)])
+        with patch.object(services, "_ingest_daily_rows", side_effect=RuntimeError("disk full")):
+            with self.assertRaises(services.WorkloadIngestionError):
+                services.import_statsallgroup_csv(path)
+
+        upload = DataUpload.objects.get()
+        self.assertEqual(upload.parse_status, "failed")
+        self.assertIn("disk full", upload.error_log)
+        self.assertFalse(GpsSessionRaw.objects.exists())
+        self.assertFalse(GpsDaily.objects.exists())
+        # 選手の登録は最初の段階でコミット済み
+        self.assertEqual(sorted(Athlete.objects.values_list("athlete_id", flat=True)), ["A001", "A002"])
+
+        # 同じファイルを取り込み直せる
+        services.import_statsallgroup_csv(path)
+        self.assertEqual(GpsDaily.objects.count(), 6)
+
+
+class UploadStatsTests(CsvFilesMixin, TestCase):
+    """DataUpload's row / athlete counts and date range follow its stored raw rows."""
+
+    def test_backfill_refreshes_the_date_range(self):
+        athlete = Athlete.objects.create(athlete_id="A001")
+        upload = DataUpload.objects.create(source_filename="old.csv", row_count=2, athlete_count=1)
+        GpsSessionRaw.objects.bulk_create(
+            GpsSessionRaw(upload=upload, row_number=index, athlete=athlete, raw_payload={"date_": value})
+            for index, value in enumerate(["2025-04-03", "04/01/2025"])
+        )
+
+        call_command("backfill_raw_dates", stdout=StringIO())
+
+        upload.refresh_from_db()
+        self.assertEqual((upload.first_date, upload.last_date), (date(2025, 4, 1), date(2025, 4, 3)))
+
+    def test_discarded_upload_has_no_stats(self):
+        path = self.write_csv("week.csv", [("A001", "2025-04-07", 100.0), ("A002", "2025-04-09", 120.0)])
+        summary = services.import_statsallgroup_csv(path)
+        upload = DataUpload.objects.get(id=summary.upload_id)
+        self.assertEqual((upload.row_count, upload.athlete_count), (2, 2))
+
+        services._discard_upload(upload, "aborted")
+
+        upload.refresh_from_db()
+        self.assertEqual(
+            (upload.parse_status, upload.row_count, upload.athlete_count, upload.first_date, upload.last_date),
+            ("failed", 0, 0, None, None),
+        )
+
+
+class BackfillRawDatesTests(TestCase):
+    """backfill_raw_dates fills GpsSessionRaw.date the same way on the SQL and the Python path."""
+
+    VALUES = ["2025-04-03", "2025/04/02", "04/01/2025", " 2025-04-05 ", "2024-02-30", "not a date", ""]
+    EXPECTED = [date(2025, 4, 3), date(2025, 4, 2), date(2025, 4, 1), date(2025, 4, 5), None, None, None]
+
+    def setUp(self):
+        athlete = Athlete.objects.create(athlete_id="A001")
+        self.upload = DataUpload.objects.create(source_filename="old.csv")
+        GpsSessionRaw.objects.bulk_create(
+            GpsSessionRaw(upload=self.upload, row_number=index, athlete=athlete, raw_payload={"date_": value})
+            for index, value in enumerate(self.VALUES)
+        )
+        self.ids = list(GpsSessionRaw.objects.order_by("row_number").values_list("id", flat=True))
+
+    def backfill(self, *args: str) -> str:
+        out = StringIO()
+        call_command("backfill_raw_dates", *args, stdout=out)
+        return out.getvalue()
+
+    def dates(self) -> list[date | None]:
+        return list(GpsSessionRaw.objects.order_by("row_number").values_list("date", flat=True))
+
+    def test_python_path(self):
+        self.assertIn("updated 4 rows", self.backfill("--python", "--batch_size", "2"))
+        self.assertEqual(self.dates(), self.EXPECTED)
+        self.upload.refresh_from_db()
+        self.assertEqual((self.upload.first_date, self.upload.last_date), (date(2025, 4, 1), date(2025, 4, 5)))
+
+    @skipUnless(connection.vendor == "postgresql", "set-based UPDATE is PostgreSQL only")
+    def test_sql_path_matches_python_path(self):
+        # 2024-02-30 を含む範囲は to_date が失敗するので Python で処理される
+        out = self.backfill("--chunk_size", "2")
+        self.assertIn(f"resume with --start_id {self.ids[1] + 1}", out)
+        self.assertIn("updated 4 rows", out)
+        self.assertEqual(self.dates(), self.EXPECTED)
+
+    def test_dry_run_writes_nothing(self):
+        for args in ([], ["--python"]):
+            with self.subTest(args=args):
+                self.assertIn("would update 4 rows", self.backfill("--dry_run", *args))
+                self.assertEqual(self.dates(), [None] * len(self.VALUES))
+
+    def test_id_range(self):
+        self.backfill("--start_id", str(self.ids[1]), "--end_id", str(self.ids[2]))
+        self.assertEqual(self.dates(), [None, *self.EXPECTED[1:3], None, None, None, None])
+
+
+@skipUnless(services._csv_engine("auto") == "pyarrow", "pyarrow is not installed")
+class RawArchiveTests(CsvFilesMixin, TestCase):
+    """RAW_STORAGE_BACKEND=parquet keeps raw rows in a per-upload archive and rebuilds the same daily rows."""
+
+    ROWS = [
+        ("A002", "2025-04-08", 120.0),
+        ("A001", "2025-04-07", 100.0),
+        ("A001", "2025-04-09", 300.0),
+        ("A001", "2025-04-07", 50.0),
+    ]
+
+    def daily(self) -> list[tuple]:
+        return list(
+            GpsDaily.objects.order_by("athlete_id", "date").values_list(
+                "athlete_id", "date", "total_distance", "total_player_load", "max_vel"
+            )
+        )
+
+    def import_with(self, backend: str):
+        GpsDaily.objects.all().delete()
+        with override_settings(RAW_STORAGE_BACKEND=backend, TRAINING_DATA_DIR=Path(self.tmp_dir.name)):
+            summary = services.import_statsallgroup_csv(
+                self.write_csv(f"{backend}.csv", self.ROWS), allow_duplicate=True
+            )
+        return DataUpload.objects.get(id=summary.upload_id)
+
+    def test_archive_is_indexed_by_athlete_day(self):
+        upload = self.import_with("parquet")
+        self.assertEqual(upload.raw_storage, "parquet")
+        self.assertFalse(GpsSessionRaw.objects.exists())
+        self.assertEqual(
+            (upload.row_count, upload.athlete_count, upload.first_date, upload.last_date),
+            (4, 2, date(2025, 4, 7), date(2025, 4, 9)),
+        )
+
+        with override_settings(TRAINING_DATA_DIR=Path(self.tmp_dir.name)):
+            frame = read_raw_archive(upload.id)
+        index = list(upload.raw_index.order_by("row_start").values_list("athlete_id", "date", "row_start", "row_end"))
+        self.assertEqual(
+            [(athlete_id, day) for athlete_id, day, _, _ in index],
+            [("A001", date(2025, 4, 7)), ("A001", date(2025, 4, 9)), ("A002", date(2025, 4, 8))],
+        )
+        for athlete_id, day, row_start, row_end in index:
+            rows = frame.iloc[row_start:row_end]
+            self.assertEqual(set(rows["athlete_id"]), {athlete_id})
+            self.assertEqual({ts.date() for ts in rows["date_"]}, {day})
+        # 同じ選手日の行は読み込み順 (row_number) を保つ
+        self.assertEqual(frame.iloc[0:2]["row_number"].tolist(), [2, 4])
+
+    def test_daily_rows_and_rebuild_match_the_db_backend(self):
+        self.import_with("db")
+        expected = self.daily()
+        GpsSessionRaw.objects.all().delete()
+
+        self.import_with("parquet")
+        self.assertEqual(self.daily(), expected)
+
+        GpsDaily.objects.all().delete()
+        with override_settings(TRAINING_DATA_DIR=Path(self.tmp_dir.name)):
+            services.rebuild_gps_daily()
+        # 作り直しは生データのある日だけ (0 埋めの日は作らない)
+        self.assertEqual(self.daily(), [row for row in expected if row[2]])
+
+    def test_discarded_upload_removes_the_archive(self):
+        upload = self.import_with("parquet")
+        with override_settings(TRAINING_DATA_DIR=Path(self.tmp_dir.name)):
+            path = raw_archive_path(upload.id)
+            self.assertTrue(path.exists())
+            services._discard_upload(upload, "aborted")
+        self.assertFalse(path.exists())
+        self.assertFalse(upload.raw_index.exists())
+
+
+class FeatureStoreTests(CsvFilesMixin, TransactionTestCase):
+    """read_workload_frame returns the export rows as a typed DataFrame, cached per sync revision.
+
+    Each write commits on its own: on PostgreSQL a transaction's writes share one revision.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = Path(self.tmp_dir.name) / "frames"
+        cache_settings = override_settings(WORKLOAD_FRAME_CACHE_DIR=str(self.cache_dir))
+        cache_settings.enable()
+        self.addCleanup(cache_settings.disable)
+        services.run_gps_pipeline(
+            self.write_csv(
+                "week.csv",
+                [("A001", "2025-04-07", 100.0), ("A002", "2025-04-08", 120.0), ("A001", "2025-04-09", 300.0)],
+            ),
+            defer_rebuild=False,
+        )
+        invalidate_athlete_cache()
+
+    def cached_files(self) -> list[str]:
+        return sorted(path.name for path in self.cache_dir.glob("*.pkl"))
+
+    def test_frame_matches_the_stored_rows(self):
+        df = feature_store.read_workload_frame(use_cache=False)
+        daily = list(GpsDaily.objects.order_by("athlete_id", "date").values_list("athlete_id", "date", "total_distance"))
+        self.assertEqual(
+            list(zip(df["athlete_id"].astype(str), df["date"].dt.date, df["total_distance"])),
+            daily,
+        )
+        self.assertEqual(str(df["athlete_id"].dtype), "category")
+        self.assertEqual(str(df["risk_level"].dtype), "category")
+        self.assertEqual(str(df["date"].dtype), "datetime64[ns]")
+        self.assertEqual(str(df["md_offset"].dtype), "Int64")
+        self.assertEqual(str(df["high_decel_count"].dtype), "int64")
+
+        features = {
+            (athlete_id, day): (acwr, params)
+            for athlete_id, day, acwr, params in WorkloadFeaturesDaily.objects.values_list(
+                "athlete_id", "date", "acwr_load", "params"
+            )
+        }
+        keys = list(zip(df["athlete_id"].astype(str), df["date"].dt.date))
+        self.assertEqual(df["acwr_load"].tolist(), [features[key][0] for key in keys])
+        # params は既定で 1 キー 1 列の float に展開される
+        param_columns = [col for col in df.columns if col.startswith("params.")]
+        self.assertTrue(param_columns)
+        self.assertNotIn("params", df.columns)
+        self.assertEqual(param_columns, sorted(param_columns))
+
+        raw = feature_store.read_workload_frame(expand=(), use_cache=False)
+        self.assertEqual(raw["params"].tolist(), [features[key][1] for key in keys])
+
+    def test_filters_and_columns(self):
+        Athlete.objects.filter(athlete_id="A001").update(athlete_name="選手A")
+        invalidate_athlete_cache()
+        df = feature_store.read_workload_frame(
+            "A001", start="2025-04-08", columns=["date", "athlete_name", "total_distance"], use_cache=False
+        )
+        self.assertEqual(list(df.columns), ["date", "athlete_name", "total_distance"])
+        self.assertEqual(df["date"].dt.date.tolist(), [date(2025, 4, 8), date(2025, 4, 9)])
+        self.assertEqual(df["athlete_name"].tolist(), ["選手A", "選手A"])
+        self.assertEqual(df["total_distance"].tolist(), [0.0, 300.0])
+
+    def test_cache_is_reused_until_the_revision_changes(self):
+        fetch = patch.object(feature_store, "_fetch_frame", wraps=feature_store._fetch_frame)
+        with fetch as fetch_frame:
+            first = feature_store.read_workload_frame(["A001"], columns=["athlete_id", "date", "total_distance"])
+            second = feature_store.read_workload_frame(["A001"], columns=["athlete_id", "date", "total_distance"])
+            self.assertEqual(fetch_frame.call_count, 1)
+            self.assertTrue(first.equals(second))
+            self.assertEqual(len(self.cached_files()), 1)
+
+            # 別の条件は別のキャッシュになる
+            feature_store.read_workload_frame(["A002"], columns=["athlete_id", "date", "total_distance"])
+            self.assertEqual(fetch_frame.call_count, 2)
+            self.assertEqual(len(self.cached_files()), 2)
+
+            with transaction.atomic():
+                GpsDaily.objects.filter(athlete_id="A001", date=date(2025, 4, 9)).update(
+                    total_distance=350.0, revision=change_feed.next_revision()
+                )
+            third = feature_store.read_workload_frame(["A001"], columns=["athlete_id", "date", "total_distance"])
+            self.assertEqual(fetch_frame.call_count, 3)
+            self.assertEqual(third["total_distance"].tolist()[-1], 350.0)
+            # 古いリビジョンのファイルは書き込み時に消える
+            self.assertEqual(len(self.cached_files()), 2)
+
+    def test_athlete_name_is_not_cached(self):
+        columns = ["athlete_name", "total_distance"]
+        self.assertEqual(feature_store.read_workload_frame(["A001"], columns=columns)["athlete_name"].tolist()[0], "A001")
+        Athlete.objects.filter(athlete_id="A001").update(athlete_name="選手A")
+        invalidate_athlete_cache()
+        with patch.object(feature_store, "_fetch_frame") as fetch_frame:
+            df = feature_store.read_workload_frame(["A001"], columns=columns)
+        fetch_frame.assert_not_called()
+        self.assertEqual(list(df.columns), columns)
+        self.assertEqual(set(df["athlete_name"]), {"選手A"})
+
+    def test_cache_can_be_disabled_and_cleared(self):
+        feature_store.read_workload_frame(use_cache=False)
+        self.assertEqual(self.cached_files(), [])
+        with override_settings(WORKLOAD_FRAME_CACHE_DIR=""):
+            self.assertIsNone(feature_store.frame_cache_dir())
+            feature_store.read_workload_frame()
+        self.assertEqual(self.cached_files(), [])
+
+        feature_store.read_workload_frame()
+        feature_store.read_workload_frame("A002")
+        self.assertEqual(feature_store.clear_frame_cache(), 2)
+        self.assertEqual(self.cached_files(), [])
+
+
+class RawDailyFoldTests(CsvFilesMixin, TestCase):
+    """fold_raw_daily folds narrowed payloads into the same daily rows the import writes."""
+
+    HEADER = (
+        "athlete_id,athlete_name,date,session_name,total_duration,total_distance,total_player_load,total_jumps,"
+        "max_vel,mean_heart_rate,velocity_band5_total_distance,velocity_band6_total_distance,high_decel_count,"
+        "ima_band2_decel_count,ima_band3_decel_count,dive_left_count,dive_right_count,dive_centre_count,"
+        "total_time_to_feet_left,total_time_to_feet_right,notes\n"
+    )
+    ROWS = (
+        "A001,選手A,2025-04-07,練習,3600,5000.5,400.25,12,7.5,150,300,50,4,1,1,0,0,0,0,0,軽め\n"
+        "A001,選手A,2025-04-07,補強,1200,800,60.5,3,8.25,NA,20,5,2,0,0,0,0,0,0,0,\n"
+        "A001,選手A,2025-04-09,練習,3000,4000,350,8,6.5,140,150,25,5,2,3,2,1,1,1.5,0.75,\n"
+        "A002,選手B,2025-04-07,練習,2400,3500,280,5,7,,100,10,0,0,0,3,2,0,2.5,1.25,GK\n"
+    )
+    FIELDS = ("athlete_id", "date", *(name for name in services.DAILY_UPDATE_FIELDS if name != "revision"))
+
+    def setUp(self):
+        super().setUp()
+        path = Path(self.tmp_dir.name) / "sessions.csv"
+        path.write_text(self.HEADER + self.ROWS, encoding="utf-8")
+        services.import_statsallgroup_csv(path)
+
+    def daily(self, rows, fields=FIELDS) -> list[tuple]:
+        return sorted(tuple(getattr(row, name) for name in fields) for row in rows)
+
+    def test_rebuild_matches_the_imported_rows(self):
+        # metrics は取り込み時には全指標列、作り直しでは合計する列だけを持つので比較から外す
+        fields = [name for name in self.FIELDS if name != "metrics"]
+        raw_days = set(GpsSessionRaw.objects.values_list("athlete_id", "date"))
+        imported = self.daily(
+            (row for row in GpsDaily.objects.all() if (row.athlete_id, row.date) in raw_days), fields
+        )
+        GpsDaily.objects.all().delete()
+        self.assertEqual(services.rebuild_gps_daily(), 3)
+        self.assertEqual(self.daily(GpsDaily.objects.all(), fields), imported)
+
+        day = GpsDaily.objects.get(athlete_id="A001", date=date(2025, 4, 7))
+        self.assertEqual((day.total_distance, day.max_vel, day.hsr_distance), (5800.5, 8.25, 375.0))
+        # 心拍は値のあるセッションだけで平均する
+        self.assertEqual(day.mean_heart_rate, 150.0)
+        self.assertEqual(day.high_decel_count, 6)
+        self.assertIsNone(day.avg_time_to_feet)
+
+        day = GpsDaily.objects.get(athlete_id="A001", date=date(2025, 4, 9))
+        self.assertEqual((day.high_decel_count, day.total_dive_count), (5, 4))
+        self.assertEqual(day.avg_time_to_feet, 2.25 / 4)
+        self.assertIsNone(GpsDaily.objects.get(athlete_id="A002").mean_heart_rate)
+
+    def test_fold_matches_the_full_payloads(self):
+        expected = defaultdict(services._RawDailyAccumulator)
+        for athlete_id, day, payload in GpsSessionRaw.objects.order_by("id").values_list(
+            "athlete_id", "date", "raw_payload"
+        ):
+            expected[(athlete_id, day)].add(payload)
+
+        # date 列が空の古い行は payload の元の日付文字列をパースして同じ選手日に足し込む
+        legacy = GpsSessionRaw.objects.get(athlete_id="A001", date=date(2025, 4, 9))
+        legacy.date = None
+        legacy.raw_payload = {**legacy.raw_payload, "date_": "2025/04/09"}
+        legacy.save(update_fields=["date", "raw_payload"])
+
+        folded = services.fold_raw_daily([])
+        self.assertEqual(sorted(folded), sorted(expected))
+        self.assertEqual(
+            self.daily(acc.to_daily(*key) for key, acc in folded.items()),
+            self.daily(acc.to_daily(*key) for key, acc in expected.items()),
+        )
+        self.assertEqual(sorted(services.fold_raw_daily(["A002"])), [("A002", date(2025, 4, 7))])
+
+
+class ChangeFeedTests(CsvFilesMixin, TransactionTestCase):
+    """/api/workload/sync/ returns the rows written and deleted after the client's token.
+
+    Each write commits on its own: on PostgreSQL a transaction's writes share one revision.
+    """
+
+    def add_daily(self, athlete_id: str, day: date) -> None:
+        with transaction.atomic():
+            GpsDaily.objects.create(athlete_id=athlete_id, date=day, revision=change_feed.next_revision())
+
+    def daily_keys(self, changes: change_feed.ChangeSet) -> list[tuple[str, str]]:
+        return [(row.athlete_id, row.date.isoformat()) for row in changes.daily]
+
+    def test_token_returns_only_later_writes(self):
+        services.import_statsallgroup_csv(self.write_csv("mon.csv", [("A001", "2025-04-07", 100.0)]))
+        first = change_feed.changes_since(None)
+        self.assertTrue(first.reset)
+        self.assertEqual(self.daily_keys(first), [("A001", "2025-04-07")])
+
+        unchanged = change_feed.changes_since(first.token)
+        self.assertEqual((unchanged.reset, unchanged.daily, unchanged.token), (False, [], first.token))
+
+        services.import_statsallgroup_csv(self.write_csv("tue.csv", [("A002", "2025-04-08", 120.0)]))
+        second = change_feed.changes_since(first.token)
+        self.assertFalse(second.reset)
+        self.assertGreater(second.token, first.token)
+        self.assertEqual(self.daily_keys(second), [("A002", "2025-04-08")])
+        self.assertEqual(change_feed.changes_since(first.token, athlete_id="A001").daily, [])
+        self.assertGreaterEqual(change_feed.current_revision(), GpsDaily.objects.get(athlete_id="A002").revision)
+
+    def test_deleted_rows_are_reported_as_tombstones(self):
+        services.import_statsallgroup_csv(self.write_csv("mon.csv", [("A001", "2025-04-07", 100.0)]))
+        self.add_daily("A001", date(2025, 4, 20))
+        token = change_feed.changes_since(None).token
+
+        # 生データのない 4/20 は消え、4/7 は作り直される
+        services.rebuild_gps_daily(delete_existing=True)
+        changes = change_feed.changes_since(token)
+        self.assertEqual(self.daily_keys(changes), [("A001", "2025-04-07")])
+        self.assertEqual(changes.deleted["daily"], [("A001", date(2025, 4, 20))])
+        self.assertEqual(changes.deleted["features"], [])
+
+    def test_token_older_than_pruned_tombstones_resets(self):
+        services.import_statsallgroup_csv(self.write_csv("mon.csv", [("A001", "2025-04-07", 100.0)]))
+        token = change_feed.changes_since(None).token
+        self.add_daily("A001", date(2025, 4, 20))
+        services.rebuild_gps_daily(delete_existing=True)
+        self.assertEqual(SyncTombstone.objects.count(), 1)
+
+        self.assertEqual(change_feed.prune_tombstones(retention_days=-1), 1)
+        changes = change_feed.changes_since(token)
+        self.assertTrue(changes.reset)
+        self.assertEqual(self.daily_keys(changes), [("A001", "2025-04-07")])
+
+
+@skipUnless(connection.vendor == "postgresql", "revisions are transaction ids on PostgreSQL only")
+class ChangeFeedHorizonTests(TransactionTestCase):
+    """The sync token stays below writes that are still in flight, whatever their commit order."""
+
+    def test_token_waits_for_the_oldest_open_writer(self):
+        Athlete.objects.bulk_create([Athlete(athlete_id="A001"), Athlete(athlete_id="A002")])
+        started, release = threading.Event(), threading.Event()
+
+        def slow_writer():
+            try:
+                with transaction.atomic():
+                    GpsDaily.objects.create(athlete_id="A001", date=date(2025, 4, 7), revision=change_feed.next_revision())
+                    started.set()
+                    release.wait(10)
+            finally:
+                connections.close_all()
+
+        writer = threading.Thread(target=slow_writer)
+        writer.start()
+        self.addCleanup(writer.join)
+        self.addCleanup(release.set)
+        self.assertTrue(started.wait(10))
+
+        # 後から始まった書き込みが先にコミットしても、token は遅い書き込みを越えない
+        with transaction.atomic():
+            GpsDaily.objects.create(athlete_id="A002", date=date(2025, 4, 7), revision=change_feed.next_revision())
+        before = change_feed.changes_since(None)
+        self.assertEqual(before.daily, [])
+
+        release.set()
+        writer.join()
+        after = change_feed.changes_since(before.token)
+        self.assertEqual(sorted(row.athlete_id for row in after.daily), ["A001", "A002"])
+
+
+@override_settings(LIVE_EVENTS_POLL_SECONDS=0)
+class LiveEventTests(CsvFilesMixin, TestCase):
+    """/api/workload/events/ streams late commits and keeps ingest events to their uploader."""
+
+    async def read_events(self, events, count: int) -> list[tuple[str, str, dict]]:
+        out = []
+        while len(out) < count:
+            chunk = await anext(events)
+            if chunk.startswith("id: "):
+                event_id, kind, data = chunk.strip().split("\n")
+                out.append((event_id[len("id: "):], kind[len("event: "):], json.loads(data[len("data: "):])))
+        return out
+
+    async def test_event_committed_after_a_larger_id_is_streamed(self):
+        create = sync_to_async(LiveEvent.objects.create)
+        await create(id=3, kind="risk", payload={"athlete_id": "A003"})
+        events = live_events.stream(0)
+        try:
+            self.assertEqual(
+                await self.read_events(events, 1), [("3", "risk", {"athlete_id": "A003"})]
+            )
+
+            # 2 は 3 より後にコミットされた: 再接続の起点 (id) は 3 のまま
+            await create(id=2, kind="risk", payload={"athlete_id": "A002"})
+            await create(id=4, kind="risk", payload={"athlete_id": "A004"})
+            self.assertEqual(
+                await self.read_events(events, 2),
+                [("3", "risk", {"athlete_id": "A002"}), ("4", "risk", {"athlete_id": "A004"})],
+            )
+        finally:
+            await events.aclose()
+
+    async def test_ingest_events_reach_only_their_uploader(self):
+        create = sync_to_async(LiveEvent.objects.create)
+        await create(kind="ingest", payload={"progress_id": "mine", "stage": "parsing"})
+        await create(kind="ingest", payload={"progress_id": "other", "stage": "parsing"})
+        await create(kind="ingest", payload={"progress_id": "", "stage": "parsing"})
+        await create(kind="risk", payload={"athlete_id": "A001"})
+
+        mine = live_events.stream(0, progress_id="mine")
+        try:
+            self.assertEqual(
+                [(kind, payload) for _, kind, payload in await self.read_events(mine, 2)],
+                [
+                    ("ingest", {"progress_id": "mine", "stage": "parsing"}),
+                    ("risk", {"athlete_id": "A001"}),
+                ],
+            )
+        finally:
+            await mine.aclose()
+        anonymous = live_events.stream(0)
+        try:
+            self.assertEqual(
+                [(kind, payload) for _, kind, payload in await self.read_events(anonymous, 1)],
+                [("risk", {"athlete_id": "A001"})],
+            )
+        finally:
+            await anonymous.aclose()
+
+    def test_ingest_events_carry_no_uploader_or_file_names(self):
+        path = self.write_csv("secret_name.csv", [("A001", "2025-04-07", 100.0)])
+        services.import_statsallgroup_files([(path, None)], uploaded_by="coach", progress_id="p1")
+        payloads = list(LiveEvent.objects.filter(kind="ingest").values_list("payload", flat=True))
+        self.assertIn("parsing", [payload["stage"] for payload in payloads])
+        text = json.dumps(payloads, ensure_ascii=False)
+        self.assertNotIn("coach", text)
+        self.assertNotIn("secret_name", text)
+
+
+class AsyncViewTests(CsvFilesMixin, TransactionTestCase):
+    """The async dashboard views answer through the ASGI client with the expected payloads."""
+
+    def setUp(self):
+        super().setUp()
+        services.run_gps_pipeline(
+            self.write_csv(
+                "week.csv",
+                [("A001", "2025-04-07", 100.0), ("A002", "2025-04-08", 120.0), ("A001", "2025-04-09", 300.0)],
+            ),
+            uploaded_by="coach",
+            defer_rebuild=False,
+        )
+        Athlete.objects.filter(athlete_id="A001").update(jersey_number="1", uniform_name="ONE")
+
+    async def test_athlete_list(self):
+        latest = await WorkloadFeaturesDaily.objects.filter(athlete_id="A001").order_by("-date").afirst()
+
+        response = await self.async_client.get("/api/workload/athletes/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            [
+                {
+                    "athlete_id": "A001",
+                    "athlete_name": "A001",
+                    "jersey_number": "1",
+                    "uniform_name": "ONE",
+                    "is_active": True,
+                    "position": "FP",
+                    "risk_level": latest.risk_level,
+                }
+            ],
+        )
+
+        response = await self.async_client.get("/api/workload/athletes/", {"only_unregistered": "1"})
+        self.assertEqual([row["athlete_id"] for row in response.json()], ["A002"])
+        response = await self.async_client.get("/api/workload/athletes/", {"include_unregistered": "1"})
+        self.assertEqual([row["athlete_id"] for row in response.json()], ["A001", "A002"])
+
+    async def test_athlete_timeseries(self):
+        response = await self.async_client.get(
+            "/api/workload/athletes/A001/timeseries/", {"start": "2025-04-08", "end": "2025-04-09"}
+        )
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()
+        self.assertEqual([(row["date"], row["total_distance"]) for row in rows], [("2025-04-08", 0.0), ("2025-04-09", 300.0)])
+        features = await WorkloadFeaturesDaily.objects.aget(athlete_id="A001", date=date(2025, 4, 9))
+        self.assertEqual(rows[1]["workload"]["acwr_load"], features.acwr_load)
+        self.assertEqual(rows[1]["workload"]["risk_level"], features.risk_level)
+
+        response = await self.async_client.get("/api/workload/athletes/A999/timeseries/")
+        self.assertEqual((response.status_code, response.json()), (200, []))
+
+    async def test_upload_history_pages(self):
+        for index in range(2):
+            await DataUpload.objects.acreate(source_filename=f"extra_{index}.csv")
+
+        response = await self.async_client.get("/api/workload/uploads/", {"limit": 2})
+        self.assertEqual(response.status_code, 200)
+        first_page = response.json()
+        self.assertEqual([row["filename"] for row in first_page], ["extra_1.csv", "extra_0.csv"])
+        self.assertIn(f"before={first_page[-1]['upload_id']}", response["Link"])
+
+        response = await self.async_client.get(
+            "/api/workload/uploads/", {"limit": 2, "before": first_page[-1]["upload_id"]}
+        )
+        (week,) = response.json()
+        self.assertNotIn("Link", response)
+        self.assertEqual(
+            {key: week[key] for key in ("filename", "uploaded_by", "status", "rows", "athletes", "first_date", "last_date")},
+            {
+                "filename": "week.csv",
+                "uploaded_by": "coach",
+                "status": "success",
+                "rows": 3,
+                "athletes": 2,
+                "first_date": "2025-04-07",
+                "last_date": "2025-04-09",
+            },
+        )
+
+        response = await self.async_client.get("/api/workload/uploads/", {"before": "latest"})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_sync(self):
+        response = await self.async_client.get("/api/workload/sync/")
+        self.assertEqual(response.status_code, 200)
+        full = response.json()
+        self.assertTrue(full["reset"])
+        self.assertEqual(len(full["daily"]), 6)
+        self.assertEqual(len(full["features"]), await WorkloadFeaturesDaily.objects.acount())
+
+        await sync_to_async(services.rebuild_gps_daily)(athlete_ids=["A002"], delete_existing=True)
+        response = await self.async_client.get("/api/workload/sync/", {"since": full["token"], "athlete_id": "A002"})
+        delta = response.json()
+        self.assertFalse(delta["reset"])
+        self.assertEqual([(row["athlete_id"], row["date"]) for row in delta["daily"]], [("A002", "2025-04-08")])
+        self.assertEqual(
+            delta["deleted"]["daily"],
+            [{"athlete_id": "A002", "date": "2025-04-07"}, {"athlete_id": "A002", "date": "2025-04-09"}],
+        )
+
+        response = await self.async_client.get("/api/workload/sync/", {"since": "abc"})
+        self.assertEqual(response.status_code, 400)
+
+
+class ReadsFromReplicaRouter:
+    """Routes every read to a replica alias that does not exist in the test settings."""
+
+    def db_for_read(self, model, **hints):
+        return "replica"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+
+class AthleteCacheTests(TestCase):
+    @override_settings(DATABASE_ROUTERS=[f"{__name__}.ReadsFromReplicaRouter"])
+    def test_loads_from_the_primary(self):
+        Athlete.objects.create(athlete_id="A001", athlete_name="選手A", position="GK")
+        invalidate_athlete_cache()
+        self.assertEqual(get_athlete_metadata()["A001"].position, "GK")
+
+    def test_version_bumped_by_another_worker_reloads(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Athlete.objects.create(athlete_id="A001", position="FP")
+        self.assertEqual(get_athlete_metadata()["A001"].position, "FP")
+
+        # 別プロセスの書き込み: このプロセスのキャッシュは触らず、コミット後に共有の版だけが上がる
+        Athlete.objects.filter(athlete_id="A001").update(position="GK")
+        self.assertEqual(get_athlete_metadata()["A001"].position, "FP")
+        AthleteMetaVersion.objects.filter(id=1).update(value=F("value") + 1)
+        self.assertEqual(get_athlete_metadata()["A001"].position, "GK")
+
+    def test_version_is_bumped_only_on_commit(self):
+        version = AthleteMetaVersion.objects.get(id=1).value
+        with self.captureOnCommitCallbacks(execute=True):
+            Athlete.objects.create(athlete_id="A001")
+            self.assertEqual(AthleteMetaVersion.objects.get(id=1).value, version)
+            self.assertIn("A001", get_athlete_metadata())
+        self.assertEqual(AthleteMetaVersion.objects.get(id=1).value, version + 1)
+
+
+class ReadAliasRecorderMixin:
+    """Records the read alias bound while SELECTs (on ``table`` if set) run.
+
+    The replica alias is pointed at ``default`` (see override_settings on the
+    test classes) so the queries can run.
+    """
+
+    table: str | None = "gps_daily"
+
+    def setUp(self):
+        super().setUp()
+        self.bound_aliases = []
+
+        def record(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith("SELECT") and (self.table is None or self.table in sql):
+                self.bound_aliases.append(db_router._read_alias.get())
+            return execute(sql, params, many, context)
+
+        wrapper = connection.execute_wrapper(record)
+        wrapper.__enter__()
+        self.addCleanup(wrapper.__exit__, None, None, None)
+
+
+@override_settings(REPLICA_DATABASE_ALIAS="default")
+class ReplicaRoutingTests(ReadAliasRecorderMixin, TestCase):
+    """Dashboard GETs read from the replica alias until the client writes."""
+
+    table = None
+
+    def setUp(self):
+        super().setUp()
+        Athlete.objects.create(athlete_id="A001", athlete_name="A", jersey_number="1", uniform_name="A")
+
+    def test_dashboard_reads_use_the_replica(self):
+        for path in (
+            "/api/workload/athletes/",
+            "/api/workload/athletes/A001/timeseries/",
+            "/api/workload/uploads/",
+            "/api/workload/sync/",
+        ):
+            with self.subTest(path=path):
+                self.assertEqual(self.client.get(path).status_code, 200)
+                self.assertIsNone(db_router._read_alias.get())
+        self.assertEqual(set(self.bound_aliases), {"default"})
+
+    async def test_async_reads_use_the_replica(self):
+        response = await self.async_client.get("/api/workload/athletes/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.bound_aliases, ["default"])
+
+    def test_other_requests_use_the_primary(self):
+        self.client.get("/api/workload/athletes/A001/")
+        self.client.head("/api/workload/athletes/")
+        self.assertTrue(self.bound_aliases)
+        self.assertEqual(set(self.bound_aliases), {None})
+
+    @override_settings(REPLICA_PIN_SECONDS=30)
+    def test_write_pins_the_client_to_the_primary(self):
+        response = self.client.post(
+            "/api/workload/athletes/",
+            {"athlete_id": "A002", "athlete_name": "B", "jersey_number": "2", "uniform_name": "B"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        cookie = response.cookies[db_router.PIN_COOKIE]
+        self.assertEqual((cookie["max-age"], cookie["httponly"], cookie["samesite"]), (30, True, "Lax"))
+
+        self.bound_aliases.clear()
+        self.client.get("/api/workload/athletes/")
+        self.assertEqual(self.bound_aliases, [None])
+
+    def test_failed_write_does_not_pin(self):
+        response = self.client.post("/api/workload/athletes/", {}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn(db_router.PIN_COOKIE, response.cookies)
+
+    @override_settings(REPLICA_DATABASE_ALIAS="replica")
+    def test_without_a_replica_everything_uses_the_primary(self):
+        self.client.get("/api/workload/athletes/")
+        self.assertEqual(self.bound_aliases, [None])
+
+    def test_router_keeps_writes_and_migrations_on_the_primary(self):
+        router = db_router.ReplicaRouter()
+        self.assertEqual(router.db_for_write(Athlete), "default")
+        with patch.object(db_router, "replica_alias", return_value="replica"):
+            self.assertIs(router.allow_migrate("replica", "api"), False)
+            self.assertIsNone(router.allow_migrate("default", "api"))
+
+
+@override_settings(REPLICA_DATABASE_ALIAS="default")
+class ExportRoutingTests(ReadAliasRecorderMixin, TestCase):
+    """The streamed export body is read with the request's read alias still bound."""
+
+    def setUp(self):
+        super().setUp()
+        Athlete.objects.create(athlete_id="A001")
+        GpsDaily.objects.bulk_create(GpsDaily(athlete_id="A001", date=date(2025, 4, day)) for day in range(1, 4))
+
+    def test_wsgi_export_reads_from_the_replica_alias(self):
+        response = self.client.get("/api/workload/export/")
+        body = b"".join(response.streaming_content)
+        self.assertEqual(len(body.splitlines()), 4)
+        self.assertEqual(self.bound_aliases, ["default"])
+        self.assertIsNone(db_router._read_alias.get())
+
+    async def test_asgi_export_reads_from_the_replica_alias(self):
+        response = await self.async_client.get("/api/workload/export/")
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(body.splitlines()), 4)
+        self.assertEqual(self.bound_aliases, ["default"])
+
+    def test_pinned_client_reads_from_the_primary(self):
+        self.client.cookies[db_router.PIN_COOKIE] = "1"
+        b"".join(self.client.get("/api/workload/export/").streaming_content)
+        self.assertEqual(self.bound_aliases, [None])
+
+
+@skipUnless(renderers.orjson is not None, "orjson is not installed")
+class RendererParityTests(SimpleTestCase):
+    """ORJSONRenderer renders what DRF's JSONRenderer renders."""
+
+    def sample(self) -> dict:
+        import numpy as np
+
+        jst = dt_timezone(timedelta(hours=9))
+        return {
+            "aware": datetime(2025, 4, 7, 10, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            "jst": datetime(2025, 4, 7, 19, 30, 15, 987000, tzinfo=jst),
+            "whole_second": datetime(2025, 4, 7, 10, 30, 15, tzinfo=dt_timezone.utc),
+            "naive": datetime(2025, 4, 7, 10, 30, 15, 500),
+            "date": date(2025, 4, 7),
+            "time": time(6, 5, 4, 321987),
+            "duration": timedelta(minutes=95),
+            "decimal": Decimal("1.50"),
+            "text": "ロード\u2028次の行\u2029",
+            "numpy": {"int": np.int64(3), "float": np.float64(0.25), "array": np.arange(3)},
+            "rows": [{"athlete_id": "A001", "risk_reasons": [], "acwr_load": None}],
+        }
+
+    def test_compact_output_matches_json_renderer(self):
+        data = self.sample()
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indented_output_matches_json_renderer(self):
+        data = self.sample()
+        media_type = "application/json; indent=4"
+        self.assertEqual(
+            ORJSONRenderer().render(data, media_type), JSONRenderer().render(data, media_type)
+        )
+
+    def test_nan_becomes_null(self):
+        data = {"acwr_load": float("nan"), "monotony_load": float("inf")}
+        with self.assertRaises(ValueError):
+            JSONRenderer().render(data)
+        self.assertEqual(ORJSONRenderer().render(data), b'{"acwr_load":null,"monotony_load":null}')
+
+
+class ZipUploadLimitTests(SimpleTestCase):
+    """Zip uploads are rejected from their directory, before anything is extracted."""
+
+    def build_zip(self, members: dict[str, bytes]) -> Path:
+        handle, path = tempfile.mkstemp(suffix=".zip")
+        os.close(handle)
+        self.addCleanup(os.unlink, path)
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for name, data in members.items():
+                archive.writestr(name, data)
+        return Path(path)
+
+    def members(self, zip_path: Path) -> list[str]:
+        with zipfile.ZipFile(zip_path) as archive:
+            return [name for _, _, name in views._zip_csv_members(archive)]
+
+    def test_csv_members_within_limits(self):
+        zip_path = self.build_zip({"a.csv": b"athlete_id,date\nA001,2024/04/01\n", "notes.txt": b"x", "d/b.csv": b"x\n"})
+        self.assertEqual(self.members(zip_path), ["a.csv", "b.csv"])
+
+    @override_settings(WORKLOAD_ZIP_MAX_MEMBERS=3)
+    def test_too_many_members(self):
+        zip_path = self.build_zip({f"{index}.csv": b"x\n" for index in range(4)})
+        with self.assertRaises(services.WorkloadIngestionError):
+            self.members(zip_path)
+
+    def test_high_compression_ratio(self):
+        zip_path = self.build_zip({"bomb.csv": b"0" * (8 << 20)})
+        with self.assertRaises(services.WorkloadIngestionError):
+            self.members(zip_path)
+
+    @override_settings(WORKLOAD_ZIP_MAX_FILE_BYTES=1000, WORKLOAD_ZIP_MAX_TOTAL_BYTES=1500)
+    def test_uncompressed_size_per_file_and_in_total(self):
+        row = bytes(range(32, 127)) + b"\n"
+        with self.assertRaises(services.WorkloadIngestionError):
+            self.members(self.build_zip({"big.csv": row * 12}))
+        with self.assertRaises(services.WorkloadIngestionError):
+            self.members(self.build_zip({"a.csv": row * 8, "b.csv": row * 8}))
+        self.assertEqual(self.members(self.build_zip({"a.csv": row * 8})), ["a.csv"])
+
+
+@skipUnless(connection.vendor == "postgresql", "gps_sessions_raw is partitioned on PostgreSQL only")
+class RawPartitionTests(TestCase):
+    """Every gps_sessions_raw partition keeps GpsSessionRaw.id unique."""
+
+    def setUp(self):
+        self.athlete = Athlete.objects.create(athlete_id="A001")
+        self.upload = DataUpload.objects.create(source_filename="raw.csv")
+
+    def raw_row(self, **fields) -> GpsSessionRaw:
+        return GpsSessionRaw.objects.create(upload=self.upload, row_number=0, athlete=self.athlete, raw_payload={}, **fields)
+
+    def test_duplicate_ids_are_rejected_in_every_partition(self):
+        partitions.ensure_partitions(connection, date(2031, 4, 1), date(2031, 4, 1), "month")
+        for day in (None, date.today(), date(2031, 4, 15)):
+            with self.subTest(day=day):
+                row = self.raw_row(date=day)
+                with self.assertRaises(IntegrityError), transaction.atomic():
+                    GpsSessionRaw.objects.create(
+                        id=row.id, upload=self.upload, row_number=1, athlete=self.athlete, date=day, raw_payload={}
+                    )
+
+    def test_rebuild_keeps_daily_rows_of_detached_partitions(self):
+        partitions.ensure_partitions(connection, date(2031, 4, 1), date(2031, 4, 1), "month")
+        self.raw_row(date=date(2031, 4, 10))
+        self.raw_row(date=date(2031, 5, 10))
+        services.rebuild_gps_daily()
+        GpsDaily.objects.create(athlete=self.athlete, date=date(2031, 5, 11))
+
+        partitions.detach_partition(connection, "gps_sessions_raw_m203104", drop=True)
+        self.assertEqual(
+            list(DetachedRawPartition.objects.values_list("start", "end", "dropped")),
+            [(date(2031, 4, 1), date(2031, 5, 1), True)],
+        )
+        services.rebuild_gps_daily(delete_existing=True)
+
+        # 4 月は生データがもうないので残し、5 月の生データにない日は消す
+        self.assertEqual(
+            sorted(GpsDaily.objects.values_list("date", flat=True)),
+            [date(2031, 4, 10), date(2031, 5, 10)],
+        )
+
+    def test_row_keeps_its_id_when_backfill_moves_it_out_of_the_default_partition(self):
+        row = self.raw_row(date=None)
+        GpsSessionRaw.objects.filter(id=row.id).update(date=date.today())
+        self.assertEqual(GpsSessionRaw.objects.get(pk=row.id).date, date.today())
+
+
+@skipUnless(connection.vendor == "postgresql", "query plans are checked on PostgreSQL (see README)")
+class DashboardQueryPlanTests(TransactionTestCase):
+    """The dashboard's hot queries are answered from the indexes in migration 0007
+    and the upload stats columns in 0008."""
+
+    START = date(2025, 4, 1)
+
+    def setUp(self):
+        athletes = Athlete.objects.bulk_create(Athlete(athlete_id=f"A{i:03d}") for i in range(50))
+        uploads = [DataUpload.objects.create(source_filename=f"u{i}.csv") for i in range(3)]
+        raw_rows, index_rows, daily_rows, feature_rows = [], [], [], []
+        for day in range(60):
+            date_ = self.START + timedelta(days=day)
+            upload = uploads[day % 2]
+            for athlete in athletes:
+                raw_rows.append(
+                    GpsSessionRaw(upload=upload, row_number=len(raw_rows), athlete=athlete, date=date_, raw_payload={})
+                )
+                index_rows.append(
+                    GpsSessionRawIndex(upload=uploads[2], athlete=athlete, date=date_, row_start=day, row_end=day + 1)
+                )
+                daily_rows.append(GpsDaily(athlete=athlete, date=date_))
+                risk = ("safety", "safety", "safety", "caution", "risky")[(day + len(feature_rows)) % 5]
+                feature_rows.append(WorkloadFeaturesDaily(athlete=athlete, date=date_, risk_level=risk))
+        GpsSessionRaw.objects.bulk_create(raw_rows)
+        GpsSessionRawIndex.objects.bulk_create(index_rows)
+        GpsDaily.objects.bulk_create(daily_rows)
+        WorkloadFeaturesDaily.objects.bulk_create(feature_rows)
+        self.upload_ids = [upload.id for upload in uploads]
+
+        with connection.cursor() as cursor:
+            # visibility map を埋めないと index-only scan でもヒープを読む見積もりになる
+            for model in (GpsSessionRaw, GpsSessionRawIndex, GpsDaily, WorkloadFeaturesDaily):
+                cursor.execute(f"VACUUM ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+            # 数百行だとシーケンシャルスキャンが選ばれるので、使えるインデックスがあるかだけを見る
+            cursor.execute("SET enable_seqscan = off")
+            cursor.execute("SET enable_bitmapscan = off")
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute("RESET ALL")
+
+    def test_latest_risk_level_is_index_only(self):
+        # WorkloadAthleteListView の risk_level_sq
+        risk_level_sq = WorkloadFeaturesDaily.objects.filter(
+            athlete_id=OuterRef("athlete_id")
+        ).order_by("-date").values("risk_level")[:1]
+        plan = Athlete.objects.annotate(risk_level=Subquery(risk_level_sq)).values_list("risk_level").explain()
+        self.assertIn("Index Only Scan using wfd_athlete_latest_idx", plan)
+
+    def test_at_risk_rows_use_partial_index(self):
+        plan = (
+            WorkloadFeaturesDaily.objects.exclude(risk_level="safety")
+            .filter(date__gte=self.START + timedelta(days=20))
+            .values_list("athlete_id", "date", "risk_level")
+            .explain()
+        )
+        self.assertIn("Index Only Scan using wfd_at_risk_idx", plan)
+
+    def test_upload_history_is_a_primary_key_range_read(self):
+        # WorkloadUploadHistoryView は取り込み時に記録した集計を data_uploads から読むだけ
+        plan = (
+            DataUpload.objects.filter(id__lt=self.upload_ids[-1])
+            .order_by("-id")
+            .values("id", "row_count", "athlete_count")[:20]
+            .explain()
+        )
+        self.assertIn("Index Scan Backward using data_uploads_pkey", plan)
+        self.assertNotIn("gps_sessions_raw", plan)
+
+    def test_upload_stats_are_index_only(self):
+        # アップロードごとの行数・選手数 (0008 の backfill)。gps_sessions_raw は日付で分割されたパーティションごと
+        plan = (
+            GpsSessionRaw.objects.filter(upload_id__in=self.upload_ids)
+            .values("upload_id")
+            .annotate(rows=Count("*"), athletes=Count("athlete_id", distinct=True))
+            .explain()
+        )
+        self.assertIn("Index Only Scan", plan)
+        self.assertNotIn("Seq Scan", plan)
+
+        plan = (
+            GpsSessionRawIndex.objects.filter(upload_id__in=self.upload_ids)
+            .values("upload_id")
+            .annotate(rows=Sum(F("row_end") - F("row_start")), athletes=Count("athlete_id", distinct=True))
+            .explain()
+        )
+        self.assertIn("Index Only Scan using gps_raw_index_upload_idx", plan)
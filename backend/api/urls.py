@@ -2,9 +2,13 @@ from django.urls import path
 from .views import (
     GpsUploadView,
     WorkloadIngestionView,
+    WorkloadValidationView,
     WorkloadAthleteListView,
     WorkloadAthleteDetailView,
     WorkloadAthleteTimeseriesView,
+    WorkloadEventStreamView,
+    WorkloadExportView,
+    WorkloadSyncView,
     WorkloadUploadHistoryView,
 )
 
@@ -15,6 +19,10 @@ urlpatterns = [
     # 【ここを修正】フロントエンドに合わせてパスを変更
     path('workload/athletes/<str:athlete_id>/timeseries/', WorkloadAthleteTimeseriesView.as_view(), name='workload-timeseries'),
     path('workload/ingest/', WorkloadIngestionView.as_view(), name='workload-ingest'),
+    path('workload/validate/', WorkloadValidationView.as_view(), name='workload-validate'),
+    path('workload/events/', WorkloadEventStreamView.as_view(), name='workload-events'),
+    path('workload/export/', WorkloadExportView.as_view(), name='workload-export'),
+    path('workload/sync/', WorkloadSyncView.as_view(), name='workload-sync'),
     path('workload/uploads/', WorkloadUploadHistoryView.as_view(), name='workload-uploads'),
     path('ingest/', WorkloadIngestionView.as_view(), name='ingest'),
     path('upload/gps/', GpsUploadView.as_view(), name='upload-gps'),
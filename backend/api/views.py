@@ -1,27 +1,36 @@
+import shutil
+import zipfile
 from pathlib import Path
-from tempfile import NamedTemporaryFile
+from tempfile import NamedTemporaryFile, TemporaryDirectory
 
+from adrf.views import APIView as AsyncAPIView
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.db import transaction
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils.dateparse import parse_date
-from django.db.models import Count, OuterRef, Subquery, Value, Q
+from django.db.models import OuterRef, Q, Subquery, Value
 from django.db.models.functions import Coalesce
+from django.views import View
 from rest_framework import status
 from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from . import exports, live_events
+from .change_feed import changes_since
+from .csv_validation import validate_statsallgroup_csv
 from .serializers import WorkloadIngestionRequestSerializer
 from .services import (
     WorkloadIngestionError,
     run_gps_pipeline,
+    run_gps_pipeline_files,
 )
 
 from .models import (
     Athlete,
     DataUpload,
     GpsDaily,
-    GpsSessionRaw,
     WorkloadFeaturesDaily,
 )
 
@@ -38,6 +47,59 @@ def _is_truthy(value) -> bool:
     return str(value).strip().lower() in {"1", "true", "yes", "on"}
 
 
+def _save_uploaded_file(uploaded_file, target_dir: Path) -> Path:
+    suffix = Path(getattr(uploaded_file, 'name', '') or '').suffix or '.csv'
+    with NamedTemporaryFile(suffix=suffix, delete=False, dir=target_dir) as tmp_file:
+        for chunk in uploaded_file.chunks():
+            tmp_file.write(chunk)
+    return Path(tmp_file.name)
+
+
+def _zip_csv_members(archive: zipfile.ZipFile) -> list[tuple[int, zipfile.ZipInfo, str]]:
+    """CSV members of a zip as (index, member, name), after checking the upload limits.
+
+    The declared sizes are checked before anything is decompressed; zipfile
+    stops reading a member at its declared file_size, so they also bound the
+    extracted bytes.
+    """
+    infolist = archive.infolist()
+    max_members = int(getattr(settings, "WORKLOAD_ZIP_MAX_MEMBERS", 500))
+    if len(infolist) > max_members:
+        raise WorkloadIngestionError(f"zip のファイル数が多すぎます ({len(infolist)} > {max_members})")
+
+    max_file_bytes = int(getattr(settings, "WORKLOAD_ZIP_MAX_FILE_BYTES", 1 << 30))
+    max_total_bytes = int(getattr(settings, "WORKLOAD_ZIP_MAX_TOTAL_BYTES", 2 << 30))
+    max_ratio = float(getattr(settings, "WORKLOAD_ZIP_MAX_RATIO", 200))
+    members = []
+    total_bytes = 0
+    for index, member in enumerate(infolist):
+        name = Path(member.filename).name
+        if member.is_dir() or not name.lower().endswith('.csv') or name.startswith('.'):
+            continue
+        if member.file_size > max_file_bytes:
+            raise WorkloadIngestionError(f"{name}: 展開後のサイズが上限を超えています ({member.file_size} bytes)")
+        if member.file_size > max_ratio * max(member.compress_size, 1):
+            raise WorkloadIngestionError(f"{name}: 圧縮率が高すぎます")
+        total_bytes += member.file_size
+        if total_bytes > max_total_bytes:
+            raise WorkloadIngestionError(f"zip の展開後の合計サイズが上限 ({max_total_bytes} bytes) を超えています")
+        members.append((index, member, name))
+    return members
+
+
+def _extract_zip_csvs(zip_path: Path, target_dir: Path) -> list[tuple[Path, str]]:
+    """Extract the CSV members of a zip into target_dir; returns (path, original name)."""
+    extracted = []
+    with zipfile.ZipFile(zip_path) as archive:
+        for index, member, name in _zip_csv_members(archive):
+            # zip 内のパスは使わない (ディレクトリトラバーサル対策)
+            target = target_dir / f"{index:04d}_{name}"
+            with archive.open(member) as src, target.open('wb') as dst:
+                shutil.copyfileobj(src, dst)
+            extracted.append((target, name))
+    return extracted
+
+
 class WorkloadIngestionView(APIView):
     parser_classes = (MultiPartParser, FormParser, JSONParser)
 
@@ -46,9 +108,22 @@ class WorkloadIngestionView(APIView):
         serializer.is_valid(raise_exception=True)
 
         uploaded_file = serializer.validated_data.get('file')
-        temp_path: Path | None = None
+        uploaded_files = serializer.validated_data.get('files') or []
         uploaded_by = serializer.validated_data.get('uploaded_by') or ""
         allow_duplicate = serializer.validated_data.get("allow_duplicate", False)
+        progress_id = serializer.validated_data.get("progress_id") or ""
+
+        if uploaded_file and zipfile.is_zipfile(uploaded_file):
+            uploaded_file.seek(0)
+            uploaded_files = [uploaded_file]
+            uploaded_file = None
+        elif uploaded_file:
+            uploaded_file.seek(0)
+
+        if uploaded_files:
+            return self._post_batch(uploaded_files, uploaded_by, allow_duplicate, progress_id)
+
+        temp_path: Path | None = None
 
         try:
             target_filename: str
@@ -58,11 +133,7 @@ class WorkloadIngestionView(APIView):
                 )
                 data_dir.mkdir(parents=True, exist_ok=True)
 
-                suffix = Path(getattr(uploaded_file, 'name', '') or '').suffix or '.csv'
-                with NamedTemporaryFile(suffix=suffix, delete=False, dir=data_dir) as tmp_file:
-                    for chunk in uploaded_file.chunks():
-                        tmp_file.write(chunk)
-                    temp_path = Path(tmp_file.name)
+                temp_path = _save_uploaded_file(uploaded_file, data_dir)
                 target_filename = str(temp_path)
                 original_filename = Path(getattr(uploaded_file, "name", "") or "").name
             else:
@@ -74,6 +145,7 @@ class WorkloadIngestionView(APIView):
                 uploaded_by=uploaded_by,
                 source_filename=original_filename or None,
                 allow_duplicate=allow_duplicate,
+                progress_id=progress_id,
             )
         except WorkloadIngestionError as exc:
             return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
@@ -87,6 +159,104 @@ class WorkloadIngestionView(APIView):
         payload["updated_features"] = features
         return Response(payload, status=status.HTTP_200_OK)
 
+    def _post_batch(self, uploaded_files, uploaded_by: str, allow_duplicate: bool, progress_id: str):
+        data_dir = Path(getattr(settings, 'TRAINING_DATA_DIR', settings.BASE_DIR / 'data'))
+        data_dir.mkdir(parents=True, exist_ok=True)
+
+        with TemporaryDirectory(dir=data_dir) as tmp_dir:
+            tmp_root = Path(tmp_dir)
+            files: list[tuple[Path, str]] = []
+            try:
+                for uploaded in uploaded_files:
+                    saved = _save_uploaded_file(uploaded, tmp_root)
+                    name = Path(getattr(uploaded, "name", "") or "").name
+                    if zipfile.is_zipfile(saved):
+                        files.extend(_extract_zip_csvs(saved, tmp_root))
+                    else:
+                        files.append((saved, name))
+
+                if not files:
+                    return Response(
+                        {'detail': 'CSV ファイルが含まれていません。'},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+
+                summaries, features = run_gps_pipeline_files(
+                    files,
+                    uploaded_by=uploaded_by,
+                    allow_duplicate=allow_duplicate,
+                    progress_id=progress_id,
+                )
+            except (WorkloadIngestionError, zipfile.BadZipFile) as exc:
+                return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+            except Exception as exc:
+                return Response({'detail': str(exc)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        return Response(
+            {
+                "uploads": [summary.as_dict() for summary in summaries],
+                "rows_imported": sum(summary.rows_imported for summary in summaries),
+                "updated_features": features,
+                "feature_rebuild": next(
+                    (summary.feature_rebuild for summary in summaries if summary.feature_rebuild),
+                    None,
+                ),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class WorkloadValidationView(APIView):
+    """Check CSVs (file / files / zip / filename) without importing them."""
+
+    parser_classes = (MultiPartParser, FormParser, JSONParser)
+
+    def post(self, request):
+        serializer = WorkloadIngestionRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        uploaded_files = list(serializer.validated_data.get('files') or [])
+        if serializer.validated_data.get('file'):
+            uploaded_files.append(serializer.validated_data['file'])
+
+        try:
+            if uploaded_files:
+                reports = []
+                for uploaded in uploaded_files:
+                    name = Path(getattr(uploaded, "name", "") or "").name
+                    if zipfile.is_zipfile(uploaded):
+                        reports.extend(_validate_zip(uploaded))
+                    else:
+                        # アップロードされたファイルをそのまま読む (一時ファイルは作らない)
+                        reports.append(validate_statsallgroup_csv(uploaded.file, name=name))
+            else:
+                reports = [validate_statsallgroup_csv(serializer.validated_data['filename'])]
+        except (WorkloadIngestionError, zipfile.BadZipFile) as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not reports:
+            return Response(
+                {'detail': 'CSV ファイルが含まれていません。'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(
+            {
+                "ok": all(report.ok for report in reports),
+                "files": [report.as_dict() for report in reports],
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+def _validate_zip(uploaded_file) -> list:
+    uploaded_file.seek(0)
+    reports = []
+    with zipfile.ZipFile(uploaded_file) as archive:
+        for _, member, name in _zip_csv_members(archive):
+            with archive.open(member) as handle:
+                reports.append(validate_statsallgroup_csv(handle, name=name))
+    return reports
+
 
 class GpsUploadView(APIView):
     parser_classes = (MultiPartParser, FormParser)
@@ -101,6 +271,7 @@ class GpsUploadView(APIView):
 
         uploaded_by = request.data.get("user") or request.data.get("uploaded_by") or ""
         allow_duplicate = _is_truthy(request.data.get("allow_duplicate"))
+        progress_id = request.data.get("progress_id") or ""
         temp_path: Path | None = None
 
         try:
@@ -114,12 +285,13 @@ class GpsUploadView(APIView):
                     tmp_file.write(chunk)
                 temp_path = Path(tmp_file.name)
 
-            with transaction.atomic():
-                summary, features = run_gps_pipeline(
-                    temp_path,
-                    uploaded_by=uploaded_by,
-                    allow_duplicate=allow_duplicate,
-                )
+            # 取り込みは内部で段階ごとに短いトランザクションを張る
+            summary, features = run_gps_pipeline(
+                temp_path,
+                uploaded_by=uploaded_by,
+                allow_duplicate=allow_duplicate,
+                progress_id=progress_id,
+            )
 
             if summary.skipped:
                 return Response(
@@ -135,6 +307,7 @@ class GpsUploadView(APIView):
                     "status": "success",
                     "imported_rows": summary.rows_imported,
                     "updated_features": features,
+                    "feature_rebuild": summary.feature_rebuild,
                 },
                 status=status.HTTP_201_CREATED,
             )
@@ -155,48 +328,46 @@ class GpsUploadView(APIView):
 
 # === 以下、Workload関連ビュー（修正版） ===
 
-class WorkloadAthleteListView(APIView):
-    def get(self, request):
+class WorkloadAthleteListView(AsyncAPIView):
+    async def get(self, request):
         include_unregistered = _is_truthy(request.query_params.get("include_unregistered"))
         only_unregistered = _is_truthy(request.query_params.get("only_unregistered"))
 
         # 登録済み（名前と背番号がある）選手のみ表示
+        # (athlete, date) は一意なので date だけで並べる (wfd_athlete_latest_idx だけで引ける)
         risk_level_sq = WorkloadFeaturesDaily.objects.filter(
             athlete_id=OuterRef("athlete_id")
-        ).order_by("-date", "-id").values("risk_level")[:1]
+        ).order_by("-date").values("risk_level")[:1]
 
+        # メタデータとリスクを 1 回のクエリで引く (別プロセスのキャッシュに頼らず、レプリカに回せる)
         qs = Athlete.objects.all()
         if only_unregistered:
-            qs = qs.filter(
-                Q(athlete_name="") | Q(jersey_number="") | Q(uniform_name="")
-            )
+            qs = qs.filter(Q(athlete_name="") | Q(jersey_number="") | Q(uniform_name=""))
         elif not include_unregistered:
-            qs = qs.filter(
-                athlete_name__gt="", jersey_number__gt="", uniform_name__gt=""
-            )
+            qs = qs.filter(athlete_name__gt="", jersey_number__gt="", uniform_name__gt="")
 
-        qs = qs.annotate(
-            risk_level=Coalesce(Subquery(risk_level_sq), Value("safety"))
-        )
+        qs = qs.annotate(risk_level=Coalesce(Subquery(risk_level_sq), Value("safety")))
         if include_unregistered:
             qs = qs.order_by("athlete_id")
         else:
             qs = qs.order_by("jersey_number", "athlete_name")
-        data = []
-        for a in qs:
-            data.append({
-                "athlete_id": a.athlete_id,
-                "athlete_name": a.athlete_name,
-                "jersey_number": a.jersey_number,
-                "uniform_name": a.uniform_name,
-                "is_active": a.is_active,
-                "position": a.position,  # ★DBの値 ("GK" or "FP")
-                "risk_level": a.risk_level,
-            })
-            
+
+        # position は DB の値 ("GK" or "FP")
+        data = [
+            athlete
+            async for athlete in qs.values(
+                "athlete_id",
+                "athlete_name",
+                "jersey_number",
+                "uniform_name",
+                "is_active",
+                "position",
+                "risk_level",
+            )
+        ]
         return Response(data, status=status.HTTP_200_OK)
 
-    def post(self, request):
+    async def post(self, request):
         athlete_id = str(request.data.get("athlete_id", "")).strip()
         athlete_name = str(request.data.get("athlete_name", "")).strip()
         jersey_number = str(request.data.get("jersey_number", "")).strip()
@@ -223,7 +394,7 @@ class WorkloadAthleteListView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        athlete, created = Athlete.objects.update_or_create(
+        athlete, created = await Athlete.objects.aupdate_or_create(
             athlete_id=athlete_id,
             defaults={
                 "athlete_name": athlete_name,
@@ -271,8 +442,56 @@ class WorkloadAthleteDetailView(APIView):
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-class WorkloadAthleteTimeseriesView(APIView):
-    def get(self, request, athlete_id: str):
+def _daily_payload(d: GpsDaily) -> dict:
+    metrics = d.metrics or {}
+    total_dive_load = metrics.get("total_dive_load")
+    if total_dive_load is None:
+        total_dive_load = (
+            (metrics.get("total_dive_load_left") or 0)
+            + (metrics.get("total_dive_load_right") or 0)
+            + (metrics.get("total_dive_load_centre") or 0)
+        )
+    return {
+        "date": d.date,
+        "is_match_day": d.is_match_day,
+        "md_offset": d.md_offset,
+
+        "total_duration": d.total_duration,
+        "total_distance": d.total_distance,
+        "total_player_load": d.total_player_load,
+        "max_vel": d.max_vel,
+        "mean_heart_rate": d.mean_heart_rate,
+        "hsr_distance": d.hsr_distance,
+        "high_decel_count": d.high_decel_count,
+        "total_dive_count": d.total_dive_count,
+        "avg_time_to_feet": d.avg_time_to_feet,
+        "total_dive_load": total_dive_load,
+        "total_jumps": d.total_jumps,
+
+        "metrics": metrics,
+    }
+
+
+def _workload_payload(w: dict | None) -> dict:
+    params = (w.get("params") or {}) if w else {}
+    return {
+        "acwr_load": w.get("acwr_load") if w else None,
+        "acwr_total_distance": w.get("acwr_load") if w else None,
+        "acwr_hsr": w.get("acwr_hsr") if w else None,
+        "acwr_dive": w.get("acwr_dive") if w else None,
+        "efficiency_index": w.get("efficiency_index") if w else None,
+        "monotony_load": w.get("monotony_load") if w else None,
+        "load_per_meter": w.get("load_per_meter") if w else None,
+        "val_asymmetry": params.get("val_asymmetry") if w else None,
+        "decel_density": params.get("decel_density") if w else None,
+        "time_to_feet": params.get("time_to_feet") if w else None,
+        "risk_level": w.get("risk_level") if w else None,
+        "risk_reasons": w.get("risk_reasons") if w else [],
+    }
+
+
+class WorkloadAthleteTimeseriesView(AsyncAPIView):
+    async def get(self, request, athlete_id: str):
         start = _parse_ymd(request.query_params.get("start"))
         end = _parse_ymd(request.query_params.get("end"))
 
@@ -283,35 +502,7 @@ class WorkloadAthleteTimeseriesView(APIView):
         if end:
             gqs = gqs.filter(date__lte=end)
 
-        rows = []
-        for d in gqs.iterator(chunk_size=2000):
-            metrics = d.metrics or {}
-            total_dive_load = metrics.get("total_dive_load")
-            if total_dive_load is None:
-                total_dive_load = (
-                    (metrics.get("total_dive_load_left") or 0)
-                    + (metrics.get("total_dive_load_right") or 0)
-                    + (metrics.get("total_dive_load_centre") or 0)
-                )
-            rows.append({
-                "date": d.date,
-                "is_match_day": d.is_match_day,
-                "md_offset": d.md_offset,
-                
-                "total_duration": d.total_duration,
-                "total_distance": d.total_distance,
-                "total_player_load": d.total_player_load,
-                "max_vel": d.max_vel,
-                "mean_heart_rate": d.mean_heart_rate,
-                "hsr_distance": d.hsr_distance,
-                "high_decel_count": d.high_decel_count,
-                "total_dive_count": d.total_dive_count,
-                "avg_time_to_feet": d.avg_time_to_feet,
-                "total_dive_load": total_dive_load,
-                "total_jumps": d.total_jumps,
-                
-                "metrics": metrics,
-            })
+        rows = [_daily_payload(d) async for d in gqs.aiterator(chunk_size=2000)]
 
         # 2. WorkloadFeaturesDaily (ACWRなどの分析値)
         wmap = {}
@@ -333,7 +524,7 @@ class WorkloadAthleteTimeseriesView(APIView):
             "risk_reasons",
             "params",
         ]
-        for w in wqs.values(*w_cols):
+        async for w in wqs.values(*w_cols):
             wmap[w["date"]] = w
 
         # 3. 結合
@@ -344,57 +535,199 @@ class WorkloadAthleteTimeseriesView(APIView):
             
             out.append({
                 **r,
-                "workload": {
-                    "acwr_load": w.get("acwr_load") if w else None,
-                    "acwr_total_distance": w.get("acwr_load") if w else None,
-                    "acwr_hsr": w.get("acwr_hsr") if w else None,
-                    "acwr_dive": w.get("acwr_dive") if w else None,
-                    "efficiency_index": w.get("efficiency_index") if w else None,
-                    "monotony_load": w.get("monotony_load") if w else None,
-                    "load_per_meter": w.get("load_per_meter") if w else None,
-                    "val_asymmetry": (w.get("params") or {}).get("val_asymmetry") if w else None,
-                    "decel_density": (w.get("params") or {}).get("decel_density") if w else None,
-                    "time_to_feet": (w.get("params") or {}).get("time_to_feet") if w else None,
-                    "risk_level": w.get("risk_level") if w else None,
-                    "risk_reasons": w.get("risk_reasons") if w else [],
-                },
+                "workload": _workload_payload(w),
             })
 
         return Response(out, status=status.HTTP_200_OK)
 
 
-class WorkloadUploadHistoryView(APIView):
+class WorkloadSyncView(AsyncAPIView):
+    """Delta sync: rows changed / deleted since the client's sync token."""
+
+    async def get(self, request):
+        since = request.query_params.get("since")
+        if since in (None, ""):
+            since = None
+        else:
+            try:
+                since = int(since)
+            except (TypeError, ValueError):
+                return Response(
+                    {"detail": "since は整数のトークンで指定してください。"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        athlete_id = request.query_params.get("athlete_id") or None
+
+        changes = await sync_to_async(changes_since)(since, athlete_id=athlete_id)
+        return Response(
+            {
+                "token": changes.token,
+                "reset": changes.reset,
+                "daily": [
+                    {"athlete_id": d.athlete_id, **_daily_payload(d)}
+                    for d in changes.daily
+                ],
+                "features": [
+                    {"athlete_id": w["athlete_id"], "date": w["date"], **_workload_payload(w)}
+                    for w in changes.features
+                ],
+                "deleted": {
+                    kind: [{"athlete_id": athlete, "date": day} for athlete, day in keys]
+                    for kind, keys in changes.deleted.items()
+                },
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class WorkloadEventStreamView(View):
+    """Server-sent events: ingestion progress ("ingest") and risk level changes ("risk").
+
+    Resumes after the ``Last-Event-ID`` header (or ``?last_event_id=``);
+    ``?kinds=ingest,risk`` limits the event types. Ingest events are only sent
+    for the upload tagged with ``?progress_id=``.
+    """
+
+    async def get(self, request):
+        last_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+        try:
+            last_id = int(last_id) if last_id else None
+        except ValueError:
+            last_id = None
+        kinds = [kind for kind in request.GET.get("kinds", "").split(",") if kind in live_events.KINDS]
+
+        progress_id = request.GET.get("progress_id") or None
+
+        response = StreamingHttpResponse(
+            live_events.stream(last_id, kinds, progress_id),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        # nginx などのプロキシでバッファリングさせない
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+def _streaming_body(request, chunks):
+    """Response body for ``chunks``; under ASGI the iterator is driven from a worker thread.
+
+    A sync iterator would otherwise be consumed in full before the first byte
+    is sent under ASGI.
+    """
+    if not isinstance(request, ASGIRequest):
+        return chunks
+
+    async def body():
+        done = object()
+        step = sync_to_async(next, thread_sensitive=True)
+        try:
+            while (chunk := await step(chunks, done)) is not done:
+                yield chunk
+        finally:
+            # 途中で切断されたらカーソルを閉じる
+            await sync_to_async(chunks.close, thread_sensitive=True)()
+
+    return body()
+
+
+class WorkloadExportView(View):
+    """Stream gps_daily + workload_features_daily rows as CSV or Parquet.
+
+    Query parameters: ``athlete_id`` (repeatable or comma separated), ``start``,
+    ``end``, ``columns``, ``flatten=metrics,params`` and ``format=csv|parquet``.
+    """
+
     def get(self, request):
+        fmt = request.GET.get("format", "csv")
+        spec = exports.ExportSpec(
+            athlete_ids=exports.parse_list(request.GET.getlist("athlete_id")) or None,
+            start=_parse_ymd(request.GET.get("start")),
+            end=_parse_ymd(request.GET.get("end")),
+            flatten=tuple(exports.parse_list(request.GET.getlist("flatten"))),
+        )
+        columns = exports.parse_list(request.GET.getlist("columns"))
+        if columns:
+            spec.columns = columns
+        try:
+            chunks = exports.iter_export(spec, fmt)
+        except exports.ExportError as exc:
+            return JsonResponse({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(
+            _streaming_body(request, chunks),
+            content_type=exports.CONTENT_TYPES[fmt],
+        )
+        response["Content-Disposition"] = f'attachment; filename="workload_export.{fmt}"'
+        return response
+
+
+class WorkloadUploadHistoryView(AsyncAPIView):
+    """Upload history, newest first; ``before=<upload_id>`` continues after the previous page.
+
+    Row / athlete counts were recorded on DataUpload at ingestion, so this is one
+    primary-key range read of data_uploads. The next page's URL is in the Link header.
+    """
+
+    MAX_LIMIT = 200
+
+    async def get(self, request):
         try:
             limit = int(request.query_params.get("limit", 20))
         except (TypeError, ValueError):
             limit = 20
+        limit = min(max(limit, 1), self.MAX_LIMIT)
+
+        qs = DataUpload.objects.order_by("-id")
+        before = request.query_params.get("before")
+        if before not in (None, ""):
+            try:
+                qs = qs.filter(id__lt=int(before))
+            except (TypeError, ValueError):
+                return Response(
+                    {"detail": "before は upload_id (整数) で指定してください。"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
 
-        uploads = DataUpload.objects.order_by("-uploaded_at")[:limit]
-        upload_ids = [upload.id for upload in uploads]
-
-        stats_map = {}
-        if upload_ids:
-            stats = (
-                GpsSessionRaw.objects.filter(upload_id__in=upload_ids)
-                .values("upload_id")
-                .annotate(rows=Count("id"), athletes=Count("athlete_id", distinct=True))
-            )
-            stats_map = {row["upload_id"]: row for row in stats}
+        columns = [
+            "id",
+            "source_filename",
+            "uploaded_at",
+            "uploaded_by",
+            "parse_status",
+            "row_count",
+            "athlete_count",
+            "first_date",
+            "last_date",
+            "encoding",
+            "stage_ms",
+        ]
+        # 1 件多く読んで次のページがあるかを判定する
+        uploads = [upload async for upload in qs.values(*columns)[: limit + 1]]
+        has_next = len(uploads) > limit
+        uploads = uploads[:limit]
 
-        data = []
-        for upload in uploads:
-            stat = stats_map.get(upload.id, {})
-            data.append(
-                {
-                    "upload_id": upload.id,
-                    "filename": upload.source_filename,
-                    "uploaded_at": upload.uploaded_at,
-                    "uploaded_by": upload.uploaded_by,
-                    "status": upload.parse_status,
-                    "rows": stat.get("rows", 0),
-                    "athletes": stat.get("athletes", 0),
-                }
-            )
+        data = [
+            {
+                "upload_id": upload["id"],
+                "filename": upload["source_filename"],
+                "uploaded_at": upload["uploaded_at"],
+                "uploaded_by": upload["uploaded_by"],
+                "status": upload["parse_status"],
+                "rows": upload["row_count"],
+                "athletes": upload["athlete_count"],
+                "first_date": upload["first_date"],
+                "last_date": upload["last_date"],
+                "encoding": upload["encoding"],
+                "stage_ms": upload["stage_ms"],
+            }
+            for upload in uploads
+        ]
 
-        return Response(data, status=status.HTTP_200_OK)
+        response = Response(data, status=status.HTTP_200_OK)
+        if has_next:
+            params = request.query_params.copy()
+            params["limit"] = str(limit)
+            params["before"] = str(uploads[-1]["id"])
+            next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+            response["Link"] = f'<{next_url}>; rel="next"'
+        return response
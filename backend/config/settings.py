@@ -30,6 +30,30 @@ def get_bool_env(setting_name: str, default: bool) -> bool:
         return default
     return value.strip().lower() in {"1", "true", "yes", "on"}
 
+
+def get_conn_max_age_env(setting_name: str, default: int) -> int | None:
+    """Return CONN_MAX_AGE from the environment; an empty value means unlimited (None)."""
+    value = os.environ.get(setting_name)
+    if value is None:
+        return default
+    value = value.strip()
+    return int(value) if value else None
+
+
+def read_only_database(settings_dict: dict) -> dict:
+    """Return a copy of a DATABASES entry whose connections are read-only.
+
+    Used as a local stand-in for a replica: PostgreSQL sessions start with
+    default_transaction_read_only, SQLite files are opened with mode=ro.
+    """
+    replica = {**settings_dict, 'OPTIONS': dict(settings_dict.get('OPTIONS', {}))}
+    if replica['ENGINE'].endswith('sqlite3'):
+        replica['NAME'] = f"file:{settings_dict['NAME']}?mode=ro"
+    else:
+        replica['OPTIONS']['options'] = '-c default_transaction_read_only=on'
+    replica['TEST'] = {'MIRROR': 'default'}
+    return replica
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -62,6 +86,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -69,7 +94,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    
+    'api.db_router.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -101,11 +126,44 @@ DATABASES = {
         'NAME': os.environ.get('POSTGRES_DB'),
         'USER': os.environ.get('POSTGRES_USER'),
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD'),
-        'HOST': 'db',
-        'PORT': 5432,
+        # compose の db サービス。compose の外 (ローカルの PostgreSQL など) では POSTGRES_HOST で指定
+        'HOST': os.environ.get('POSTGRES_HOST', 'db'),
+        'PORT': int(os.environ.get('POSTGRES_PORT', 5432)),
+        # 接続の再利用 (秒)。0 でリクエストごとに切断、空文字で無期限
+        'CONN_MAX_AGE': get_conn_max_age_env('POSTGRES_CONN_MAX_AGE', 60),
+        'CONN_HEALTH_CHECKS': get_bool_env('POSTGRES_CONN_HEALTH_CHECKS', True),
+        'OPTIONS': {},
     }
 }
 
+# psycopg 3 の接続プール (ASGI の複数ワーカー向け)。有効時は CONN_MAX_AGE を使わない
+if get_bool_env('POSTGRES_POOL', False):
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('POSTGRES_POOL_MIN_SIZE', 2)),
+        'max_size': int(os.environ.get('POSTGRES_POOL_MAX_SIZE', 10)),
+        'timeout': float(os.environ.get('POSTGRES_POOL_TIMEOUT', 10)),
+    }
+
+# 読み取り専用レプリカ (任意)。ダッシュボードの GET (選手一覧・時系列・アップロード履歴) を
+# api.db_router が振り分ける。取り込み・再計算は常に default
+# DATABASE_REPLICA_STANDIN=True はレプリカの代わりに default へ読み取り専用で接続する (ローカル検証用)
+REPLICA_DATABASE_ALIAS = 'replica'
+if os.environ.get('POSTGRES_REPLICA_HOST'):
+    DATABASES[REPLICA_DATABASE_ALIAS] = {
+        **DATABASES['default'],
+        'HOST': os.environ['POSTGRES_REPLICA_HOST'],
+        'PORT': int(os.environ.get('POSTGRES_REPLICA_PORT', 5432)),
+        'TEST': {'MIRROR': 'default'},
+    }
+elif get_bool_env('DATABASE_REPLICA_STANDIN', False):
+    DATABASES[REPLICA_DATABASE_ALIAS] = read_only_database(DATABASES['default'])
+
+DATABASE_ROUTERS = ['api.db_router.ReplicaRouter']
+
+# 書き込み後この秒数はそのクライアントの読み込みを default に固定する (read-your-writes)
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 15))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -147,7 +205,78 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+# JSON / CSV responses of at least this many bytes are compressed
+# (brotli when the client accepts it and the package is installed, otherwise gzip)
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.environ.get('RESPONSE_COMPRESSION_MIN_BYTES', 1024))
+RESPONSE_GZIP_LEVEL = int(os.environ.get('RESPONSE_GZIP_LEVEL', 4))
+RESPONSE_BROTLI_QUALITY = int(os.environ.get('RESPONSE_BROTLI_QUALITY', 4))
+
 CORS_ALLOWED_ORIGINS = get_csv_env("CORS_ALLOWED_ORIGINS", ["http://localhost:3000"])
+CORS_ALLOW_CREDENTIALS = True
 
 # Directory for training CSV files in data ingestion workflows
 TRAINING_DATA_DIR = Path(os.environ.get('TRAINING_DATA_DIR', BASE_DIR / 'data'))
+
+# Where raw CSV rows are kept: "db" (gps_sessions_raw JSON rows) or
+# "parquet" (TRAINING_DATA_DIR/raw/upload_<id>.parquet + gps_sessions_raw_index)
+RAW_STORAGE_BACKEND = os.environ.get('RAW_STORAGE_BACKEND', 'db')
+
+# First month of a season for gps_sessions_raw range partitions (manage_raw_partitions)
+RAW_PARTITION_SEASON_START_MONTH = int(os.environ.get('RAW_PARTITION_SEASON_START_MONTH', 1))
+
+# CSV ingestion: parse metric columns as floats and identifiers as categoricals
+# (uses the pyarrow engine when installed and WORKLOAD_CSV_ENGINE=auto)
+WORKLOAD_CSV_NATIVE_DTYPES = get_bool_env('WORKLOAD_CSV_NATIVE_DTYPES', False)
+WORKLOAD_CSV_FLOAT_DTYPE = os.environ.get('WORKLOAD_CSV_FLOAT_DTYPE', 'float64')
+WORKLOAD_CSV_ENGINE = os.environ.get('WORKLOAD_CSV_ENGINE', 'auto')
+# Upload batches up to this many bytes are read with the stdlib csv module instead of
+# pandas (same results, no DataFrame overhead); 0 always uses pandas
+WORKLOAD_CSV_FAST_PATH_BYTES = int(os.environ.get('WORKLOAD_CSV_FAST_PATH_BYTES', 512 * 1024))
+
+# Validation-only checks (/api/workload/validate/, --validate-only): files up to
+# FULL_SCAN_BYTES are scanned completely, larger ones are sampled with SAMPLE_ROWS rows
+WORKLOAD_VALIDATION_SAMPLE_ROWS = int(os.environ.get('WORKLOAD_VALIDATION_SAMPLE_ROWS', 10000))
+WORKLOAD_VALIDATION_FULL_SCAN_BYTES = int(os.environ.get('WORKLOAD_VALIDATION_FULL_SCAN_BYTES', 2 * 1024 * 1024))
+
+# Feature rebuilds after uploads: "immediate" (default) rebuilds per upload; "debounced" queues
+# athletes and runs one coalesced rebuild after a quiet period / max delay / size threshold
+FEATURE_REBUILD_MODE = os.environ.get('FEATURE_REBUILD_MODE', 'immediate')
+FEATURE_REBUILD_QUIET_SECONDS = float(os.environ.get('FEATURE_REBUILD_QUIET_SECONDS', 10))
+FEATURE_REBUILD_MAX_DELAY_SECONDS = float(os.environ.get('FEATURE_REBUILD_MAX_DELAY_SECONDS', 120))
+FEATURE_REBUILD_MAX_ATHLETES = int(os.environ.get('FEATURE_REBUILD_MAX_ATHLETES', 200))
+
+# Days deleted-row records are kept for /api/workload/sync/ (manage.py prune_sync_tombstones);
+# clients with an older sync token get a full resync
+SYNC_TOMBSTONE_RETENTION_DAYS = float(os.environ.get('SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+
+# /api/workload/events/ (server-sent events): poll interval, how long one stream stays
+# open before the client reconnects, and how long events are kept for Last-Event-ID resumes
+LIVE_EVENTS_POLL_SECONDS = float(os.environ.get('LIVE_EVENTS_POLL_SECONDS', 1.0))
+LIVE_EVENTS_STREAM_SECONDS = float(os.environ.get('LIVE_EVENTS_STREAM_SECONDS', 300))
+LIVE_EVENTS_RETENTION_SECONDS = float(os.environ.get('LIVE_EVENTS_RETENTION_SECONDS', 3600))
+
+# Worker processes used by `manage.py ingest_gps` to parse the files of a batch
+# (uploads through the API are always parsed inside the request process)
+WORKLOAD_INGEST_WORKERS = int(os.environ.get('WORKLOAD_INGEST_WORKERS', min(4, os.cpu_count() or 1)))
+
+# Limits for zip uploads, checked against the zip directory before anything is extracted:
+# number of members, uncompressed bytes per CSV and in total, and uncompressed / compressed ratio
+WORKLOAD_ZIP_MAX_MEMBERS = int(os.environ.get('WORKLOAD_ZIP_MAX_MEMBERS', 500))
+WORKLOAD_ZIP_MAX_FILE_BYTES = int(os.environ.get('WORKLOAD_ZIP_MAX_FILE_BYTES', 1 << 30))
+WORKLOAD_ZIP_MAX_TOTAL_BYTES = int(os.environ.get('WORKLOAD_ZIP_MAX_TOTAL_BYTES', 2 << 30))
+WORKLOAD_ZIP_MAX_RATIO = float(os.environ.get('WORKLOAD_ZIP_MAX_RATIO', 200))
+
+# Disk cache of api.feature_store.read_workload_frame results, keyed by the sync revision
+# (default TRAINING_DATA_DIR/cache/frames; an empty value disables the cache)
+WORKLOAD_FRAME_CACHE_DIR = os.environ.get('WORKLOAD_FRAME_CACHE_DIR')
+
+# Seconds the in-process athlete metadata cache may be reused before reloading
+# (committed writes bump the version in athlete_meta_version, which every worker checks)
+ATHLETE_CACHE_TTL = float(os.environ.get('ATHLETE_CACHE_TTL', 60))
@@ -0,0 +1,17 @@
+#!/bin/sh
+# DJANGO_SERVER=asgi: config/asgi.py を uvicorn の複数ワーカーで配信する (本番用)
+# それ以外: manage.py runserver (開発用、単一プロセス)
+set -e
+cd "$(dirname "$0")"
+
+python manage.py migrate
+
+if [ "${DJANGO_SERVER:-runserver}" = "asgi" ]; then
+  exec uvicorn config.asgi:application \
+    --host 0.0.0.0 \
+    --port "${PORT:-8000}" \
+    --workers "${WEB_CONCURRENCY:-4}" \
+    --proxy-headers
+fi
+
+exec python manage.py runserver 0.0.0.0:"${PORT:-8000}"
@@ -1,7 +1,11 @@
 import axios from "axios";
 
+const API_BASE_URL = "http://localhost:8000/api";
+
 const client = axios.create({
-  baseURL: "http://localhost:8000/api",
+  baseURL: API_BASE_URL,
+  // 書き込み直後の読み込みを primary に固定する Cookie (db_primary_pin) を送るため
+  withCredentials: true,
 });
 
 export async function fetchAthletes(params = {}) {
@@ -24,14 +28,77 @@ export async function deleteAthlete(athleteId) {
   await client.delete(`/workload/athletes/${athleteId}/`);
 }
 
+// 差分同期: since (前回の token) 以降に変わった行と削除された行だけを返す。
+// reset が true のときは全件が返るので手元のデータを捨てて入れ直す。
+export async function fetchWorkloadChanges(since = null, athleteId = null) {
+  const params = {};
+  if (since !== null && since !== undefined) {
+    params.since = since;
+  }
+  if (athleteId) {
+    params.athlete_id = athleteId;
+  }
+  const { data } = await client.get("/workload/sync/", { params });
+  return data;
+}
+
+// 時系列 API で feature 行がない日と同じ値
+const EMPTY_WORKLOAD = {
+  acwr_load: null,
+  acwr_total_distance: null,
+  acwr_hsr: null,
+  acwr_dive: null,
+  efficiency_index: null,
+  monotony_load: null,
+  load_per_meter: null,
+  val_asymmetry: null,
+  decel_density: null,
+  time_to_feet: null,
+  risk_level: null,
+  risk_reasons: [],
+};
+
+// 選手ごとに同期済みの行と token を保持する (ページを開き直しても差分だけ取る)
+const syncStores = new Map();
+
+// fetchTimeseries と同じ形の行を差分同期で返す
+export async function syncAthleteTimeseries(athleteId) {
+  const store = syncStores.get(athleteId) || { token: null, daily: new Map(), features: new Map() };
+  const changes = await fetchWorkloadChanges(store.token, athleteId);
+  if (changes.reset) {
+    store.daily.clear();
+    store.features.clear();
+  }
+  changes.deleted.daily.forEach(({ date }) => store.daily.delete(date));
+  changes.deleted.features.forEach(({ date }) => store.features.delete(date));
+  changes.daily.forEach(({ athlete_id: _athleteId, ...row }) => store.daily.set(row.date, row));
+  changes.features.forEach(({ athlete_id: _athleteId, date, ...workload }) =>
+    store.features.set(date, workload)
+  );
+  store.token = changes.token;
+  syncStores.set(athleteId, store);
+
+  return [...store.daily.keys()]
+    .sort()
+    .map((date) => ({ ...store.daily.get(date), workload: store.features.get(date) || EMPTY_WORKLOAD }));
+}
+
 export async function fetchUploadHistory(params = {}) {
   const { data } = await client.get("/workload/uploads/", { params });
   return data;
 }
 
-export async function uploadWorkloadCsv(file, uploadedBy = "", allowDuplicate = false) {
+export async function uploadWorkloadCsv(
+  file,
+  uploadedBy = "",
+  allowDuplicate = false,
+  progressId = ""
+) {
   const formData = new FormData();
   formData.append("file", file);
+  if (progressId) {
+    formData.append("progress_id", progressId);
+  }
   if (uploadedBy) {
     formData.append("uploaded_by", uploadedBy);
   }
@@ -41,3 +108,23 @@ export async function uploadWorkloadCsv(file, uploadedBy = "", allowDuplicate =
   const { data } = await client.post("/workload/ingest/", formData);
   return data;
 }
+
+// サーバー送信イベント: 取り込みの進捗 ("ingest") とリスクレベルの変化 ("risk")。
+// 取り込みの進捗は progressId を付けてアップロードした分だけが届く。戻り値の関数で購読をやめる。
+export function subscribeWorkloadEvents({ onIngest, onRisk, progressId = "" } = {}) {
+  const kinds = [onIngest && "ingest", onRisk && "risk"].filter(Boolean);
+  const params = new URLSearchParams({ kinds: kinds.join(",") });
+  if (progressId) {
+    params.set("progress_id", progressId);
+  }
+  const source = new EventSource(`${API_BASE_URL}/workload/events/?${params}`, {
+    withCredentials: true,
+  });
+  if (onIngest) {
+    source.addEventListener("ingest", (event) => onIngest(JSON.parse(event.data)));
+  }
+  if (onRisk) {
+    source.addEventListener("risk", (event) => onRisk(JSON.parse(event.data)));
+  }
+  return () => source.close();
+}
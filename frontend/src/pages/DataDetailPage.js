@@ -1,7 +1,7 @@
 import React, { useEffect, useMemo, useState } from "react";
 import { Chart } from "react-chartjs-2";
 import { Link, useNavigate, useParams } from "react-router-dom";
-import { fetchAthletes, fetchTimeseries } from "../api";
+import { fetchAthletes, syncAthleteTimeseries } from "../api";
 import titleLogo from "../components/title.jpg";
 
 const theme = {
@@ -336,7 +336,7 @@ export default function DataDetailPage() {
     const loadTimeseries = async () => {
       setLoading(true);
       try {
-        const ts = await fetchTimeseries(athleteId);
+        const ts = await syncAthleteTimeseries(athleteId);
         if (mounted) setRows(ts);
       } catch (e) {
         console.error(e);
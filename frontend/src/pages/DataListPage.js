@@ -1,6 +1,6 @@
 import React, { useEffect, useMemo, useState } from "react";
 import { Link } from "react-router-dom";
-import { fetchAthletes } from "../api";
+import { fetchAthletes, subscribeWorkloadEvents } from "../api";
 import playerJersey from "../components/player.png";
 import keeperJersey from "../components/keeper.png";
 import titleLogo from "../components/title.jpg";
@@ -29,8 +29,23 @@ export default function DataListPage() {
 
     loadAthletes();
 
+    // 他の画面からのアップロードで最新リスクが変わったら一覧に反映する
+    const unsubscribe = subscribeWorkloadEvents({
+      onRisk: (event) => {
+        if (!mounted) return;
+        setAthletes((current) =>
+          current.map((athlete) =>
+            athlete.athlete_id === event.athlete_id
+              ? { ...athlete, risk_level: event.current }
+              : athlete
+          )
+        );
+      },
+    });
+
     return () => {
       mounted = false;
+      unsubscribe();
     };
   }, []);
 
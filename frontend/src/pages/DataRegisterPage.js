@@ -1,8 +1,18 @@
 import React, { useEffect, useMemo, useState } from "react";
 import { Link } from "react-router-dom";
-import { fetchUploadHistory, uploadWorkloadCsv } from "../api";
+import { fetchUploadHistory, subscribeWorkloadEvents, uploadWorkloadCsv } from "../api";
 import titleLogo from "../components/title.jpg";
 
+const STAGE_LABELS = {
+  parsing: "CSVを読み込み中",
+  aggregating: "日次集計中",
+  raw_rows: "生データを保存中",
+  daily_rows: "日次データを保存中",
+  imported: "取り込み完了",
+  features: "指標を再計算中",
+  done: "完了",
+};
+
 export default function DataRegisterPage() {
   const [file, setFile] = useState(null);
   const [status, setStatus] = useState("idle");
@@ -12,6 +22,7 @@ export default function DataRegisterPage() {
   const [historyError, setHistoryError] = useState("");
   const [loginId, setLoginId] = useState("");
   const [allowDuplicate, setAllowDuplicate] = useState(false);
+  const [stage, setStage] = useState("");
 
   const fileLabel = useMemo(() => {
     if (!file) return "CSVファイルを選択してください";
@@ -32,18 +43,34 @@ export default function DataRegisterPage() {
 
     setStatus("loading");
     setSummary(null);
+    setStage("");
+
+    // 進捗イベントを自分のアップロード分だけ拾うための識別子
+    const progressId = `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+    const unsubscribe = subscribeWorkloadEvents({
+      progressId,
+      onIngest: (event) => {
+        if (event.progress_id === progressId) {
+          setStage(event.stage);
+        }
+      },
+    });
 
     try {
       const result = await uploadWorkloadCsv(
         file,
         loginId.trim(),
-        allowDuplicate
+        allowDuplicate,
+        progressId
       );
       setSummary(result);
       setStatus("success");
       loadHistory();
     } catch (err) {
       setStatus("error");
+    } finally {
+      unsubscribe();
+      setStage("");
     }
   };
 
@@ -155,6 +182,9 @@ export default function DataRegisterPage() {
                 {status === "loading" ? "アップロード中..." : "アップロード"}
               </button>
 
+              {status === "loading" && stage && (
+                <p className="status">処理中: {STAGE_LABELS[stage] || stage}</p>
+              )}
               {status === "success" && summary && (
                 <p className="status upload-result">{resultText}</p>
               )}
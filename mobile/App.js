@@ -144,10 +144,8 @@ export default function App() {
         return;
       }
 
-      const timeseriesResponse = await axios.get(
-        `${API_BASE_URL}/workload/athletes/${athlete.athlete_id}/timeseries/`
-      );
-      const normalized = normalizeRecords(timeseriesResponse.data);
+      const records = await syncAthleteRecords(athlete.athlete_id);
+      const normalized = normalizeRecords(records);
       const sorted = [...normalized].sort((a, b) => a.dateObj - b.dateObj);
       const latest = sorted[sorted.length - 1] || null;
       const riskLevel = normalizeRiskLevel(
@@ -423,6 +421,40 @@ function findAthleteByJersey(athletes, jerseyNumber) {
   );
 }
 
+// 選手ごとに同期済みの行と token を保持し、2 回目以降は /workload/sync/ の差分だけを取る
+const syncStores = new Map();
+
+async function syncAthleteRecords(athleteId) {
+  const store = syncStores.get(athleteId) || {
+    token: null,
+    daily: new Map(),
+    features: new Map(),
+  };
+  const params = { athlete_id: athleteId };
+  if (store.token !== null) {
+    params.since = store.token;
+  }
+  const { data } = await axios.get(`${API_BASE_URL}/workload/sync/`, { params });
+  if (data.reset) {
+    store.daily.clear();
+    store.features.clear();
+  }
+  data.deleted.daily.forEach(({ date }) => store.daily.delete(date));
+  data.deleted.features.forEach(({ date }) => store.features.delete(date));
+  data.daily.forEach(({ athlete_id: _athleteId, ...row }) => store.daily.set(row.date, row));
+  data.features.forEach(({ athlete_id: _athleteId, date, ...workload }) =>
+    store.features.set(date, workload)
+  );
+  store.token = data.token;
+  syncStores.set(athleteId, store);
+
+  // timeseries API と同じ形 (日次の行 + workload)
+  return [...store.daily.values()].map((row) => ({
+    ...row,
+    workload: store.features.get(row.date) || {},
+  }));
+}
+
 function normalizeRecords(rawRecords) {
   if (!Array.isArray(rawRecords)) {
     return [];